@@ -0,0 +1,132 @@
+# --- START OF FILE async_acquisition.py ---
+import time
+import asyncio
+import logging
+from collections import deque
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+OVERFLOW_POLICIES = ('drop-oldest', 'drop-newest', 'block')
+
+class FrameQueue:
+    """Bounded per-consumer queue with an overflow policy and depth/latency statistics.
+
+    'drop-oldest' evicts the oldest item when full, 'drop-newest' discards the incoming one, and
+    'block' accepts it but makes the producer pause reading the port until the consumer catches up.
+    With 'block', depth can exceed maxsize by at most one read batch.
+    """
+    def __init__(self, maxsize=64, policy='drop-oldest', name='consumer'):
+        if policy not in OVERFLOW_POLICIES: raise ValueError(f"Unknown overflow policy '{policy}' (expected one of {OVERFLOW_POLICIES})")
+        self.maxsize = int(maxsize); self.policy = policy; self.name = name
+        self._items = deque(); self._ready = asyncio.Event(); self._closed = False
+        self.on_space = None # Set by the producer for 'block' queues
+        self.offered = 0; self.delivered = 0; self.dropped = 0; self.max_depth = 0
+        self.latency_sum = 0.0; self.latency_max = 0.0
+
+    @property
+    def depth(self): return len(self._items)
+    @property
+    def full(self): return len(self._items) >= self.maxsize
+
+    def offer(self, item):
+        """Called on the event loop by the producer; never blocks. Returns False if the item was dropped."""
+        self.offered += 1
+        if self.full:
+            if self.policy == 'drop-newest': self.dropped += 1; return False
+            if self.policy == 'drop-oldest': self._items.popleft(); self.dropped += 1
+        self._items.append((time.perf_counter(), item))
+        self.max_depth = max(self.max_depth, len(self._items)); self._ready.set()
+        return True
+
+    async def get(self):
+        while not self._items:
+            if self._closed: raise EOFError(f"FrameQueue '{self.name}' closed")
+            self._ready.clear(); await self._ready.wait()
+        enqueued_at, item = self._items.popleft()
+        latency = time.perf_counter() - enqueued_at
+        self.latency_sum += latency; self.latency_max = max(self.latency_max, latency); self.delivered += 1
+        if self.on_space is not None and not self.full: self.on_space()
+        return item
+
+    def close(self): self._closed = True; self._ready.set()
+
+    def __aiter__(self): return self
+    async def __anext__(self):
+        try: return await self.get()
+        except EOFError: raise StopAsyncIteration
+
+    def stats(self):
+        return {'policy': self.policy, 'depth': self.depth, 'max_depth': self.max_depth, 'offered': self.offered,
+                'delivered': self.delivered, 'dropped': self.dropped, 'latency_max_s': self.latency_max,
+                'latency_mean_s': self.latency_sum / self.delivered if self.delivered else 0.0}
+
+class AsyncSerialStream:
+    """Non-blocking serial transport for one SensorDataReader on an asyncio event loop.
+
+    The port's file descriptor is watched with loop.add_reader(). Each readiness callback drains
+    what is buffered, decodes it with the reader's own CSV or binary path and fans the result out
+    to every subscriber queue. Binary mode offers one frame per item, CSV mode one sample batch
+    per item. Everything is also published to the reader's ring buffer, so get_latest() keeps working.
+    """
+    def __init__(self, reader):
+        self.reader = reader
+        self.subscribers = []
+        self.loop = None; self._fd = None; self._paused = False
+
+    @property
+    def running(self): return self.loop is not None
+
+    def start(self):
+        if self.running: return self
+        if not self.reader.is_connected: raise RuntimeError("AsyncSerialStream needs a connected SensorDataReader")
+        if self.reader.is_acquiring: raise RuntimeError("Stop the acquisition thread before using the asyncio stream")
+        self.loop = asyncio.get_running_loop()
+        self.reader.serial.timeout = 0 # Non-blocking reads; readiness comes from the event loop
+        self._fd = self.reader.serial.fileno()
+        self.loop.add_reader(self._fd, self._on_readable)
+        logging.info(f"Async stream started on {self.reader.port}")
+        return self
+
+    def stop(self):
+        if not self.running: return
+        if not self._paused: self.loop.remove_reader(self._fd)
+        for queue in list(self.subscribers): queue.close()
+        self.subscribers.clear(); self.loop = None; self._paused = False
+        self.reader.serial.timeout = self.reader.timeout
+
+    def subscribe(self, maxsize=64, policy='drop-oldest', name=None):
+        queue = FrameQueue(maxsize, policy, name or f"consumer{len(self.subscribers)}")
+        if policy == 'block': queue.on_space = self._resume
+        self.subscribers.append(queue); self._resume() # Reading resumes if it stopped for lack of subscribers
+        return queue
+
+    def unsubscribe(self, queue):
+        if queue in self.subscribers: self.subscribers.remove(queue); queue.close()
+        if not self.subscribers and self.running and not self._paused:
+            self.loop.remove_reader(self._fd); self._paused = True # Nobody to deliver to: leave the data in the OS buffer
+        else: self._resume()
+
+    def _on_readable(self):
+        try: chunk = self.reader._read_serial_chunk()
+        except Exception as e: logging.error(f"Async serial read error on {self.reader.port}: {e}"); self.stop(); return
+        if not chunk: return
+        if self.reader.frame_decoder is not None:
+            frames = self.reader.frame_decoder.feed(chunk)
+            if not len(frames): return
+            self.reader._publish(frames); items = list(frames)
+        else:
+            samples = self.reader._ingest_csv(chunk)
+            if not len(samples): return
+            self.reader._publish(samples); items = [samples]
+        for queue in self.subscribers:
+            for item in items: queue.offer(item)
+        if any(q.policy == 'block' and q.full for q in self.subscribers) and not self._paused:
+            self.loop.remove_reader(self._fd); self._paused = True # Backpressure: let the OS buffer fill
+
+    def _resume(self):
+        if not self._paused or not self.running or not self.subscribers: return
+        if any(q.policy == 'block' and q.full for q in self.subscribers): return
+        self.loop.add_reader(self._fd, self._on_readable); self._paused = False
+
+    def stats(self): return {queue.name: queue.stats() for queue in self.subscribers}
+# --- END OF FILE async_acquisition.py ---
@@ -0,0 +1,36 @@
+# --- START OF FILE bench_contact_regions.py ---
+import sys
+import time
+import logging
+import numpy as np
+from contact_regions import ContactRegionTracker
+from hardware_simulator import HardwareFrameSimulator
+from signal_conditioning import default_pipeline
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+def run(name, frames, threshold, rate_hz=100.0, connectivity=8):
+    """Tracks `frames` one at a time, as the live path does, and reports per-frame latency against the 1 / rate_hz budget."""
+    tracker = ContactRegionTracker(threshold=threshold, connectivity=connectivity)
+    tracker.update(frames[0]); tracker.reset() # warm-up
+    latency = np.empty(len(frames)); counts = np.empty(len(frames), dtype=int)
+    for i, frame in enumerate(frames):
+        t0 = time.perf_counter(); counts[i] = len(tracker.update(frame, i / rate_hz)); latency[i] = time.perf_counter() - t0
+    budget = 1.0 / rate_hz; ms = latency * 1e3
+    logging.info(f"{name:<32} {connectivity}-conn  mean {ms.mean():6.3f} ms  p99 {np.percentile(ms, 99):6.3f} ms  max {ms.max():6.3f} ms  "
+                 f"({budget / latency.mean():5.0f}x headroom at {rate_hz:.0f} Hz)  regions/frame {counts.mean():4.1f}  ids {tracker.next_id - 1}")
+    return latency
+
+if __name__ == '__main__':
+    # python bench_contact_regions.py [num_frames]
+    num_frames = int(sys.argv[1]) if len(sys.argv) > 1 else 3000
+    sim = HardwareFrameSimulator(seed=0); raw = sim.frames(num_frames)
+    pipeline = default_pipeline(noise_calibration_frames=0)
+    pipeline.stages[0].calibrate(np.abs(np.random.default_rng(0).normal(0, sim.noise_std, (200, raw.shape[1])))) # Idle sensor
+    conditioned = pipeline.process_block(raw)
+    for connectivity in (8, 4):
+        run("raw frames, threshold 5", raw, 5, connectivity=connectivity)
+        run("conditioned frames", conditioned, 0, connectivity=connectivity)
+    run("empty frames", np.zeros_like(raw[:500]), 5)
+    run("dense noise, threshold 0", np.random.default_rng(1).integers(0, 2, raw[:500].shape), 0) # Worst case: ~half the cells, many tiny regions
+# --- END OF FILE bench_contact_regions.py ---
@@ -0,0 +1,50 @@
+# --- START OF FILE bench_force_matrix.py ---
+import sys
+import time
+import logging
+import numpy as np
+import pandas as pd
+from data_processing import DataProcessor
+from synthetic_session import generate_session
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+def pivot_force_matrix(cleaned_data, ordered_tooth_sensor_pairs):
+    """Reference implementation: the former pivot_table + MultiIndex update path of DataProcessor.create_force_matrix."""
+    timestamps = sorted(cleaned_data['timestamp'].unique())
+    pivot_data = cleaned_data[['timestamp','tooth_id','sensor_point_id','force']].copy()
+    pivot_data['force'] = pd.to_numeric(pivot_data['force'],errors='coerce').astype(float)
+    pivot_df = pivot_data.pivot_table(index='timestamp',columns=['tooth_id','sensor_point_id'],values='force')
+    pivot_df.columns = pd.MultiIndex.from_tuples(pivot_df.columns)
+    temp_df = pd.DataFrame(index=timestamps,columns=pd.MultiIndex.from_tuples(ordered_tooth_sensor_pairs),dtype=float)
+    temp_df.update(pivot_df)
+    return temp_df.to_numpy(dtype=float), timestamps
+
+def make_session(num_rows, num_teeth=16, num_sensor_points_per_tooth=4, seed=0):
+    """Synthetic session of about `num_rows` samples with a few late duplicates and missing cells, as read from a port."""
+    rng = np.random.default_rng(seed)
+    steps = max(1, num_rows // (num_teeth * num_sensor_points_per_tooth))
+    df = pd.DataFrame(generate_session(steps * 0.1, num_teeth, num_sensor_points_per_tooth, rng=rng))
+    df = df.iloc[rng.random(len(df)) > 0.01] # Dropped samples leave NaN cells
+    resent = df.sample(frac=0.005, random_state=seed).copy(); resent['force'] = rng.uniform(0, 100, len(resent))
+    return pd.concat([df, resent], ignore_index=True)
+
+def bench(num_rows, run_reference=True):
+    df = make_session(num_rows)
+    processor = DataProcessor(df)
+    t0 = time.perf_counter(); processor.clean_data(); t_clean = time.perf_counter() - t0
+    t0 = time.perf_counter(); fm, ts = processor.create_force_matrix(); t_scatter = time.perf_counter() - t0
+    line = f"{len(df):>10} rows  clean_data {t_clean:7.3f}s  scatter {t_scatter:7.3f}s"
+    if run_reference:
+        t0 = time.perf_counter(); ref_fm, ref_ts = pivot_force_matrix(processor.cleaned_data, processor.ordered_tooth_sensor_pairs); t_pivot = time.perf_counter() - t0
+        same = np.array_equal(np.asarray(ts), np.asarray(ref_ts, dtype=float)) and np.array_equal(fm, ref_fm, equal_nan=True)
+        line += f"  pivot {t_pivot:7.3f}s  speedup {t_pivot / t_scatter:6.1f}x  identical={same}"
+        if not same: logging.error(f"Scatter and pivot force matrices differ at {len(df)} rows")
+    logging.info(line)
+
+if __name__ == '__main__':
+    # python bench_force_matrix.py [rows ...]   (defaults to 10k, 1M and 10M; append --no-reference to skip the pivot path)
+    args = [a for a in sys.argv[1:] if not a.startswith('--')]
+    sizes = [int(float(a)) for a in args] or [10_000, 1_000_000, 10_000_000]
+    for n in sizes: bench(n, run_reference='--no-reference' not in sys.argv)
+# --- END OF FILE bench_force_matrix.py ---
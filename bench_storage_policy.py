@@ -0,0 +1,54 @@
+# --- START OF FILE bench_storage_policy.py ---
+import sys
+import time
+import logging
+import numpy as np
+import pandas as pd
+from data_processing import DataProcessor
+from force_storage import STORAGE_POLICIES
+from synthetic_session import generate_session
+from hardware_simulator import HardwareFrameSimulator
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+def tooth_session(duration=600.0):
+    """16 teeth x 4 points at 10 Hz: nearly every cell carries force (dense)."""
+    return pd.DataFrame(generate_session(duration, 16, 4, rng=0))
+
+def hardware_session(num_frames=3000, floor=5):
+    """Simulated 44x52 grid frames in long format (tooth_id = grid row, sensor_point_id = grid column).
+
+    Readings at or below `floor` (the hardware views' contact threshold) are stored as 0, as a
+    noise-floored recording would be, which leaves most cells at zero most of the time.
+    """
+    sim = HardwareFrameSimulator(seed=0); frames = sim.frames(num_frames)
+    frames[frames <= floor] = 0
+    n_cells = frames.shape[1]
+    return pd.DataFrame({'timestamp': np.repeat(np.arange(num_frames) / sim.rate_hz, n_cells),
+                         'tooth_id': np.tile(sim.cell_rows.astype(int), num_frames), 'sensor_point_id': np.tile(sim.cell_cols.astype(int), num_frames),
+                         'force': frames.ravel().astype(float), 'contact_time': 0.0})
+
+def run(name, df):
+    reference = None
+    logging.info(f"--- {name}: {len(df)} samples ---")
+    for policy in STORAGE_POLICIES:
+        processor = DataProcessor(df, storage=policy); processor.clean_data()
+        t0 = time.perf_counter(); processor.create_force_matrix(); t_build = time.perf_counter() - t0
+        probe = np.random.default_rng(1).uniform(processor.timestamps[0], processor.timestamps[-1], 200)
+        t0 = time.perf_counter(); rows = [processor.get_all_forces_at_time(t)[1] for t in probe]; t_rows = (time.perf_counter() - t0) / len(probe)
+        t0 = time.perf_counter(); means = processor.compute_tooth_tables()['mean']; t_tables = time.perf_counter() - t0
+        if reference is None: reference = (rows, means)
+        same = all(np.allclose(a, b, rtol=1e-6, atol=1e-4) for a, b in zip(rows, reference[0])) and np.allclose(means, reference[1], rtol=1e-6, atol=1e-4)
+        report = processor.memory_report()
+        logging.info(f"{policy:>8} -> {report['force_matrix_kind']:<18} force_matrix {report['force_matrix'] / 2**20:8.2f} MiB "
+                     f"({report['savings_vs_dense64']:6.1%} saved vs dense64)  build {t_build:6.3f}s  row lookup {t_rows * 1e6:7.1f}us  "
+                     f"tooth tables {t_tables:6.3f}s  matches dense64={same}")
+
+if __name__ == '__main__':
+    # python bench_storage_policy.py [session.csv ...]   (defaults to a synthetic tooth session and simulated hardware frames)
+    if len(sys.argv) > 1:
+        for path in sys.argv[1:]: run(path, pd.read_csv(path))
+    else:
+        run("tooth session, 10 min", tooth_session())
+        run("hardware grid, 30 s at 100 Hz", hardware_session())
+# --- END OF FILE bench_storage_policy.py ---
@@ -0,0 +1,166 @@
+# --- START OF FILE contact_regions.py ---
+import time
+import logging
+import numpy as np
+from sensor_layouts import get_layout
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# One record per contact region per frame. id is stable across frames while the contact persists;
+# age counts the frames it has been tracked. Centroids are force-weighted in grid (row, col) units,
+# as in hardware_processing.FRAME_STATS_DTYPE.
+REGION_DTYPE = np.dtype([('timestamp', '<f8'), ('id', '<i4'), ('area', '<i4'), ('total', '<f8'), ('peak', '<f4'),
+                         ('centroid_row', '<f4'), ('centroid_col', '<f4'), ('age', '<i4')])
+
+def find_runs(mask):
+    """Horizontal runs of True in a 2D mask as (row, start, stop) arrays, sorted by row then start (stop exclusive)."""
+    rows_hit = np.flatnonzero(mask.any(axis=1)) # Empty rows never produce runs
+    if not len(rows_hit): empty = np.zeros(0, dtype=np.intp); return empty, empty, empty
+    padded = np.zeros((len(rows_hit), mask.shape[1] + 2), dtype=np.int8); padded[:, 1:-1] = mask[rows_hit]
+    edge_r, edge_c = np.nonzero(np.diff(padded, axis=1)) # Alternating rise/fall per row
+    return rows_hit[edge_r[0::2]], edge_c[0::2], edge_c[1::2]
+
+def label_runs(run_row, run_start, run_stop, connectivity=8):
+    """Connected-component label per run (0..n_regions-1) via union-find over overlapping runs in adjacent rows."""
+    n = len(run_row)
+    if not n: return np.zeros(0, dtype=np.intp), 0
+    reach = 1 if connectivity == 8 else 0
+    stride = int(run_stop.max()) + 2 # Row stride of the run keys; the +2 keeps the +-1 diagonal reach inside the next row
+    start_key = run_row * stride + run_start; end_key = run_row * stride + run_stop - 1 # Both ascending in run order
+    # Runs in row r + 1 touching run i form a contiguous range: from the first ending at or after start - reach
+    # to the last starting at or before stop - 1 + reach
+    lo = np.searchsorted(end_key, (run_row + 1) * stride + run_start - reach, side='left')
+    hi = np.searchsorted(start_key, (run_row + 1) * stride + run_stop - 1 + reach, side='right')
+    counts = np.maximum(hi - lo, 0)
+    a = np.repeat(np.arange(n), counts); b = np.repeat(lo - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+    parent = list(range(n))
+    for i, j in zip(a.tolist(), b.tolist()):
+        while parent[i] != i: parent[i] = parent[parent[i]]; i = parent[i]
+        while parent[j] != j: parent[j] = parent[parent[j]]; j = parent[j]
+        if i != j: parent[max(i, j)] = min(i, j)
+    roots = np.array(parent, dtype=np.intp)
+    while True: # Flatten the remaining chains
+        nxt = roots[roots]
+        if np.array_equal(nxt, roots): break
+        roots = nxt
+    _, labels = np.unique(roots, return_inverse=True)
+    return labels, int(labels.max()) + 1
+
+def label_grid(mask, connectivity=8):
+    """(labels, n_regions) for a 2D bool mask; labels is an int32 grid, 0 background and 1..n per region."""
+    run_row, run_start, run_stop = find_runs(mask)
+    run_labels, n = label_runs(run_row, run_start, run_stop, connectivity)
+    labels = np.zeros(mask.shape, dtype=np.int32)
+    if n:
+        lengths = run_stop - run_start
+        cells = np.repeat(run_row * mask.shape[1] + run_start - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+        labels.ravel()[cells] = np.repeat(run_labels + 1, lengths)
+    return labels, n
+
+class ContactRegionTracker:
+    """Per-frame contact-region segmentation and tracking over a hardware sensor grid (default layout: the 44x52 arch).
+
+    Cells above `threshold` are labelled into connected regions (8- or 4-connected, union-find over
+    horizontal runs, so empty rows cost nothing). Each region gets area, total force, peak and a
+    force-weighted centroid, and keeps its id from frame to frame: regions are matched to the previous
+    frame's by cell overlap, then by centroid distance (up to `max_distance` cells) for contacts that
+    moved clear of their old footprint. Regions smaller than `min_area` cells are ignored.
+
+    Frames may be flat valid-region frames (layout order, as HardwareFrameProcessor stores them),
+    full-grid layout.frame_cells frames, or (layout.rows, layout.cols) grids.
+    """
+    def __init__(self, threshold=5, connectivity=8, min_area=1, max_distance=3.0, layout=None):
+        if connectivity not in (4, 8): raise ValueError("connectivity must be 4 or 8")
+        self.layout = layout if layout is not None else get_layout()
+        self.threshold = threshold; self.connectivity = connectivity
+        self.min_area = min_area; self.max_distance = max_distance
+        self.labels = np.zeros((self.layout.rows, self.layout.cols), dtype=np.int32) # Last frame's labels, remapped to track ids
+        self.regions = np.zeros(0, dtype=REGION_DTYPE)
+        self.next_id = 1; self.frames_processed = 0; self.time_spent = 0.0
+
+    def reset(self):
+        self.labels[:] = 0; self.regions = np.zeros(0, dtype=REGION_DTYPE)
+        self.next_id = 1; self.frames_processed = 0; self.time_spent = 0.0
+
+    def _grid(self, frame):
+        frame = np.asarray(frame)
+        layout = self.layout
+        if frame.shape == (layout.rows, layout.cols): return frame
+        if frame.size == layout.frame_cells: return frame.reshape(layout.rows, layout.cols)
+        if frame.size != layout.valid_count: raise ValueError(f"Expected a frame of {layout.valid_count} or {layout.frame_cells} cells, got {frame.size}")
+        return layout.scatter(frame)
+
+    def segment(self, frame):
+        """(labels, regions) for one frame without tracking: labels 1..n on the grid, regions with id = label."""
+        grid = self._grid(frame)
+        labels, n = label_grid(grid > self.threshold, self.connectivity)
+        regions = np.zeros(n, dtype=REGION_DTYPE)
+        if not n: return labels, regions
+        flat = labels.ravel(); hit = np.flatnonzero(flat)
+        lab = flat[hit] - 1; force = grid.ravel()[hit].astype(np.float64)
+        rows, cols = np.divmod(hit, self.layout.cols)
+        area = np.bincount(lab, minlength=n); total = np.bincount(lab, force, minlength=n)
+        peak = np.full(n, -np.inf); np.maximum.at(peak, lab, force)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            regions['centroid_row'] = np.where(total > 0, np.bincount(lab, force * rows, minlength=n) / total, np.bincount(lab, rows, minlength=n) / area)
+            regions['centroid_col'] = np.where(total > 0, np.bincount(lab, force * cols, minlength=n) / total, np.bincount(lab, cols, minlength=n) / area)
+        regions['id'] = np.arange(1, n + 1); regions['area'] = area; regions['total'] = total; regions['peak'] = peak
+        if self.min_area > 1 and (area < self.min_area).any():
+            keep = area >= self.min_area
+            remap = np.zeros(n + 1, dtype=np.int32); remap[1:][keep] = np.arange(1, keep.sum() + 1)
+            labels = remap[labels]; regions = regions[keep]; regions['id'] = np.arange(1, len(regions) + 1)
+        return labels, regions
+
+    def _match(self, labels, regions):
+        """Track ids for this frame's regions (label order), from the previous frame's labels and regions."""
+        n, prev = len(regions), self.regions
+        ids = np.zeros(n, dtype=np.int32)
+        if n and len(prev):
+            both = (labels > 0) & (self.labels > 0)
+            if both.any(): # Overlap counts per (previous id, new label) pair, largest first
+                pairs, overlap = np.unique(self.labels[both].astype(np.int64) * (n + 1) + labels[both], return_counts=True)
+                taken = set()
+                for k in np.argsort(-overlap, kind='stable'):
+                    old_id, new = divmod(int(pairs[k]), n + 1)
+                    if ids[new - 1] or old_id in taken: continue
+                    ids[new - 1] = old_id; taken.add(old_id)
+            else: taken = set()
+            left_new = np.flatnonzero(ids == 0); left_old = np.array([i for i, r in enumerate(prev['id']) if int(r) not in taken], dtype=np.intp)
+            if len(left_new) and len(left_old) and self.max_distance > 0:
+                d = np.hypot(regions['centroid_row'][left_new, None] - prev['centroid_row'][None, left_old],
+                             regions['centroid_col'][left_new, None] - prev['centroid_col'][None, left_old])
+                for k in np.argsort(d, axis=None, kind='stable'):
+                    i, j = divmod(int(k), len(left_old))
+                    if d[i, j] > self.max_distance: break
+                    if ids[left_new[i]] or int(prev['id'][left_old[j]]) in taken: continue
+                    ids[left_new[i]] = prev['id'][left_old[j]]; taken.add(int(prev['id'][left_old[j]]))
+        fresh = np.flatnonzero(ids == 0)
+        ids[fresh] = np.arange(self.next_id, self.next_id + len(fresh)); self.next_id += len(fresh)
+        return ids
+
+    def update(self, frame, timestamp=None):
+        """Segments and tracks one frame; returns its REGION_DTYPE records (also kept in `regions`, labels in `labels`)."""
+        t0 = time.perf_counter()
+        labels, regions = self.segment(frame)
+        ids = self._match(labels, regions)
+        if len(self.regions):
+            age = dict(zip(self.regions['id'].tolist(), self.regions['age'].tolist()))
+            regions['age'] = [age.get(i, 0) + 1 for i in ids.tolist()]
+        else: regions['age'] = 1
+        regions['id'] = ids; regions['timestamp'] = time.monotonic() if timestamp is None else timestamp
+        self.labels = np.concatenate(([0], ids)).astype(np.int32)[labels]
+        self.regions = regions
+        self.frames_processed += 1; self.time_spent += time.perf_counter() - t0
+        return regions
+
+    def update_block(self, frames, timestamps=None):
+        """Tracks an (n, cells) block frame by frame; returns all region records concatenated in frame order."""
+        frames = np.asarray(frames)
+        if frames.ndim == 1 or frames.shape == (self.layout.rows, self.layout.cols): frames = frames[None]
+        timestamps = [None] * len(frames) if timestamps is None else np.asarray(timestamps, dtype=float).reshape(-1)
+        out = [self.update(f, t) for f, t in zip(frames, timestamps)]
+        return np.concatenate(out) if out else np.zeros(0, dtype=REGION_DTYPE)
+
+    def stats(self):
+        return {'frames': self.frames_processed, 'mean_ms_per_frame': 1e3 * self.time_spent / self.frames_processed if self.frames_processed else 0.0}
+# --- END OF FILE contact_regions.py ---
@@ -1,91 +1,236 @@
 # --- START OF FILE data_acquisition.py ---
 import serial
-import pandas as pd
 import numpy as np
 import time
 import logging
+import threading
+from collections import deque
+from ring_buffer import RingBuffer, SAMPLE_DTYPE
+from frame_protocol import FrameDecoder, frame_dtype
+from sensor_layouts import get_layout
+from sample_store import ColumnarSampleStore
+from synthetic_session import generate_session_chunks
+from session_file import write_session, SESSION_EXTENSION
+from serial_capture import CaptureWriter
+from async_acquisition import AsyncSerialStream
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+def parse_sample_lines(lines):
+    """Parses complete CSV lines (bytes, no newline) into a SAMPLE_DTYPE array in one vectorized call.
+
+    Returns (records, n_invalid). Lines without exactly five fields are dropped up front; if a
+    numeric field is malformed the batch falls back to per-line conversion to isolate bad lines.
+    Lines whose tooth_id or sensor_point_id does not fit SAMPLE_DTYPE's int16 fields are invalid too
+    (they would otherwise wrap onto another tooth or sensor point).
+    """
+    lines = [ln for ln in lines if ln.strip()]
+    good = [ln for ln in lines if ln.count(b',') == 4]
+    n_invalid = len(lines) - len(good)
+    if not good: return np.empty(0, dtype=SAMPLE_DTYPE), n_invalid
+    try: values = np.array(b','.join(good).split(b',')).astype(np.float64).reshape(-1, 5)
+    except ValueError:
+        rows = []
+        for ln in good:
+            try: rows.append(np.array(ln.split(b',')).astype(np.float64))
+            except ValueError: n_invalid += 1
+        if not rows: return np.empty(0, dtype=SAMPLE_DTYPE), n_invalid
+        values = np.vstack(rows)
+    in_range = np.ones(len(values), dtype=bool)
+    for col, name in ((1, 'tooth_id'), (2, 'sensor_point_id')):
+        info = np.iinfo(SAMPLE_DTYPE[name]) # Values truncate toward zero, so (min - 1, max + 1) exclusive is what fits
+        in_range &= (values[:, col] > info.min - 1) & (values[:, col] < info.max + 1) # NaN fails both
+    if not in_range.all(): n_invalid += int(np.count_nonzero(~in_range)); values = values[in_range]
+    records = np.empty(len(values), dtype=SAMPLE_DTYPE)
+    for col, name in enumerate(SAMPLE_DTYPE.names): records[name] = values[:, col] # int fields truncate like int()
+    return records, n_invalid
+
 class SensorDataReader:
-    def __init__(self, port='COM4', baudrate=115200, timeout=1):
+    def __init__(self, port='COM4', baudrate=115200, timeout=1, ring_capacity=None, protocol='csv', frame_cells=None, capture_path=None, layout=None):
+        if protocol not in ('csv', 'binary'): raise ValueError(f"Unknown protocol '{protocol}' (expected 'csv' or 'binary')")
         self.port = port
         self.baudrate = baudrate
         self.timeout = timeout
         self.serial = None
-        self.data = pd.DataFrame(columns=['timestamp', 'tooth_id', 'sensor_point_id', 'force', 'contact_time'])
+        self.store = ColumnarSampleStore() # All acquired/simulated samples; DataFrame built only on demand
         self.is_connected = False
+        # 'csv': one ASCII line per sensor point. 'binary': framed full-grid frames (see frame_protocol.py)
+        self.protocol = protocol
+        self.layout = layout if layout is not None else get_layout() # Sensor geometry of binary frames
+        frame_cells = frame_cells or self.layout.frame_cells
+        self.frame_decoder = FrameDecoder(frame_cells) if protocol == 'binary' else None
+        # Continuous acquisition: the reader thread drains the port into this ring buffer
+        if protocol == 'binary': self.ring = RingBuffer(ring_capacity or 1024, frame_dtype(frame_cells))
+        else: self.ring = RingBuffer(ring_capacity or 65536, SAMPLE_DTYPE)
+        self._csv_pending = b'' # Partial trailing line carried over to the next read
+        self.invalid_line_count = 0
+        self.capture_path = capture_path # When set, raw serial bytes are teed here with arrival times
+        self.capture = None
+        self.async_stream = None # AsyncSerialStream, created on first frames() call
+        # (last device timestamp of a batch, host time.monotonic() on arrival) pairs for clock alignment
+        self.clock_observations = deque(maxlen=512)
+        self._acq_thread = None
+        self._acq_stop = threading.Event()
+
+    @property
+    def data(self):
+        """DataFrame view of the sample store (materialized lazily and cached until the next append)."""
+        return self.store.to_dataframe()
+    @data.setter
+    def data(self, samples): self.store.clear(); self.store.append(samples) # DataFrame or SAMPLE_DTYPE records replace the stored samples
 
     def connect(self):
         try:
             self.serial = serial.Serial(self.port, self.baudrate, timeout=self.timeout)
             self.is_connected = True
             logging.info(f"Connected to sensor on {self.port}")
+            if self.capture_path and self.capture is None: self.capture = CaptureWriter(self.capture_path)
         except serial.SerialException as e:
             logging.error(f"Failed to connect to sensor: {e}")
             self.is_connected = False
 
     def read_data(self, duration=5):
+        """Blocking CSV-mode read for `duration` seconds; returns the ColumnarSampleStore (`store`) holding every sample so far.
+
+        No DataFrame is built here: DataProcessor materializes the store when it needs one, or use `data`.
+        """
+        if self.is_acquiring:
+            logging.warning("Continuous acquisition is running; poll get_since()/get_latest() instead of read_data().")
+            return self.store
+        if self.protocol == 'binary':
+            logging.warning("Binary frame protocol selected; use read_frames() for full-grid frames.")
+            return self.store
         if not self.is_connected:
             logging.warning("No sensor connected. Using simulated data.")
             return self.simulate_data(duration=duration, num_teeth=16, num_sensor_points_per_tooth=4) 
 
-        start_time = time.time()
-        data_list = []
+        start_time = time.time(); batches = []; invalid_before = self.invalid_line_count
         while time.time() - start_time < duration:
-            try:
-                line = self.serial.readline().decode('utf-8').strip()
-                if line:
-                    try:
-                        parts = list(map(float, line.split(',')))
-                        if len(parts) == 5: 
-                            timestamp, tooth_id, sensor_point_id, force, contact_time = parts
-                            data_list.append({
-                                'timestamp': timestamp, 'tooth_id': int(tooth_id),
-                                'sensor_point_id': int(sensor_point_id), 
-                                'force': force, 'contact_time': contact_time
-                            })
-                        else: logging.warning(f"Invalid data line (expected 5 parts): {line}")
-                    except ValueError as e: logging.warning(f"Invalid data format: {line}, error: {e}")
-                time.sleep(0.01)
+            try: chunk = self._read_serial_chunk() # Everything buffered in one go
+            except serial.SerialException as e: logging.error(f"Serial read error: {e}"); break
+            records = self._ingest_csv(chunk)
+            if len(records): batches.append(records)
+        invalid = self.invalid_line_count - invalid_before
+        if invalid: logging.warning(f"Skipped {invalid} invalid data lines during read.")
+        for records in batches: self.store.append(records)
+        return self.store
+
+    def read_frames(self, duration=5):
+        """Blocking binary-mode read: returns all frames decoded within `duration` as a frame_dtype array."""
+        if self.protocol != 'binary': raise ValueError("read_frames() requires protocol='binary'")
+        if not self.is_connected: logging.warning("No sensor connected."); return np.empty(0, dtype=self.ring.dtype)
+        start_time = time.time(); batches = []
+        while time.time() - start_time < duration:
+            try: chunk = self._read_serial_chunk()
             except serial.SerialException as e: logging.error(f"Serial read error: {e}"); break
-        if data_list:
-            new_data = pd.DataFrame(data_list)
-            self.data = pd.concat([self.data, new_data], ignore_index=True) if not self.data.empty else new_data
-        return self.data
-
-    def simulate_data(self, duration=5, num_teeth=16, num_sensor_points_per_tooth=4):
-        timestamps = np.arange(0, duration, 0.1)
-        data_list = []
-        for t in timestamps:
-            for tooth_id in range(1, num_teeth + 1):
-                base_force_on_tooth = np.random.uniform(5, 60) * (0.8 + 0.4 * np.sin(t * 0.5 + tooth_id * 0.3))
-                if 4 <= tooth_id <= 6 or 11 <= tooth_id <= 13: base_force_on_tooth *= np.random.uniform(0.7, 1.3)
-                elif tooth_id <= 3 or tooth_id >= 14: base_force_on_tooth *= np.random.uniform(0.9, 1.5)
-                for sensor_point_idx in range(1, num_sensor_points_per_tooth + 1):
-                    variation_factor = 1.0
-                    if num_sensor_points_per_tooth == 4:
-                        if sensor_point_idx == 1: variation_factor = np.random.uniform(0.7, 1.1)
-                        elif sensor_point_idx == 2: variation_factor = np.random.uniform(0.9, 1.3)
-                        elif sensor_point_idx == 3: variation_factor = np.random.uniform(0.6, 1.0)
-                        elif sensor_point_idx == 4: variation_factor = np.random.uniform(0.8, 1.2)
-                    else: variation_factor = np.random.uniform(0.7, 1.3)
-                    force = base_force_on_tooth * variation_factor + np.random.uniform(-10, 10)
-                    force = max(0, min(100, force)) 
-                    contact_time = np.random.uniform(0.01, 0.05)
-                    data_list.append({'timestamp': t, 'tooth_id': tooth_id, 'sensor_point_id': sensor_point_idx,
-                                      'force': force, 'contact_time': contact_time})
-        sim_data = pd.DataFrame(data_list)
-        if not self.data.empty and set(self.data.columns) == set(sim_data.columns):
-            self.data = pd.concat([self.data, sim_data], ignore_index=True)
-        else:
-            if not self.data.empty: logging.warning("Sim data replacing existing data due to column mismatch or empty.")
-            self.data = sim_data
-        logging.info(f"Generated simulated data: {len(sim_data)} rows, {num_teeth} teeth, {num_sensor_points_per_tooth} sensor points/tooth.")
-        return self.data
+            if chunk:
+                frames = self.frame_decoder.feed(chunk)
+                if len(frames): batches.append(frames)
+        if self.frame_decoder.bad_frames: logging.warning(f"Binary protocol: {self.frame_decoder.bad_frames} bad frames so far, {self.frame_decoder.resync_bytes} bytes skipped resyncing.")
+        return np.concatenate(batches) if batches else np.empty(0, dtype=self.ring.dtype)
+
+    def simulate_data(self, duration=5, num_teeth=16, num_sensor_points_per_tooth=4, seed=None):
+        """Appends a synthetic session (see synthetic_session.py) and returns the store; `seed` makes it reproducible."""
+        total = 0
+        for records in generate_session_chunks(duration, num_teeth, num_sensor_points_per_tooth, rng=seed):
+            self.store.append(records); total += len(records)
+        logging.info(f"Generated simulated data: {total} rows, {num_teeth} teeth, {num_sensor_points_per_tooth} sensor points/tooth.")
+        return self.store
+
+    # --- Continuous acquisition ---
+    @property
+    def is_acquiring(self): return self._acq_thread is not None and self._acq_thread.is_alive()
+
+    def start_acquisition(self):
+        """Starts the background reader thread. Samples become available via get_latest()/get_since()."""
+        if self.is_acquiring: return True
+        if not self.is_connected: logging.warning("Cannot start acquisition: no sensor connected."); return False
+        self._acq_stop.clear()
+        self._acq_thread = threading.Thread(target=self._acquisition_loop, name=f"SensorAcq-{self.port}", daemon=True)
+        self._acq_thread.start(); logging.info(f"Continuous acquisition started on {self.port}")
+        return True
+
+    def stop_acquisition(self, join_timeout=2.0):
+        if self._acq_thread is None: return
+        self._acq_stop.set(); self._acq_thread.join(join_timeout)
+        if self._acq_thread.is_alive(): logging.warning("Acquisition thread did not stop within timeout.")
+        else: logging.info(f"Continuous acquisition stopped ({self.ring.write_seq} samples, {self.invalid_line_count} invalid lines)")
+        self._acq_thread = None
+
+    def get_latest(self, n=1):
+        """Non-blocking: newest `n` samples as a SAMPLE_DTYPE array."""
+        return self.ring.get_latest(n)
+
+    def get_since(self, seq):
+        """Non-blocking: (samples, next_seq, missed) for everything acquired since `seq`."""
+        return self.ring.get_since(seq)
+
+    def _acquisition_loop(self):
+        while not self._acq_stop.is_set():
+            try:
+                chunk = self._read_serial_chunk()
+            except serial.SerialException as e: logging.error(f"Serial read error in acquisition thread: {e}"); break
+            if not chunk: continue
+            if self.frame_decoder is not None:
+                frames = self.frame_decoder.feed(chunk)
+                if len(frames): self._publish(frames)
+                continue
+            records = self._ingest_csv(chunk)
+            if len(records): self._publish(records)
+
+    def _publish(self, records):
+        # Observation first: anyone who sees these records in the ring can already align their clock
+        self.clock_observations.append((float(records['timestamp'][-1]), time.monotonic()))
+        self.ring.push(records)
+
+    # Same interface as the hardware data sources MainAppWindow polls (binary protocol only)
+    @property
+    def running(self): return self.is_acquiring
+
+    def get_latest_raw_forces(self):
+        """Latest binary frame reduced to the layout's valid region, in the visualizers' flat order."""
+        if self.frame_decoder is None: return None
+        latest = self.ring.get_latest(1)
+        if not len(latest): return None
+        return latest['cells'][0][self.layout.grid_index]
+
+    # --- asyncio interface ---
+    async def frames(self, maxsize=64, policy='drop-oldest', name=None):
+        """`async for item in reader.frames():` frames (binary) or sample batches (CSV) from a non-blocking transport.
+
+        Every call gets its own bounded queue, so several consumers share one port on one event loop.
+        """
+        if self.async_stream is None: self.async_stream = AsyncSerialStream(self)
+        stream = self.async_stream.start()
+        queue = stream.subscribe(maxsize, policy, name)
+        try:
+            async for item in queue: yield item
+        finally: stream.unsubscribe(queue)
+
+    def _read_serial_chunk(self):
+        """Takes whatever is buffered; when idle, blocks for one byte (bounded by the port timeout). Tees to the capture."""
+        chunk = self.serial.read(self.serial.in_waiting or 1)
+        if chunk and self.capture is not None: self.capture.write(chunk)
+        return chunk
+
+    def _ingest_csv(self, chunk):
+        """Splits buffered bytes into lines, parses the complete ones and keeps the partial tail."""
+        if not chunk: return np.empty(0, dtype=SAMPLE_DTYPE)
+        lines = (self._csv_pending + chunk).split(b'\n'); self._csv_pending = lines.pop()
+        records, n_invalid = parse_sample_lines(lines)
+        self.invalid_line_count += n_invalid
+        return records
 
     def save_data(self, filename='sensor_data.csv'):
-        if not self.data.empty: self.data.to_csv(filename, index=False); logging.info(f"Data saved to {filename}")
+        if self.store.empty: return
+        if filename.endswith(SESSION_EXTENSION): # Native memory-mappable session instead of CSV
+            from data_processing import DataProcessor
+            processor = DataProcessor(self.store); force_matrix, timestamps = processor.create_force_matrix()
+            write_session(filename, timestamps, force_matrix, processor.ordered_tooth_sensor_pairs); return
+        self.store.to_dataframe().to_csv(filename, index=False); logging.info(f"Data saved to {filename}")
     def close(self):
+        self.stop_acquisition()
+        if self.async_stream is not None: self.async_stream.stop(); self.async_stream = None
+        if self.capture is not None: self.capture.close(); self.capture = None
         if self.serial and self.is_connected: self.serial.close(); self.is_connected = False; logging.info("Sensor connection closed")
 # --- END OF FILE data_acquisition.py ---
\ No newline at end of file
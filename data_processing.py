@@ -1,41 +1,139 @@
 # --- START OF FILE data_processing.py ---
+import os
 import numpy as np
 import logging
 import pandas as pd
+from session_file import SessionFile
+from force_storage import STORAGE_POLICIES, SparseForceMatrix, build_force_matrix, keep_last_cells
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+PAIR_CODE_BASE = 1 << 16 # (tooth_id, sensor_point_id) -> tooth_id * PAIR_CODE_BASE + sensor_point_id, sorts like the pair
+
+def encode_pairs(tooth_ids, sensor_point_ids):
+    return np.asarray(tooth_ids).astype(np.int64) * PAIR_CODE_BASE + np.asarray(sensor_point_ids).astype(np.int64)
+
+def decode_pairs(codes): return [(int(c // PAIR_CODE_BASE), int(c % PAIR_CODE_BASE)) for c in codes]
+
+def scatter_keep_last(matrix, rows, cols, values):
+    """matrix[rows, cols] = values where repeated (row, col) cells keep the last value, like drop_duplicates(keep='last')."""
+    rows, cols, values = keep_last_cells(matrix.shape[1], rows, cols, values)
+    matrix[rows, cols] = values
+    return matrix
+
+REQUIRED_COLUMNS = ['timestamp','tooth_id','sensor_point_id','force','contact_time']
+
+def clean_samples(source):
+    """clean_data's row filtering for one DataFrame or CSV chunk: coerced types, invalid rows dropped, duplicates keep='last'."""
+    if not isinstance(source, pd.DataFrame): logging.error("Input not DataFrame."); return pd.DataFrame()
+    if not all(col in source.columns for col in REQUIRED_COLUMNS):
+        logging.error(f"Data missing cols: {REQUIRED_COLUMNS}. Got: {list(source.columns)}"); return pd.DataFrame()
+    cleaned = source.dropna(subset=REQUIRED_COLUMNS).copy()
+    try:
+        cleaned['timestamp']=pd.to_numeric(cleaned['timestamp'])
+        cleaned['tooth_id']=pd.to_numeric(cleaned['tooth_id']).astype(int)
+        cleaned['sensor_point_id']=pd.to_numeric(cleaned['sensor_point_id']).astype(int)
+        cleaned['force']=pd.to_numeric(cleaned['force'],errors='coerce').astype(float)
+        cleaned['contact_time']=pd.to_numeric(cleaned['contact_time'],errors='coerce').astype(float)
+    except Exception as e: logging.error(f"Type conversion error: {e}"); return pd.DataFrame()
+    cleaned.dropna(subset=['force','contact_time'], inplace=True)
+    cleaned = cleaned[(cleaned['force'] >= 0) & (cleaned['contact_time'] >= 0)]
+    return cleaned.drop_duplicates(subset=['timestamp','tooth_id','sensor_point_id'], keep='last')
+
 class DataProcessor:
-    def __init__(self, data):
-        self.data = data 
+    def __init__(self, data, storage='dense64'):
+        if storage not in STORAGE_POLICIES: raise ValueError(f"Unknown storage policy '{storage}' (expected one of {STORAGE_POLICIES})")
+        self.data = data # DataFrame, or a ColumnarSampleStore that is materialized on first use
+        self.storage = storage # force_matrix layout built by create_force_matrix, see force_storage.py
         self.cleaned_data = None; self.force_matrix = None; self.timestamps = None
         self.tooth_ids = None; self.num_sensor_points_per_tooth_map = {} 
         self.ordered_tooth_sensor_pairs = []; self.max_force_overall = 100.0
-        self.cof_trajectory = [] 
+        self.cof_trajectory = np.empty((0, 3)) # (timestamp, x, y) rows, see calculate_cof_trajectory
+        self._cof_layout = None; self._cof_layout_spec = None
+        self.tooth_tables = None; self._tooth_table_layout = None; self._tooth_side_layout = None # See compute_tooth_tables
+        self._time_index = None; self._time_index_source = None; self._time_sorted = True
+        self.session = None # SessionFile backing force_matrix when opened via from_session()
+        self.block_rows = 65536 # Derived results (COF, tooth tables) are computed this many force_matrix rows at a time
+
+    @classmethod
+    def from_session(cls, path):
+        """Opens a native session file: force_matrix and timestamps become zero-copy np.memmap views, no CSV parse or cleaning."""
+        processor = cls(None)
+        processor.session = SessionFile(path)
+        if processor.session.kind != 'tooth_sensor_pairs': raise ValueError(f"{path} holds {processor.session.kind} frames, not tooth sensor samples")
+        processor._load_session_state()
+        logging.info("Session opened: %s, %d rows x %d pairs", path, len(processor.session), len(processor.ordered_tooth_sensor_pairs))
+        return processor
+
+    @classmethod
+    def from_csv(cls, csv_path, session_path=None, chunksize=1_000_000):
+        """Out-of-core load of a long-format CSV: converted chunk by chunk into a session file, then memory-mapped.
+
+        The conversion writes `session_path`, by default the CSV's path with the .tss extension next to it
+        (an existing file there is overwritten). Open it later with from_session() to skip the conversion.
+        """
+        from session_file import csv_to_session, SESSION_EXTENSION
+        if session_path is None:
+            session_path = os.path.splitext(csv_path)[0] + SESSION_EXTENSION
+            logging.info(f"Converting {csv_path} to the session file {session_path} (pass session_path to choose another location).")
+        return cls.from_session(csv_to_session(csv_path, session_path, chunksize=chunksize))
+
+    def _load_session_state(self):
+        self.force_matrix = self.session.forces; self.timestamps = self.session.timestamps # Both memmaps: nothing is read until used
+        self._time_index = self._time_index_source = self.timestamps # Already a contiguous float64 array
+        self._time_sorted = self.session.monotonic
+        self.tooth_tables = None
+        self.ordered_tooth_sensor_pairs = list(self.session.pairs)
+        self.tooth_ids = sorted({tid for tid, _ in self.ordered_tooth_sensor_pairs})
+        self.num_sensor_points_per_tooth_map = {tid: sum(1 for t, _ in self.ordered_tooth_sensor_pairs if t == tid) for tid in self.tooth_ids}
+        self.max_force_overall = self.session.max_force if self.session.max_force > 0 else 100.0
+
+    def refresh_session(self):
+        """Picks up rows appended to the session file since it was opened (append-while-recording)."""
+        if self.session is None: return
+        self.session.refresh(); self._load_session_state()
+
+    @property
+    def time_index(self):
+        """float64 array of the force_matrix row timestamps, cached until `timestamps` changes."""
+        if self.timestamps is None: self.create_force_matrix()
+        if self._time_index is None or self._time_index_source is not self.timestamps or len(self._time_index) != len(self.timestamps):
+            self._time_index = np.asarray(self.timestamps, dtype=float); self._time_index_source = self.timestamps
+        return self._time_index
+
+    def nearest_index(self, timestamp):
+        """Row of the sample closest to `timestamp` (the earlier one on a tie), or None without data. O(log n)."""
+        ts = self.time_index
+        if not len(ts): return None
+        if not self._time_sorted: return int(np.argmin(np.abs(ts - timestamp)))
+        i = int(np.searchsorted(ts, timestamp, side='left'))
+        if i == len(ts) or (i > 0 and timestamp - ts[i - 1] <= ts[i] - timestamp): return i - 1
+        return i
+
+    def row_range(self, t_start, t_end):
+        """[i0, i1) force_matrix rows with t_start <= t <= t_end."""
+        ts = self.time_index
+        if not self._time_sorted: raise ValueError("Time-range queries need monotonically increasing timestamps")
+        return int(np.searchsorted(ts, t_start, side='left')), int(np.searchsorted(ts, t_end, side='right'))
+
+    def get_force_window(self, t_start, t_end):
+        """(timestamps, force rows) for t_start <= t <= t_end as zero-copy views."""
+        if self.session is not None: return self.session.time_slice(t_start, t_end) # Falls back to a mask when not monotonic
+        if self.force_matrix is None: self.create_force_matrix()
+        i0, i1 = self.row_range(t_start, t_end)
+        return self.time_index[i0:i1], self.force_matrix[i0:i1]
 
     def clean_data(self):
-        if not isinstance(self.data, pd.DataFrame): logging.error("Input not DataFrame."); self.cleaned_data=pd.DataFrame(); return self.cleaned_data
-        required_cols = ['timestamp','tooth_id','sensor_point_id','force','contact_time']
-        if not all(col in self.data.columns for col in required_cols):
-            logging.error(f"Data missing cols: {required_cols}. Got: {list(self.data.columns)}"); self.cleaned_data=pd.DataFrame(); return self.cleaned_data
-        self.cleaned_data = self.data.dropna(subset=required_cols).copy()
-        try:
-            self.cleaned_data['timestamp']=pd.to_numeric(self.cleaned_data['timestamp'])
-            self.cleaned_data['tooth_id']=pd.to_numeric(self.cleaned_data['tooth_id']).astype(int)
-            self.cleaned_data['sensor_point_id']=pd.to_numeric(self.cleaned_data['sensor_point_id']).astype(int)
-            self.cleaned_data['force']=pd.to_numeric(self.cleaned_data['force'],errors='coerce').astype(float)
-            self.cleaned_data['contact_time']=pd.to_numeric(self.cleaned_data['contact_time'],errors='coerce').astype(float)
-        except Exception as e: logging.error(f"Type conversion error: {e}"); self.cleaned_data=pd.DataFrame(); return self.cleaned_data
-        self.cleaned_data.dropna(subset=['force','contact_time'], inplace=True)
-        self.cleaned_data = self.cleaned_data[(self.cleaned_data['force'] >= 0) & (self.cleaned_data['contact_time'] >= 0)]
-        self.cleaned_data = self.cleaned_data.drop_duplicates(subset=['timestamp','tooth_id','sensor_point_id'], keep='last')
+        source = self.data.to_dataframe() if hasattr(self.data, 'to_dataframe') else self.data
+        self.cleaned_data = clean_samples(source)
+        if 'tooth_id' not in self.cleaned_data.columns: return self.cleaned_data
         self.tooth_ids = sorted(self.cleaned_data['tooth_id'].unique())
         self.ordered_tooth_sensor_pairs = []
         if not self.cleaned_data.empty:
-            self.num_sensor_points_per_tooth_map = self.cleaned_data.groupby('tooth_id')['sensor_point_id'].nunique().to_dict()
-            for tid in self.tooth_ids:
-                sp_ids = sorted(self.cleaned_data[self.cleaned_data['tooth_id']==tid]['sensor_point_id'].unique())
-                for sp_id in sp_ids: self.ordered_tooth_sensor_pairs.append((tid, sp_id))
+            codes = np.unique(pd.unique(encode_pairs(self.cleaned_data['tooth_id'].to_numpy(), self.cleaned_data['sensor_point_id'].to_numpy())))
+            self.ordered_tooth_sensor_pairs = decode_pairs(codes)
+            pair_tids, counts = np.unique(codes // PAIR_CODE_BASE, return_counts=True)
+            self.num_sensor_points_per_tooth_map = dict(zip(pair_tids.tolist(), counts.tolist()))
             if 'force' in self.cleaned_data.columns and not self.cleaned_data['force'].empty:
                  valid_forces = self.cleaned_data['force'][self.cleaned_data['force'] > 0]
                  self.max_force_overall = valid_forces.max() if not valid_forces.empty else 100.0
@@ -44,77 +142,282 @@ class DataProcessor:
         return self.cleaned_data
 
     def create_force_matrix(self):
+        if self.session is not None: return self.force_matrix, self.timestamps # Already materialized on disk
         if self.cleaned_data is None or self.cleaned_data.empty: self.clean_data()
         if self.cleaned_data.empty: self.force_matrix=np.array([]); self.timestamps=[]; return self.force_matrix,self.timestamps
-        self.timestamps = sorted(self.cleaned_data['timestamp'].unique())
+        # Factorize both axes into integer codes, then one fancy-indexed write into the preallocated matrix
+        ts_codes, ts_uniques = pd.factorize(self.cleaned_data['timestamp'].to_numpy(dtype=float), sort=True)
+        self.timestamps = ts_uniques.tolist()
         if not self.ordered_tooth_sensor_pairs or not self.timestamps: self.force_matrix=np.array([]); return self.force_matrix,self.timestamps
-        self.force_matrix = np.full((len(self.timestamps),len(self.ordered_tooth_sensor_pairs)),np.nan,dtype=float)
-        try:
-            pivot_data = self.cleaned_data[['timestamp','tooth_id','sensor_point_id','force']].copy()
-            pivot_data['force'] = pd.to_numeric(pivot_data['force'],errors='coerce').astype(float)
-            pivot_df = pivot_data.pivot_table(index='timestamp',columns=['tooth_id','sensor_point_id'],values='force')
-            pivot_df.columns = pd.MultiIndex.from_tuples(pivot_df.columns)
-            temp_df = pd.DataFrame(index=self.timestamps,columns=pd.MultiIndex.from_tuples(self.ordered_tooth_sensor_pairs),dtype=float)
-            temp_df.update(pivot_df); self.force_matrix = temp_df.to_numpy(dtype=float)
-        except Exception as e:
-            logging.error(f"Pivot error: {e}. Fallback."); pair_idx={p:i for i,p in enumerate(self.ordered_tooth_sensor_pairs)}
-            for r,t in enumerate(self.timestamps):
-                td=self.cleaned_data[self.cleaned_data['timestamp']==t]
-                for _,dp in td.iterrows(): p=(int(dp['tooth_id']),int(dp['sensor_point_id'])); self.force_matrix[r,pair_idx[p]]=float(dp['force'])
-        logging.info("Force matrix: %s, dtype=%s",self.force_matrix.shape,self.force_matrix.dtype)
+        pair_codes = encode_pairs([t for t, _ in self.ordered_tooth_sensor_pairs], [p for _, p in self.ordered_tooth_sensor_pairs])
+        cols = np.searchsorted(pair_codes, encode_pairs(self.cleaned_data['tooth_id'].to_numpy(), self.cleaned_data['sensor_point_id'].to_numpy()))
+        self.force_matrix = build_force_matrix(self.storage, (len(self.timestamps),len(pair_codes)), ts_codes, cols, self.cleaned_data['force'].to_numpy(dtype=float))
+        self.tooth_tables = None
+        logging.info("Force matrix: %s, dtype=%s, storage=%s",self.force_matrix.shape,self.force_matrix.dtype,type(self.force_matrix).__name__)
         return self.force_matrix,self.timestamps
 
+    def memory_report(self):
+        """Bytes held by each part of the processor, plus what force_matrix would take as dense float64."""
+        fm = self.force_matrix
+        report = {'storage': self.storage if self.session is None else 'session (memory-mapped)',
+                  'force_matrix_kind': type(fm).__name__ if fm is not None else None,
+                  'force_matrix': 0 if fm is None or self.session is not None else int(fm.nbytes),
+                  'force_matrix_dense64': 0 if fm is None else int(fm.size * 8),
+                  'cleaned_data': int(self.cleaned_data.memory_usage(index=True, deep=True).sum()) if self.cleaned_data is not None else 0,
+                  'time_index': int(self.time_index.nbytes) if self.timestamps is not None else 0,
+                  'tooth_tables': sum(int(t.nbytes) for t in self.tooth_tables.values()) if self.tooth_tables else 0,
+                  'cof_trajectory': int(self.cof_trajectory.nbytes)}
+        if isinstance(fm, SparseForceMatrix): report['nnz'] = fm.nnz
+        report['savings_vs_dense64'] = 1.0 - report['force_matrix'] / report['force_matrix_dense64'] if report['force_matrix_dense64'] and self.session is None else 0.0
+        return report
+
     def get_average_force_for_tooth(self, tooth_id):
         if self.force_matrix is None: self.create_force_matrix()
-        if self.force_matrix.size==0 or tooth_id not in self.tooth_ids: return self.timestamps or [],np.array([],dtype=float)
-        indices = [i for i,(tid,_) in enumerate(self.ordered_tooth_sensor_pairs) if tid==tooth_id]
-        if not indices: return self.timestamps or [],np.array([],dtype=float)
-        fm_f = self.force_matrix.astype(float) if not np.issubdtype(self.force_matrix.dtype, np.floating) else self.force_matrix
-        avg_f = np.nanmean(fm_f[:,indices],axis=1)
-        return self.timestamps, np.nan_to_num(avg_f,nan=0.0).astype(float)
+        if self.force_matrix.size==0 or tooth_id not in self.tooth_ids: return self.timestamps if self.timestamps is not None else [],np.array([],dtype=float)
+        return self.timestamps, self.tooth_table('mean')[:, list(self.tooth_ids).index(tooth_id)]
+
+    def compute_tooth_tables(self, tooth_cell_definitions=None):
+        """Precomputes per-tooth tables for every timestamp into `tooth_tables`.
+
+        (T x teeth) tables, columns in tooth_ids order: 'mean' (nanmean over the tooth's points, 0 where it has
+        no samples, as get_average_force_for_tooth returns), 'sum', 'max' and 'share' of the row's total force.
+        (T,) tables 'left_total' and 'right_total' split teeth by their layout x (x < 0 is the right side, like
+        the grid view) when tooth_cell_definitions is given, otherwise the first half of tooth_ids is the right side.
+        """
+        if tooth_cell_definitions is not None: self._tooth_side_layout = tooth_cell_definitions
+        if self.force_matrix is None: self.create_force_matrix()
+        self._tooth_table_layout = self._tooth_groups()
+        self.tooth_tables = self._tooth_table_rows(0)
+        return self.tooth_tables
+
+    def tooth_table(self, name):
+        if self.tooth_tables is None: self.compute_tooth_tables()
+        return self.tooth_tables[name]
+
+    def tooth_frame(self, timestamp, name='mean'):
+        """One row of a tooth table (values in tooth_ids order) at the sample nearest `timestamp`, or None without data."""
+        idx = self.nearest_index(timestamp)
+        return None if idx is None else self.tooth_table(name)[idx]
+
+    def _tooth_groups(self):
+        """(group starts, column order or None, right weights, left weights) for reducing pair columns per tooth."""
+        col_tids = np.array([tid for tid, _ in self.ordered_tooth_sensor_pairs], dtype=np.int64)
+        order = None
+        if len(col_tids) and np.any(np.diff(col_tids) < 0): order = np.argsort(col_tids, kind='stable'); col_tids = col_tids[order]
+        tooth_ids = np.asarray(self.tooth_ids, dtype=np.int64)
+        starts = np.searchsorted(col_tids, tooth_ids)
+        if self._tooth_side_layout:
+            center_x = {props['actual_id']: props['center'][0] for props in self._tooth_side_layout.values()}
+            right = np.array([0.0 if tid not in center_x else 1.0 if center_x[tid] < -0.01 else 0.0 if center_x[tid] > 0.01 else 0.5 for tid in tooth_ids.tolist()])
+            left = np.array([0.0 if tid not in center_x else 1.0 - r for tid, r in zip(tooth_ids.tolist(), right)])
+        else:
+            right = (np.arange(len(tooth_ids)) < len(tooth_ids) // 2).astype(float); left = 1.0 - right
+        return starts, order, right, left
+
+    def _tooth_table_rows(self, start, stop=None):
+        """Tooth tables for force_matrix[start:stop], filled block by block (float32 when the matrix is, e.g. sessions)."""
+        num_rows = len(self.time_index[start:stop]); num_teeth = len(self._tooth_table_layout[0])
+        dtype = self.force_matrix.dtype if self.force_matrix.dtype == np.float32 else np.float64
+        tables = {name: np.zeros((num_rows, num_teeth), dtype=dtype) for name in ('mean', 'sum', 'max', 'share')}
+        tables.update({name: np.zeros(num_rows, dtype=dtype) for name in ('left_total', 'right_total')})
+        if not num_rows or not num_teeth or self.force_matrix.ndim != 2: return tables
+        for i0, i1 in self._row_blocks(start, stop):
+            for name, values in self._tooth_table_block(i0, i1).items(): tables[name][i0 - start:i1 - start] = values
+        return tables
+
+    def _tooth_table_block(self, start, stop):
+        starts, order, right, left = self._tooth_table_layout
+        fm = self.force_matrix[start:stop]
+        if order is not None: fm = fm[:, order]
+        fm = fm.astype(float, copy=False); present = ~np.isnan(fm)
+        tooth_sum = np.add.reduceat(np.where(present, fm, 0.0), starts, axis=1)
+        count = np.add.reduceat(present.astype(np.int32), starts, axis=1)
+        tooth_max = np.nan_to_num(np.fmax.reduceat(fm, starts, axis=1), nan=0.0) # fmax skips NaN; all-NaN groups -> 0
+        row_total = tooth_sum.sum(axis=1, keepdims=True)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = np.where(count > 0, tooth_sum / count, 0.0)
+            share = np.where(row_total > 0, tooth_sum / row_total, 0.0)
+        return {'mean': mean, 'sum': tooth_sum, 'max': tooth_max, 'share': share, 'left_total': tooth_sum @ left, 'right_total': tooth_sum @ right}
         
     def get_all_forces_at_time(self, timestamp):
         if self.force_matrix is None: self.create_force_matrix()
-        if self.force_matrix.size==0 or not self.timestamps: return self.ordered_tooth_sensor_pairs,np.array([],dtype=float)
-        ts_arr=np.array(self.timestamps); time_idx=np.argmin(np.abs(ts_arr-timestamp))
+        if self.force_matrix.size==0 or not len(self.timestamps): return self.ordered_tooth_sensor_pairs,np.array([],dtype=float)
+        time_idx = self.nearest_index(timestamp)
         forces = self.force_matrix[time_idx,:]
         return self.ordered_tooth_sensor_pairs,np.nan_to_num(forces,nan=0.0).astype(float)
 
     def calculate_cof_trajectory(self, tooth_cell_definitions, num_sensor_points_per_cell_layout=4):
+        """Center of force for every timestamp: cof_trajectory becomes a (K, 3) array of (timestamp, x, y).
+
+        Sensor positions are resolved once per pair, so the whole trajectory is two matrix-vector products
+        and a row sum over force_matrix. Rows whose total force is <= 1e-3 are skipped.
+        """
+        self._cof_layout_spec = (tooth_cell_definitions, num_sensor_points_per_cell_layout)
         if self.force_matrix is None: self.create_force_matrix()
         if self.force_matrix.size == 0 or not tooth_cell_definitions:
-            logging.warning("Force matrix or layout undefined for COF."); self.cof_trajectory=[]; return
-        self.cof_trajectory = []
-        grid_dim = int(np.sqrt(num_sensor_points_per_cell_layout)); grid_dim=max(1,grid_dim)
+            logging.warning("Force matrix or layout undefined for COF."); self.cof_trajectory=np.empty((0, 3)); self._cof_layout=None; return
+        self._cof_layout = self._cof_pair_layout(tooth_cell_definitions, num_sensor_points_per_cell_layout)
+        self.cof_trajectory = self._cof_rows(0)
+        logging.info(f"COF trajectory calculated: {len(self.cof_trajectory)} points.")
 
-        # Create a map from actual_tooth_id to its layout properties (center, width, height)
+    def _cof_pair_layout(self, tooth_cell_definitions, num_sensor_points_per_cell_layout):
+        """(force_matrix columns, x, y) of each pair that gets a sub-cell in its tooth's grid_dim x grid_dim layout cell."""
+        grid_dim = int(np.sqrt(num_sensor_points_per_cell_layout)); grid_dim=max(1,grid_dim)
         layout_map = {props['actual_id']: props for props in tooth_cell_definitions.values()}
+        pair_col = {pair: i for i, pair in enumerate(self.ordered_tooth_sensor_pairs)}
+        cols, xs, ys = [], [], []
+        for tooth_id, cell_prop in layout_map.items():
+            cell_cx, cell_cy = cell_prop['center']; cell_w, cell_h = cell_prop['width'], cell_prop['height']
+            sub_w, sub_h = cell_w/grid_dim, cell_h/grid_dim
+            actual_sp_ids = sorted([spid for tid,spid in self.ordered_tooth_sensor_pairs if tid==tooth_id])
+            for sp_layout_order, sp_id in enumerate(actual_sp_ids[:grid_dim * grid_dim]): # Surplus points have no sub-cell
+                r_idx, c_idx = divmod(sp_layout_order, grid_dim)
+                cols.append(pair_col[(tooth_id, sp_id)])
+                xs.append(cell_cx - cell_w/2 + sub_w/2 + c_idx * sub_w)
+                ys.append(cell_cy + cell_h/2 - sub_h/2 - r_idx * sub_h) # r=0 is top row
+        return np.array(cols, dtype=np.intp), np.array(xs, dtype=float), np.array(ys, dtype=float)
 
-        for ts_idx, timestamp in enumerate(self.timestamps):
-            sum_fx, sum_fy, total_f_step = 0.0, 0.0, 0.0
-            current_pairs, current_forces = self.get_all_forces_at_time(timestamp)
-            force_map_ts = {pair: force for pair, force in zip(current_pairs, current_forces)}
-
-            for tooth_id, cell_prop in layout_map.items(): # Iterate through teeth defined in layout
-                cell_cx, cell_cy = cell_prop['center']; cell_w, cell_h = cell_prop['width'], cell_prop['height']
-                sub_w, sub_h = cell_w/grid_dim, cell_h/grid_dim
-                
-                actual_sp_ids = sorted([spid for tid,spid in self.ordered_tooth_sensor_pairs if tid==tooth_id])
-
-                for r_idx in range(grid_dim):
-                    for c_idx in range(grid_dim):
-                        sp_layout_order = r_idx * grid_dim + c_idx
-                        if sp_layout_order < len(actual_sp_ids):
-                            sp_id = actual_sp_ids[sp_layout_order]
-                            force = force_map_ts.get((tooth_id, sp_id), 0.0)
-                            if force > 1e-3:
-                                sp_x = cell_cx - cell_w/2 + sub_w/2 + c_idx * sub_w
-                                sp_y = cell_cy + cell_h/2 - sub_h/2 - r_idx * sub_h # r=0 is top row
-                                sum_fx += force*sp_x; sum_fy += force*sp_y; total_f_step += force
-            if total_f_step > 1e-3: self.cof_trajectory.append((timestamp, sum_fx/total_f_step, sum_fy/total_f_step))
-        logging.info(f"COF trajectory calculated: {len(self.cof_trajectory)} points.")
+    def _row_blocks(self, start, stop=None):
+        """(i0, i1) bounds of block_rows-sized pieces of force_matrix[start:stop], so work on memory-mapped sessions stays bounded."""
+        stop = len(self.time_index) if stop is None else min(stop, len(self.time_index))
+        return [(i0, min(i0 + self.block_rows, stop)) for i0 in range(start, stop, self.block_rows)]
+
+    def _cof_rows(self, start, stop=None):
+        """(timestamp, x, y) rows of the COF over force_matrix[start:stop]."""
+        blocks = [self._cof_block(i0, i1) for i0, i1 in self._row_blocks(start, stop)]
+        return np.concatenate(blocks) if blocks else np.empty((0, 3))
+
+    def _cof_block(self, start, stop):
+        cols, px, py = self._cof_layout
+        w = self.force_matrix[start:stop][:, cols].astype(float, copy=False)
+        w = np.where(w > 1e-3, w, 0.0) # NaN (no sample) and sub-threshold readings carry no weight
+        total = w.sum(axis=1); hit = total > 1e-3
+        ts = self.time_index[start:stop]
+        return np.column_stack((ts[hit], (w @ px)[hit] / total[hit], (w @ py)[hit] / total[hit]))
 
     def get_cof_up_to_timestamp(self, current_timestamp):
-        if not self.cof_trajectory: return []
-        return [(x,y) for ts,x,y in self.cof_trajectory if ts <= current_timestamp + 1e-6]
+        """(k, 2) array of COF (x, y) points up to current_timestamp (a view of cof_trajectory)."""
+        if not len(self.cof_trajectory): return self.cof_trajectory[:, 1:]
+        return self.cof_trajectory[:np.searchsorted(self.cof_trajectory[:, 0], current_timestamp + 1e-6, side='right'), 1:]
+
+class StreamingDataProcessor(DataProcessor):
+    """Live-session processor: append(samples) extends the force matrix instead of re-pivoting the history.
+
+    Rows and columns live in a buffer that grows by doubling (amortized O(batch) appends). force_matrix
+    is a view of its filled rows, so every DataProcessor getter works on the live matrix. New
+    (tooth, point) pairs are inserted in sorted position, and late samples for an existing
+    timestamp land in that row. Duplicates keep the last value, as clean_data does. Once
+    calculate_cof_trajectory has been called, each append also recomputes the COF from the first changed row.
+    """
+    def __init__(self, initial_capacity=1024):
+        super().__init__(None)
+        self._buffer = np.full((max(1, initial_capacity), 0), np.nan)
+        self._ts_buffer = np.empty(max(1, initial_capacity))
+        self._num_rows = 0
+        self._pair_codes = np.empty(0, dtype=np.int64)
+        self._max_force_seen = 0.0
+        self._cof_buffer = self.cof_trajectory
+        self._tooth_table_buffers = {}
+        self.timestamps = []; self.tooth_ids = []
+        self.force_matrix = self._buffer[:0]
+
+    def create_force_matrix(self): return self.force_matrix, self.timestamps # Always current
+
+    @property
+    def time_index(self): return self._ts_buffer[:self._num_rows]
+
+    def append(self, samples):
+        """Adds a batch of samples (SAMPLE_DTYPE array, DataFrame or dict of columns).
+
+        Returns the index of the first force_matrix row that changed, or None if nothing did.
+        """
+        if samples is None or len(samples) == 0: return None
+        ts = np.asarray(samples['timestamp'], dtype=float); force = np.asarray(samples['force'], dtype=float)
+        contact = np.asarray(samples['contact_time'], dtype=float)
+        tid = np.asarray(samples['tooth_id'], dtype=float); spid = np.asarray(samples['sensor_point_id'], dtype=float)
+        keep = np.isfinite(ts) & np.isfinite(tid) & np.isfinite(spid) & np.isfinite(force) & np.isfinite(contact) & (force >= 0) & (contact >= 0)
+        if not keep.any(): return None
+        ts, force = ts[keep], force[keep]
+        codes = encode_pairs(tid[keep], spid[keep])
+
+        new_codes = np.setdiff1d(codes, self._pair_codes)
+        if len(new_codes): self._add_pairs(new_codes)
+        cols = np.searchsorted(self._pair_codes, codes)
+        first_changed = self._add_rows(np.unique(ts))
+        rows = np.searchsorted(self._ts_buffer[:self._num_rows], ts)
+
+        scatter_keep_last(self._buffer, rows, cols, force) # keep='last' inside the batch
+        positive = force[force > 0]
+        if positive.size: self._max_force_seen = max(self._max_force_seen, float(positive.max())); self.max_force_overall = self._max_force_seen
+        self.force_matrix = self._buffer[:self._num_rows]
+        first_changed = min(first_changed, int(rows.min()))
+        self._update_cof(first_changed, relayout=len(new_codes) > 0)
+        self._update_tooth_tables(first_changed, relayout=len(new_codes) > 0)
+        return first_changed
+
+    def calculate_cof_trajectory(self, tooth_cell_definitions, num_sensor_points_per_cell_layout=4):
+        super().calculate_cof_trajectory(tooth_cell_definitions, num_sensor_points_per_cell_layout)
+        self._cof_buffer = self.cof_trajectory # Grows by doubling as append() extends the trajectory
+
+    def _update_cof(self, first_row, relayout):
+        """Recomputes the COF from force_matrix row `first_row` on; new pairs can shift sub-cells, so they redo it all."""
+        if self._cof_layout_spec is None or not self._cof_layout_spec[0]: return
+        if relayout or self._cof_layout is None: self._cof_layout = self._cof_pair_layout(*self._cof_layout_spec); first_row = 0
+        keep = int(np.searchsorted(self.cof_trajectory[:, 0], self._ts_buffer[first_row], side='left'))
+        rows = self._cof_rows(first_row); n = keep + len(rows)
+        if n > len(self._cof_buffer):
+            buffer = np.empty((max(n, 2 * len(self._cof_buffer)), 3)); buffer[:keep] = self._cof_buffer[:keep]; self._cof_buffer = buffer
+        self._cof_buffer[keep:n] = rows; self.cof_trajectory = self._cof_buffer[:n]
+
+    def compute_tooth_tables(self, tooth_cell_definitions=None):
+        self._tooth_table_buffers = {} # Fresh tables; buffers are re-grown from them on the next append
+        return super().compute_tooth_tables(tooth_cell_definitions)
+
+    def _update_tooth_tables(self, first_row, relayout):
+        """Extends tooth_tables from row `first_row` on (left lazy until someone reads them)."""
+        if self.tooth_tables is None: return
+        if relayout: self.compute_tooth_tables(); return
+        rows = self._tooth_table_rows(first_row); n = self._num_rows
+        for name, values in rows.items():
+            buffer = self._tooth_table_buffers.get(name)
+            if buffer is None or n > len(buffer):
+                grown = np.empty((max(n, 2 * len(self.tooth_tables[name])),) + values.shape[1:]); grown[:first_row] = self.tooth_tables[name][:first_row]
+                buffer = self._tooth_table_buffers[name] = grown
+            buffer[first_row:n] = values; self.tooth_tables[name] = buffer[:n]
+
+    def _ensure_capacity(self, num_rows):
+        capacity = len(self._ts_buffer)
+        if num_rows <= capacity: return
+        capacity = max(num_rows, 2 * capacity)
+        buffer = np.full((capacity, self._buffer.shape[1]), np.nan); buffer[:self._num_rows] = self._buffer[:self._num_rows]
+        ts_buffer = np.empty(capacity); ts_buffer[:self._num_rows] = self._ts_buffer[:self._num_rows]
+        self._buffer, self._ts_buffer = buffer, ts_buffer
+
+    def _add_rows(self, batch_ts):
+        """Makes sure every timestamp in sorted `batch_ts` has a row; returns the first row index touched."""
+        n = self._num_rows; current = self._ts_buffer[:n]
+        pos = np.searchsorted(current, batch_ts)
+        exists = (pos < n) & (current[np.minimum(pos, n - 1)] == batch_ts) if n else np.zeros(len(batch_ts), dtype=bool)
+        new_ts = batch_ts[~exists]
+        if not len(new_ts): return int(pos.min())
+        self._ensure_capacity(n + len(new_ts))
+        if n == 0 or new_ts[0] > current[-1]: # Normal live case: strictly newer timestamps go at the end
+            self._ts_buffer[n:n + len(new_ts)] = new_ts
+            self.timestamps.extend(new_ts.tolist())
+        else: # Out-of-order timestamps: shift rows to keep the time axis sorted (rare)
+            merged_ts = np.union1d(current, new_ts); old_rows = np.searchsorted(merged_ts, current)
+            buffer = np.full_like(self._buffer, np.nan); buffer[old_rows] = self._buffer[:n]
+            self._buffer = buffer; self._ts_buffer[:len(merged_ts)] = merged_ts
+            self.timestamps = merged_ts.tolist()
+        self._num_rows = n + len(new_ts)
+        return int(min(pos.min(), np.searchsorted(self._ts_buffer[:self._num_rows], new_ts[0])))
+
+    def _add_pairs(self, new_codes):
+        merged = np.union1d(self._pair_codes, new_codes)
+        buffer = np.full((len(self._ts_buffer), len(merged)), np.nan)
+        buffer[:, np.searchsorted(merged, self._pair_codes)] = self._buffer
+        self._buffer, self._pair_codes = buffer, merged
+        self.ordered_tooth_sensor_pairs = decode_pairs(merged)
+        self.tooth_ids = sorted({tid for tid, _ in self.ordered_tooth_sensor_pairs})
+        self.num_sensor_points_per_tooth_map = {tid: sum(1 for t, _ in self.ordered_tooth_sensor_pairs if t == tid) for tid in self.tooth_ids}
 # --- END OF FILE data_processing.py ---
\ No newline at end of file
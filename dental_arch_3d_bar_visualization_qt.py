@@ -110,13 +110,11 @@ class DentalArch3DBarVisualizerQt:
         self.time_text_actor = Text2D(f"Time: {timestamp:.1f}s",pos="bottom-right",c='k',bg=(1,1,1),alpha=0.6,s=0.7)
         current_vedo_actors_to_add.append(self.time_text_actor)
 
+        tooth_means = self.processor.tooth_frame(timestamp, 'mean') if self.timestamps is not None and len(self.timestamps) else None # One row, O(teeth)
         for i,base_pos in enumerate(self.tooth_bar_base_positions):
             if i >= len(self.processor.tooth_ids): continue
-            tooth_id=self.processor.tooth_ids[i]; _,f_series=self.processor.get_average_force_for_tooth(tooth_id)
-            curr_f=0.0
-            if self.timestamps and len(f_series)==len(self.timestamps):
-                try: idx=np.argmin(np.abs(np.array(self.timestamps)-timestamp)); curr_f=f_series[idx]
-                except: pass 
+            tooth_id=self.processor.tooth_ids[i]
+            curr_f=float(tooth_means[i]) if tooth_means is not None and i < len(tooth_means) else 0.0
             if not np.isfinite(curr_f): curr_f=0.0
             norm_f=min(1.0,max(0.0,curr_f/self.max_force_for_scaling))
             bar_h=self.min_bar_height+norm_f*(self.max_bar_height-self.min_bar_height)
@@ -138,7 +136,7 @@ class DentalArch3DBarVisualizerQt:
             for vo in current_vedo_actors_to_add: self.renderer.AddActor(vo.actor)
 
     def animate(self, timestamp_to_render): 
-        if not self.timestamps: return
+        if self.timestamps is None or not len(self.timestamps): return
         self.last_animated_timestamp = timestamp_to_render
         self.render_display(timestamp_to_render)
 
@@ -217,7 +215,7 @@ class DentalArch3DBarVisualizerQt:
             detail_info_text = "Click a tooth/bar for details." # Default message
             if self.selected_tooth_id_3dbar is not None:
                 timestamp_for_info = self.last_animated_timestamp 
-                if timestamp_for_info is None and self.timestamps and len(self.timestamps) > 0 : 
+                if timestamp_for_info is None and self.timestamps is not None and len(self.timestamps) > 0 : 
                     # If animation hasn't started, use the current index (likely 0)
                     ts_idx = self.current_timestamp_idx if self.current_timestamp_idx < len(self.timestamps) else 0
                     timestamp_for_info = self.timestamps[ts_idx]
@@ -225,13 +223,11 @@ class DentalArch3DBarVisualizerQt:
                     timestamp_for_info = 0.0
                 
                 # For 3D bar, we typically show average force for the selected tooth
-                _ , avg_force_series = self.processor.get_average_force_for_tooth(self.selected_tooth_id_3dbar)
                 current_avg_force = 0.0
-                if self.timestamps and len(avg_force_series) == len(self.timestamps):
+                if self.timestamps is not None and len(self.timestamps) and self.selected_tooth_id_3dbar in self.processor.tooth_ids:
                     try:
-                        # Find the index for the current timestamp
-                        time_idx_info = np.argmin(np.abs(np.array(self.timestamps) - timestamp_for_info))
-                        current_avg_force = avg_force_series[time_idx_info]
+                        tooth_means = self.processor.tooth_frame(timestamp_for_info, 'mean')
+                        current_avg_force = tooth_means[list(self.processor.tooth_ids).index(self.selected_tooth_id_3dbar)]
                     except Exception as e:
                         logging.debug(f"3DBarVizQt: Error getting avg force for info panel: {e}")
                 
@@ -244,6 +240,6 @@ class DentalArch3DBarVisualizerQt:
            not self.main_app_window_ref.is_animating:
             if hasattr(self.main_app_window_ref, 'force_render_vedo_views'):
                 logging.info(f"3DBarVizQt (R{self.renderer_index if hasattr(self, 'renderer_index') else 'N/A'}): Click - main animation paused, requesting main Vedo render.")
-                current_t_render = self.last_animated_timestamp if self.last_animated_timestamp is not None else (self.timestamps[0] if self.timestamps else 0.0)
+                current_t_render = self.last_animated_timestamp if self.last_animated_timestamp is not None else (self.timestamps[0] if self.timestamps is not None and len(self.timestamps) else 0.0)
                 if current_t_render is not None: 
                     self.main_app_window_ref.force_render_vedo_views(current_t_render)
\ No newline at end of file
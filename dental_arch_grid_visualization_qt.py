@@ -259,8 +259,8 @@ class DentalArchGridVisualizerQt:
             current_actors_to_add_vedo_objects.extend(filter(None,[self.left_right_bar_actor_left,self.left_bar_label_actor,self.left_bar_percentage_actor, self.left_right_bar_actor_right,self.right_bar_label_actor,self.right_bar_percentage_actor]))
         
         cof_pts=self.processor.get_cof_up_to_timestamp(timestamp)
-        if len(cof_pts)>1: cof_ln_pts=[(p[0],p[1],0.25) for p in cof_pts];self.cof_trajectory_line_actor=Line(cof_ln_pts,c=(0.8,0.1,0.8),lw=2,alpha=0.6); current_actors_to_add_vedo_objects.append(self.cof_trajectory_line_actor)
-        if cof_pts: cx_cof,cy_cof=cof_pts[-1];self.cof_current_marker_actor=Sphere(pos=(cx_cof,cy_cof,0.27),r=0.10,c='darkred',alpha=0.9); current_actors_to_add_vedo_objects.append(self.cof_current_marker_actor)
+        if len(cof_pts)>1: cof_ln_pts=np.column_stack((cof_pts,np.full(len(cof_pts),0.25)));self.cof_trajectory_line_actor=Line(cof_ln_pts,c=(0.8,0.1,0.8),lw=2,alpha=0.6); current_actors_to_add_vedo_objects.append(self.cof_trajectory_line_actor)
+        if len(cof_pts): cx_cof,cy_cof=cof_pts[-1];self.cof_current_marker_actor=Sphere(pos=(cx_cof,cy_cof,0.27),r=0.10,c='darkred',alpha=0.9); current_actors_to_add_vedo_objects.append(self.cof_current_marker_actor)
         
         if current_actors_to_add_vedo_objects and self.renderer: 
             for vedo_obj in current_actors_to_add_vedo_objects:
@@ -555,10 +555,10 @@ class DentalArchGridVisualizerQt:
         # COF Rendering (recreated)
         cof_pts=self.processor.get_cof_up_to_timestamp(timestamp)
         if len(cof_pts)>1: 
-            cof_ln_pts=[(p[0],p[1],0.25) for p in cof_pts] # Ensure Z is high enough
+            cof_ln_pts=np.column_stack((cof_pts,np.full(len(cof_pts),0.25))) # Ensure Z is high enough
             self.cof_trajectory_line_actor=Line(cof_ln_pts,c=(0.8,0.1,0.8),lw=2,alpha=0.6)
             current_vedo_objects_to_add.append(self.cof_trajectory_line_actor)
-        if cof_pts: 
+        if len(cof_pts): 
             cx_cof,cy_cof=cof_pts[-1]
             self.cof_current_marker_actor=Sphere(pos=(cx_cof,cy_cof,0.27),r=0.10,c='darkred',alpha=0.9)
             current_vedo_objects_to_add.append(self.cof_current_marker_actor)
@@ -578,7 +578,7 @@ class DentalArchGridVisualizerQt:
 
     def animate(self, timestamp_to_render): # Takes timestamp directly
         # ... (same as previous correct version) ...
-        if not self.timestamps: return
+        if self.timestamps is None or not len(self.timestamps): return
         self.last_animated_timestamp = timestamp_to_render
         self.render_arch(timestamp_to_render) # Updates actors on self.renderer
         
@@ -631,7 +631,7 @@ class DentalArchGridVisualizerQt:
                 # Determine the timestamp for which to show info
                 timestamp_for_info = self.last_animated_timestamp 
                 if timestamp_for_info is None: # Fallback if animation hasn't run or last_ts is None
-                    if self.timestamps and len(self.timestamps) > 0 : 
+                    if self.timestamps is not None and len(self.timestamps) > 0 : 
                         ts_idx = self.current_timestamp_idx if self.current_timestamp_idx < len(self.timestamps) else 0
                         timestamp_for_info = self.timestamps[ts_idx]
                     else: # Absolute fallback if no timestamps available at all
@@ -674,7 +674,7 @@ class DentalArchGridVisualizerQt:
             if hasattr(self.main_app_window_ref, 'force_render_vedo_views'):
                 logging.info(f"GridVizQt (R{self.renderer_index if hasattr(self, 'renderer_index') else 'N/A'}): Click - main animation paused, requesting main Vedo render.")
                 current_t_render = self.last_animated_timestamp 
-                if current_t_render is None and self.timestamps and len(self.timestamps) > 0:
+                if current_t_render is None and self.timestamps is not None and len(self.timestamps) > 0:
                     current_t_render = self.timestamps[self.current_timestamp_idx if self.current_timestamp_idx < len(self.timestamps) else 0]
                 elif current_t_render is None:
                     current_t_render = 0.0
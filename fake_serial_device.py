@@ -0,0 +1,110 @@
+# --- START OF FILE fake_serial_device.py ---
+import os
+import pty
+import tty
+import time
+import select
+import threading
+import logging
+import numpy as np
+from frame_protocol import encode_frame, HW_FRAME_CELLS
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+class PtyFakeDevice:
+    """Pseudo-terminal stand-in for a sensor (Linux/macOS).
+
+    Pass `device.port` to SensorDataReader as if it were a real serial port. Subclasses implement
+    next_chunk(), which returns the next bytes to emit (or None to finish); start() streams them
+    from a background thread.
+    """
+    def __init__(self):
+        self.master_fd, self.slave_fd = pty.openpty()
+        tty.setraw(self.slave_fd) # No line-discipline translation of \n or control bytes
+        self.port = os.ttyname(self.slave_fd)
+        self.bytes_written = 0
+        self._stop = threading.Event(); self._thread = None
+
+    def write(self, data):
+        view = memoryview(data)
+        while view and not self._stop.is_set():
+            _, writable, _ = select.select([], [self.master_fd], [], 0.1) # Don't block forever if nobody reads
+            if not writable: continue
+            n = os.write(self.master_fd, view); view = view[n:]; self.bytes_written += n
+
+    def next_chunk(self): raise NotImplementedError
+
+    def start(self):
+        if self._thread and self._thread.is_alive(): return self
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=f"FakeDevice-{self.port}", daemon=True)
+        self._thread.start(); return self
+
+    def _run(self):
+        while not self._stop.is_set():
+            chunk = self.next_chunk()
+            if chunk is None: break
+            if chunk: self.write(chunk)
+
+    def wait(self, timeout=None):
+        if self._thread: self._thread.join(timeout)
+
+    def stop(self):
+        self._stop.set()
+        if self._thread: self._thread.join(2.0); self._thread = None
+
+    def close(self):
+        self.stop()
+        for fd in (self.master_fd, self.slave_fd):
+            try: os.close(fd)
+            except OSError: pass
+
+    def __enter__(self): return self
+    def __exit__(self, *exc): self.close()
+
+class FakeFrameDevice(PtyFakeDevice):
+    """Streams binary full frames (frame_protocol) at `rate_hz` (None = as fast as the reader drains).
+
+    `frame_source(seq)` returns the cell values of frame `seq`; the default is a moving ramp.
+    Every `corrupt_every`-th frame gets one payload byte flipped so resync handling can be exercised.
+    """
+    def __init__(self, frame_source=None, rate_hz=100.0, num_cells=HW_FRAME_CELLS, num_frames=None, corrupt_every=0):
+        super().__init__()
+        self.frame_source = frame_source or (lambda seq: (np.arange(num_cells) + seq * 7) % 1001)
+        self.rate_hz = rate_hz; self.num_cells = num_cells
+        self.num_frames = num_frames; self.corrupt_every = corrupt_every
+        self.seq = 0; self.frames_corrupted = 0; self._t0 = None
+
+    def next_chunk(self):
+        if self.num_frames is not None and self.seq >= self.num_frames: return None
+        if self._t0 is None: self._t0 = time.monotonic()
+        if self.rate_hz:
+            delay = self._t0 + self.seq / self.rate_hz - time.monotonic()
+            if delay > 0: time.sleep(delay)
+        frame = encode_frame(self.seq, time.monotonic() - self._t0, self.frame_source(self.seq))
+        if self.corrupt_every and self.seq % self.corrupt_every == self.corrupt_every - 1:
+            frame = bytearray(frame); frame[len(frame) // 2] ^= 0xFF; frame = bytes(frame); self.frames_corrupted += 1
+        self.seq += 1
+        return frame
+
+class FakeCsvDevice(PtyFakeDevice):
+    """Streams `timestamp,tooth_id,sensor_point_id,force,contact_time` lines, one sweep of all points per tick."""
+    def __init__(self, num_teeth=16, num_sensor_points_per_tooth=4, rate_hz=100.0, num_ticks=None, seed=None):
+        super().__init__()
+        self.num_teeth = num_teeth; self.num_points = num_sensor_points_per_tooth
+        self.rate_hz = rate_hz; self.num_ticks = num_ticks
+        self.rng = np.random.default_rng(seed); self.tick = 0; self._t0 = None
+
+    def next_chunk(self):
+        if self.num_ticks is not None and self.tick >= self.num_ticks: return None
+        if self._t0 is None: self._t0 = time.monotonic()
+        if self.rate_hz:
+            delay = self._t0 + self.tick / self.rate_hz - time.monotonic()
+            if delay > 0: time.sleep(delay)
+        t = self.tick / self.rate_hz if self.rate_hz else self.tick * 0.01
+        forces = self.rng.uniform(0, 100, self.num_teeth * self.num_points)
+        lines = [f"{t:.3f},{tid},{sp},{forces[(tid - 1) * self.num_points + sp - 1]:.2f},0.02\n"
+                 for tid in range(1, self.num_teeth + 1) for sp in range(1, self.num_points + 1)]
+        self.tick += 1
+        return ''.join(lines).encode('ascii')
+# --- END OF FILE fake_serial_device.py ---
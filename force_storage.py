@@ -0,0 +1,99 @@
+# --- START OF FILE force_storage.py ---
+import numpy as np
+import logging
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# force_matrix storage policies: dense float64 with NaN fill (the original), dense float32, CSR of the
+# nonzero cells, or 'auto' (float32 or sparse, whichever measures smaller for the session's density).
+STORAGE_POLICIES = ('dense64', 'dense32', 'sparse', 'auto')
+SPARSE_MAX_RATIO = 0.5 # 'auto' picks sparse only when it takes at most this fraction of the float32 size
+
+def keep_last_cells(num_cols, rows, cols, values):
+    """Drops all but the last write to each (row, col) cell, like drop_duplicates(keep='last')."""
+    flat = rows.astype(np.int64) * num_cols + cols
+    hit = np.zeros(int(flat.max()) + 1 if len(flat) else 0, dtype=bool); hit[flat] = True
+    if np.count_nonzero(hit) == len(flat): return rows, cols, values
+    order = np.argsort(flat, kind='stable'); sorted_flat = flat[order]
+    last = order[np.append(sorted_flat[1:] != sorted_flat[:-1], True)] # Repeated cells (rare after clean_data)
+    return rows[last], cols[last], values[last]
+
+class SparseForceMatrix:
+    """Read-only CSR force matrix: per-row nonzero cells plus a row-packed bitmask of cells without a sample.
+
+    Indexing rows (an int, a row slice, or (row, cols)) returns dense float32 rows with NaN where there
+    was no sample, exactly what the dense matrix would hold, so DataProcessor's getters and block loops
+    work unchanged. np.asarray() densifies the whole matrix.
+    """
+    ndim = 2
+
+    def __init__(self, shape, indptr, indices, data, missing=None):
+        self.shape = (int(shape[0]), int(shape[1]))
+        self.indptr = indptr; self.indices = indices; self.data = data
+        self.missing = missing # (rows, ceil(cols / 8)) np.packbits of the NaN mask, None if every cell has a sample
+
+    @classmethod
+    def from_cells(cls, shape, rows, cols, values, dtype=np.float32):
+        """Builds the matrix from deduplicated (row, col, value) samples; cells not listed have no sample."""
+        num_rows, num_cols = shape
+        missing = np.ones(shape, dtype=bool); missing[rows, cols] = False
+        missing = np.packbits(missing, axis=1) if missing.any() else None
+        nonzero = values != 0
+        rows, cols, values = rows[nonzero], cols[nonzero], values[nonzero]
+        order = np.argsort(rows.astype(np.int64) * num_cols + cols, kind='stable')
+        indptr = np.zeros(num_rows + 1, dtype=np.int64); np.cumsum(np.bincount(rows, minlength=num_rows), out=indptr[1:])
+        return cls(shape, indptr, cols[order].astype(np.int32), values[order].astype(dtype), missing)
+
+    @property
+    def dtype(self): return self.data.dtype
+    @property
+    def size(self): return self.shape[0] * self.shape[1]
+    @property
+    def nnz(self): return len(self.data)
+    @property
+    def nbytes(self): return self.indptr.nbytes + self.indices.nbytes + self.data.nbytes + (self.missing.nbytes if self.missing is not None else 0)
+    def __len__(self): return self.shape[0]
+
+    def rows(self, start, stop):
+        """Dense (stop - start, cols) block."""
+        start, stop, _ = slice(start, stop).indices(self.shape[0]); stop = max(start, stop)
+        out = np.zeros((stop - start, self.shape[1]), dtype=self.dtype)
+        a, b = self.indptr[start], self.indptr[stop]
+        out[np.repeat(np.arange(stop - start), np.diff(self.indptr[start:stop + 1])), self.indices[a:b]] = self.data[a:b]
+        if self.missing is not None: out[np.unpackbits(self.missing[start:stop], axis=1, count=self.shape[1]).astype(bool)] = np.nan
+        return out
+
+    def __getitem__(self, key):
+        if isinstance(key, tuple): row_key, col_key = key[0], key[1:]
+        else: row_key, col_key = key, ()
+        if isinstance(row_key, (int, np.integer)):
+            row_key = int(row_key) + (self.shape[0] if row_key < 0 else 0)
+            if not 0 <= row_key < self.shape[0]: raise IndexError(f"row {key} out of range for {self.shape[0]} rows")
+            block = self.rows(row_key, row_key + 1)[0]
+        elif isinstance(row_key, slice) and row_key.step in (None, 1): block = self.rows(row_key.start, row_key.stop)
+        else: return self.toarray()[key]
+        return block[col_key] if col_key else block
+
+    def toarray(self): return self.rows(0, self.shape[0])
+    def __array__(self, dtype=None, copy=None):
+        dense = self.toarray()
+        return dense if dtype is None else dense.astype(dtype)
+
+def choose_storage(shape, nnz, has_missing=True):
+    """'dense32' or 'sparse', whichever is smaller for `nnz` nonzero cells in a matrix of `shape`."""
+    num_rows, num_cols = shape
+    sparse_bytes = nnz * 8 + (num_rows + 1) * 8 + (num_rows * ((num_cols + 7) // 8) if has_missing else 0)
+    return 'sparse' if sparse_bytes <= SPARSE_MAX_RATIO * num_rows * num_cols * 4 else 'dense32'
+
+def build_force_matrix(policy, shape, rows, cols, values):
+    """force_matrix of `shape` holding `values` at (rows, cols) (NaN where there is no sample), stored per `policy`."""
+    if policy not in STORAGE_POLICIES: raise ValueError(f"Unknown storage policy '{policy}' (expected one of {STORAGE_POLICIES})")
+    rows, cols, values = keep_last_cells(shape[1], rows, cols, values)
+    if policy == 'auto':
+        policy = choose_storage(shape, int(np.count_nonzero(values)), has_missing=len(values) < shape[0] * shape[1])
+        logging.info(f"Storage policy auto: {policy} ({np.count_nonzero(values) / max(1, shape[0] * shape[1]):.1%} nonzero)")
+    if policy == 'sparse': return SparseForceMatrix.from_cells(shape, rows, cols, values)
+    matrix = np.full(shape, np.nan, dtype=np.float32 if policy == 'dense32' else np.float64)
+    matrix[rows, cols] = values
+    return matrix
+# --- END OF FILE force_storage.py ---
@@ -0,0 +1,77 @@
+# --- START OF FILE frame_protocol.py ---
+import struct
+import zlib
+import numpy as np
+import logging
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Binary full-frame wire format (all little-endian):
+#   sync      4 bytes  AA 55 A5 5A
+#   seq       uint32   frame sequence number (wraps)
+#   timestamp float64  device timestamp in seconds
+#   n_cells   uint16   number of cell values that follow
+#   cells     n_cells * uint16, row-major over the full hw_rows x hw_cols grid
+#   crc       uint32   zlib.crc32 over seq..cells (everything between sync and crc)
+SYNC = b'\xAA\x55\xA5\x5A'
+HEADER_STRUCT = struct.Struct('<IdH')
+CRC_STRUCT = struct.Struct('<I')
+HEADER_SIZE = len(SYNC) + HEADER_STRUCT.size
+HW_ROWS, HW_COLS = 44, 52
+HW_FRAME_CELLS = HW_ROWS * HW_COLS # 2,288 cells per full hardware frame
+
+def frame_dtype(num_cells=HW_FRAME_CELLS):
+    """Structured dtype of one decoded frame: sequence number, device timestamp and raw cell values."""
+    return np.dtype([('seq', '<u4'), ('timestamp', '<f8'), ('cells', '<u2', (num_cells,))])
+
+def frame_size(num_cells=HW_FRAME_CELLS): return HEADER_SIZE + 2 * num_cells + CRC_STRUCT.size
+
+def encode_frame(seq, timestamp, cells):
+    cells = np.asarray(cells, dtype='<u2').ravel()
+    body = HEADER_STRUCT.pack(seq & 0xFFFFFFFF, float(timestamp), len(cells)) + cells.tobytes()
+    return SYNC + body + CRC_STRUCT.pack(zlib.crc32(body))
+
+class FrameDecoder:
+    """Incremental decoder: feed() arbitrary byte chunks, get back whole frames as a frame_dtype array.
+
+    On a bad length or CRC the decoder skips one byte past the sync word and searches again,
+    so a corrupted frame costs only itself. Bytes skipped while hunting for sync are counted too.
+    """
+    def __init__(self, num_cells=HW_FRAME_CELLS):
+        self.num_cells = int(num_cells)
+        self.frame_size = frame_size(self.num_cells)
+        self.dtype = frame_dtype(self.num_cells)
+        self._buf = bytearray()
+        self.frames_decoded = 0; self.bad_frames = 0; self.resync_bytes = 0
+        self.seq_gaps = 0; self.last_seq = None
+
+    def reset(self): self._buf.clear(); self.last_seq = None
+
+    def feed(self, data):
+        self._buf += data
+        buf = self._buf; payload_offsets = []; pos = 0
+        with memoryview(buf) as view: # Parsed in place; only completed frames are copied out
+            while True:
+                idx = buf.find(SYNC, pos)
+                if idx < 0:
+                    keep_from = max(pos, len(buf) - (len(SYNC) - 1)) # A sync word may straddle chunks
+                    self.resync_bytes += keep_from - pos; pos = keep_from; break
+                self.resync_bytes += idx - pos
+                if len(buf) - idx < self.frame_size: pos = idx; break
+                _, _, n_cells = HEADER_STRUCT.unpack_from(buf, idx + len(SYNC))
+                crc_at = idx + self.frame_size - CRC_STRUCT.size
+                if n_cells != self.num_cells or zlib.crc32(view[idx + len(SYNC):crc_at]) != CRC_STRUCT.unpack_from(buf, crc_at)[0]:
+                    self.bad_frames += 1; pos = idx + 1; continue
+                payload_offsets.append(idx); pos = idx + self.frame_size
+
+            frames = np.empty(len(payload_offsets), dtype=self.dtype)
+            for i, idx in enumerate(payload_offsets):
+                seq, ts, _ = HEADER_STRUCT.unpack_from(buf, idx + len(SYNC))
+                frames[i]['seq'] = seq; frames[i]['timestamp'] = ts
+                frames[i]['cells'] = np.frombuffer(view, dtype='<u2', count=self.num_cells, offset=idx + HEADER_SIZE) # Copy; the view is dropped at once
+                if self.last_seq is not None and seq != ((self.last_seq + 1) & 0xFFFFFFFF): self.seq_gaps += 1
+                self.last_seq = seq
+        del self._buf[:pos] # Only once no view pins the buffer
+        self.frames_decoded += len(frames)
+        return frames
+# --- END OF FILE frame_protocol.py ---
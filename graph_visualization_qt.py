@@ -28,7 +28,7 @@ class GraphVisualizerQt: # Renamed to avoid conflict if old one is in same dir
             self.ax.set_ylabel("Average Force (N)")
             self.ax.set_title("Average Bite Force Over Time")
             self.ax.grid(True)
-            if self.processor.timestamps and len(self.processor.timestamps) > 0:
+            if self.processor.timestamps is not None and len(self.processor.timestamps) > 0:
                 self.ax.set_xlim(self.processor.timestamps[0], self.processor.timestamps[-1])
             else: 
                 self.ax.set_xlim(0, 1) 
@@ -49,7 +49,7 @@ class GraphVisualizerQt: # Renamed to avoid conflict if old one is in same dir
             logging.info("Matplotlib axes cleared for new plot content.")
         
         # Set fixed X-axis limits based on the entire dataset
-        if self.processor.timestamps and len(self.processor.timestamps) > 0:
+        if self.processor.timestamps is not None and len(self.processor.timestamps) > 0:
             self.ax.set_xlim(self.processor.timestamps[0], self.processor.timestamps[-1])
             logging.info(f"Graph X-LIM set to: ({self.processor.timestamps[0]:.2f}, {self.processor.timestamps[-1]:.2f})")
         else: 
@@ -134,7 +134,7 @@ class GraphVisualizerQt: # Renamed to avoid conflict if old one is in same dir
 
         for i, tooth_id in enumerate(tooth_ids_to_display):
             full_times, full_forces = self.processor.get_average_force_for_tooth(tooth_id) # Fetch again for cache
-            self.full_data_cache[tooth_id] = (full_times, full_forces)
+            self.full_data_cache[tooth_id] = (np.asarray(full_times, dtype=float), full_forces) # Array once, so per-frame searchsorted does not re-convert
             # Initially plot empty; update_graph_to_timestamp will fill them
             line, = self.ax.plot([], [], label=f"Tooth {tooth_id}", color=colors[i % len(colors)], lw=1.5)
             self.lines[tooth_id] = line
@@ -2,13 +2,21 @@
 import numpy as np
 from vedo import Text2D, Box, Line, Grid, Plane, Text3D, colors # Plotter passed in
 import logging
-from points_array import PointsArray 
+from points_array import PointsArray
+from sensor_layouts import get_layout
+from hardware_colormap import HardwareColormap, BAR_GREY
 import vtk
+from vtkmodules.util.numpy_support import numpy_to_vtk
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
 class Hardware3DBarVisualizerQt:
-    def __init__(self, processor_instance, parent_plotter_instance, renderer_index):
+    # render_mode 'glyph': every bar is the same unit cube, instanced by a vtkGlyph3DMapper over the fixed
+    # bar base points; per-point scale (bar height) and RGBA arrays are written in place each frame.
+    # render_mode 'actors': the original vedo Box actor per cell, rebuilt whenever its height changes.
+    RENDER_MODES = ('glyph', 'actors')
+
+    def __init__(self, processor_instance, parent_plotter_instance, renderer_index, layout=None, render_mode='glyph'):
         self.processor = processor_instance 
         self.parent_plotter = parent_plotter_instance
         self.renderer_index = renderer_index
@@ -17,17 +25,21 @@ class Hardware3DBarVisualizerQt:
         if self.processor.cleaned_data is None: self.processor.create_force_matrix()
         self.num_data_teeth = len(self.processor.tooth_ids) if self.processor.tooth_ids else 0 # Not directly used for hw grid
         
-        self.hw_rows = 44
-        self.hw_cols = 52
-        self.points_array_checker = PointsArray()
+        self.layout = layout if layout is not None else get_layout() # Sensor geometry (sensor_layouts.SensorLayout)
+        self.hw_rows = self.layout.rows
+        self.hw_cols = self.layout.cols
+        self.points_array_checker = PointsArray(self.layout)
         
         self.arch_layout_width = 14.0 # Reference for positioning calculations
         self.arch_layout_depth = 8.0
         self.bar_base_size = 0.22
         
         self.hw_cell_bar_base_positions_and_ids = [] # List of {'col':c,'row':r,'pos':np.array}
+        self.bar_base_positions = np.zeros((0, 3)) # (valid cells, 3) bar base points in flat frame order
         
         self.max_force_for_scaling = 1000.0 
+        self.colormap = HardwareColormap(self.max_force_for_scaling, grey=BAR_GREY) # Force -> RGB for whole frames
+        self.contact_threshold = 5 # Readings at or below this are not in contact (hidden); 0 for conditioned frames, which are zero outside contact
         self.max_bar_height = 1.5 # Adjusted max height
         self.min_bar_height = 0.01        
         self.grid_center_y = 0.0 # Will be based on hw_rows * bar_base_size
@@ -36,7 +48,15 @@ class Hardware3DBarVisualizerQt:
         self.timestamps = self.processor.timestamps 
         self.current_timestamp_idx = 0; self.last_animated_timestamp = None 
         
-        self.force_bar_actors_dict = {} # Dict: {(r,c): BoxActor} - PERSISTENT
+        if render_mode not in self.RENDER_MODES: raise ValueError(f"Unknown render_mode '{render_mode}' (expected one of {self.RENDER_MODES})")
+        self.render_mode = render_mode
+        self.force_bar_actors_dict = {} # Dict: {(r,c): BoxActor} - PERSISTENT ('actors' mode)
+        self.bar_glyph_actor = None # Single vtkActor of all bars ('glyph' mode)
+        self.bar_scales = None # (valid cells, 3) float32 glyph scale per bar: (1, 1, height); shared with VTK
+        self.bar_rgba = None # (valid cells, 4) uint8 color per bar; shared with VTK
+        self.bar_visible = None # (valid cells,) bool, False = bar not drawn at all (glyph mask)
+        self._bar_visible_bits = None # bar_visible packed MSB-first, the buffer of the vtkBitArray mask
+        self._bar_points_poly = None; self._bar_scales_vtk = None; self._bar_rgba_vtk = None; self._bar_visible_vtk = None
         self.time_text_actor = None       
         self.floor_actor = None    
         # self.static_arch_line_actor = None # Optional for this view
@@ -68,7 +88,8 @@ class Hardware3DBarVisualizerQt:
         self.floor_actor.pos(self.grid_center_x, self.grid_center_y, -0.05) 
         self.renderer.AddActor(self.floor_actor.actor)
 
-        self._create_and_add_bars_once() # Creates Box actors once
+        if self.render_mode == 'glyph': self._create_bar_glyphs_once() # One instanced actor for all bars
+        else: self._create_and_add_bars_once() # Creates Box actors once
 
         # Initial camera position
         cam.SetPosition(self.grid_center_x, self.grid_center_y - temp_total_grid_height*0.8, self.max_bar_height * 3)
@@ -86,14 +107,10 @@ class Hardware3DBarVisualizerQt:
         total_vis_height = self.hw_rows * self.bar_base_size
         offset_x = -total_vis_width / 2 + self.bar_base_size / 2
         offset_y = -total_vis_height / 2 + self.bar_base_size / 2 
-        for r_idx in range(self.hw_rows):
-            for c_idx in range(self.hw_cols):
-                if self.points_array_checker.is_valid(c_idx, r_idx):
-                    bar_x = offset_x + c_idx * self.bar_base_size
-                    bar_y = offset_y + ((self.hw_rows - 1 - r_idx) * self.bar_base_size) 
-                    self.hw_cell_bar_base_positions_and_ids.append(
-                        {'col': c_idx, 'row': r_idx, 'pos': np.array([bar_x, bar_y, 0.0])} # Base Z is 0
-                    )
+        rows, cols = self.points_array_checker.flat_rows, self.points_array_checker.flat_cols # Valid cells in flat frame order
+        base = np.column_stack((offset_x + cols * self.bar_base_size, offset_y + (self.hw_rows - 1 - rows) * self.bar_base_size, np.zeros(len(rows)))) # Base Z is 0
+        self.bar_base_positions = base
+        self.hw_cell_bar_base_positions_and_ids = [{'col': c_idx, 'row': r_idx, 'pos': pos} for r_idx, c_idx, pos in zip(rows.tolist(), cols.tolist(), base)]
         # Update grid center based on actual positions if needed (though offsets should center it)
         if self.hw_cell_bar_base_positions_and_ids:
             all_x = [p['pos'][0] for p in self.hw_cell_bar_base_positions_and_ids]
@@ -132,16 +149,50 @@ class Hardware3DBarVisualizerQt:
         logging.info(f"Hw3DBarViz (R{self.renderer_index}): Created {len(self.force_bar_actors_dict)} static bar Box actors.")
 
 
-    def _value_to_color_hardware(self, value, sensitivity=1): # Same as before
-        # ... (color mapping logic from HardwareGridVisualizerQt) ...
-        mapped_value = (value / sensitivity * 255) // self.max_force_for_scaling 
-        mapped_value = min(255, max(0, int(mapped_value)))
-        r,g,b = 200,200,200 
-        if mapped_value > 204: r=255; g=max(0,int(150-((mapped_value-204)*150/51))); b=0
-        elif mapped_value > 140: r=int(139+((mapped_value-140)*116/64)); g=int((mapped_value-140)*150/64); b=0
-        elif mapped_value > 76: g=int(255-((mapped_value-76)*155/64)); r=int(((mapped_value-76)/64)*100); b=0
-        elif mapped_value > 12: r=0; g=int(255-((mapped_value-12)*155/64)); b=int(100-((mapped_value-12)*50/64))
-        return (r/255.0, g/255.0, b/255.0)
+    def _create_bar_glyphs_once(self):
+        if not self.renderer: return
+        self._create_hw_cell_bar_positions() # Populate base positions
+        if self.bar_glyph_actor is not None: self.renderer.RemoveActor(self.bar_glyph_actor) # Should only be called once, but defensive
+
+        n = len(self.bar_base_positions)
+        cube = vtk.vtkCubeSource() # Unit-height bar standing on its base point, scaled along Z per point
+        cube.SetXLength(self.bar_base_size * 0.85); cube.SetYLength(self.bar_base_size * 0.85); cube.SetZLength(1.0); cube.SetCenter(0, 0, 0.5)
+        points = vtk.vtkPoints(); points.SetData(numpy_to_vtk(np.ascontiguousarray(self.bar_base_positions), deep=True))
+        self.bar_scales = np.ones((n, 3), dtype=np.float32); self.bar_scales[:, 2] = self.min_bar_height
+        self.bar_rgba = np.zeros((n, 4), dtype=np.uint8); self.bar_rgba[:] = self._idle_rgba()
+        self.bar_visible = np.ones(n, dtype=bool); self._bar_visible_bits = np.packbits(self.bar_visible)
+        self._bar_scales_vtk = numpy_to_vtk(self.bar_scales, deep=False); self._bar_scales_vtk.SetName('bar_scale') # Views the NumPy buffers:
+        self._bar_rgba_vtk = numpy_to_vtk(self.bar_rgba, deep=False); self._bar_rgba_vtk.SetName('bar_rgba') # write in place, then Modified()
+        self._bar_visible_vtk = vtk.vtkBitArray(); self._bar_visible_vtk.SetName('bar_visible') # The glyph mapper only masks with a bit array
+        self._bar_visible_vtk.SetVoidArray(self._bar_visible_bits, n, 1) # vtkBitArray bits are MSB-first, as np.packbits packs them
+        self._bar_points_poly = vtk.vtkPolyData(); self._bar_points_poly.SetPoints(points)
+        point_data = self._bar_points_poly.GetPointData()
+        point_data.AddArray(self._bar_scales_vtk); point_data.AddArray(self._bar_visible_vtk); point_data.SetScalars(self._bar_rgba_vtk)
+
+        mapper = vtk.vtkGlyph3DMapper(); mapper.SetInputData(self._bar_points_poly); mapper.SetSourceConnection(cube.GetOutputPort())
+        mapper.OrientOff(); mapper.ScalingOn(); mapper.SetScaleModeToScaleByVectorComponents(); mapper.SetScaleArray('bar_scale')
+        mapper.MaskingOn(); mapper.SetMaskArray('bar_visible') # Hidden bars are skipped, not drawn transparent
+        mapper.ScalarVisibilityOn(); mapper.SetScalarModeToUsePointData(); mapper.SetColorModeToDirectScalars()
+        self.bar_glyph_actor = vtk.vtkActor(); self.bar_glyph_actor.SetMapper(mapper)
+        self.renderer.AddActor(self.bar_glyph_actor)
+        logging.info(f"Hw3DBarViz (R{self.renderer_index}): Created one glyph actor for {n} bars.")
+
+    def _idle_rgba(self, alpha=0.1):
+        return np.append(np.round(np.array(colors.get_color('lightgrey')) * 255), round(alpha * 255)).astype(np.uint8)
+
+    def _update_bar_glyphs(self, hardware_data_flat_array, sensitivity=1):
+        """'glyph' mode frame update: bar heights and colors of the whole frame written into the shared arrays."""
+        if self.bar_scales is None: return
+        if hardware_data_flat_array is None: self.bar_visible[:] = 0 # Hide all bars if no data
+        else:
+            values = np.asarray(hardware_data_flat_array)[:len(self.bar_scales)]; n = len(values) # Flat frame order == bar order
+            self.bar_scales[:n, 2] = self.min_bar_height + np.clip((values / sensitivity) / self.max_force_for_scaling, 0.0, 1.0) * (self.max_bar_height - self.min_bar_height)
+            self.bar_visible[:n] = values > self.contact_threshold # Not in contact (same test as the grid view): not drawn
+            self.bar_rgba[:n, :3] = self.colormap.colors_uint8(values, sensitivity); self.bar_rgba[:n, 3] = round(0.92 * 255)
+            self.bar_rgba[n:] = self._idle_rgba(); self.bar_visible[n:] = 1 # Short frame
+            self._bar_scales_vtk.Modified(); self._bar_rgba_vtk.Modified()
+        self._bar_visible_bits[:] = np.packbits(self.bar_visible)
+        self._bar_visible_vtk.Modified(); self._bar_points_poly.Modified()
 
     def render_display(self, timestamp, hardware_data_flat_array, sensitivity=1):
         if not self.renderer or not self.parent_plotter: return
@@ -152,11 +203,14 @@ class Hardware3DBarVisualizerQt:
         self.time_text_actor = Text2D(f"HW 3D - T: {timestamp:.1f}s", pos="bottom-right", c='k', s=0.7)
         self.renderer.AddActor(self.time_text_actor.actor) # Add new one
 
+        if self.render_mode == 'glyph': self._update_bar_glyphs(hardware_data_flat_array, sensitivity); return
+
         if hardware_data_flat_array is None or not self.hw_cell_bar_base_positions_and_ids: 
             # Hide all bars if no data
             for bar_actor in self.force_bar_actors_dict.values(): bar_actor.alpha(0)
             return
 
+        bar_colors = self.colormap.colors(np.asarray(hardware_data_flat_array)[:len(self.hw_cell_bar_base_positions_and_ids)], sensitivity).tolist() # Whole frame at once
         data_idx = 0
         for cell_info in self.hw_cell_bar_base_positions_and_ids:
             base_pos = cell_info['pos']
@@ -170,7 +224,7 @@ class Hardware3DBarVisualizerQt:
                 norm_force = min(1.0, max(0.0, (value / sensitivity) / self.max_force_for_scaling))
                 new_bar_h = self.min_bar_height + norm_force * (self.max_bar_height - self.min_bar_height)
                 
-                if value < 5 : new_bar_h = 0.0 # Threshold for very low values to be invisible
+                if value <= self.contact_threshold: new_bar_h = 0.0 # Not in contact (same test as the grid view): invisible
 
                 if new_bar_h < self.min_bar_height / 2: # Effectively zero or very small
                     bar_actor.alpha(0) # Make it invisible
@@ -178,7 +232,7 @@ class Hardware3DBarVisualizerQt:
                     # current_actor_height = bar_actor.bounds()[5] - bar_actor.bounds()[4]
                     # if current_actor_height > 0: bar_actor.scale([1,1,0.001/current_actor_height], reset=False)
                 else:
-                    color = self._value_to_color_hardware(value, sensitivity)
+                    color = bar_colors[data_idx]
                     bar_actor.color(color).alpha(0.92)
 
                     # Update height and position
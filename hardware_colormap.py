@@ -0,0 +1,52 @@
+# --- START OF FILE hardware_colormap.py ---
+import numpy as np
+
+# Force -> RGB mapping of the hardware views. A reading is quantized to one of 256 levels,
+# level = value / sensitivity * 255 // max_force clipped to 0..255, and the level indexes a
+# piecewise ramp: grey up to 12, then blue-green, green, orange and red. The grey differs per view
+# (211 in the grid, 200 under the 3D bars).
+GRID_GREY = 211
+BAR_GREY = 200
+
+def hardware_ramp(grey=GRID_GREY):
+    """(256, 3) uint8 RGB table of the hardware color ramp, one row per quantized level."""
+    table = np.empty((256, 3), dtype=np.uint8)
+    for level in range(256):
+        r, g, b = grey, grey, grey
+        if level > 204: r = 255; g = max(0, int(150 - ((level - 204) * 150 / 51))); b = 0
+        elif level > 140: r = int(139 + ((level - 140) * 116 / 64)); g = int((level - 140) * 150 / 64); b = 0
+        elif level > 76: g = int(255 - ((level - 76) * 155 / 64)); r = int(((level - 76) / 64) * 100); b = 0
+        elif level > 12: r = 0; g = int(255 - ((level - 12) * 155 / 64)); b = int(100 - ((level - 12) * 50 / 64))
+        table[level] = (r, g, b)
+    return table
+
+class HardwareColormap:
+    """Maps whole frames to colors with one quantize-and-index step.
+
+    The ramp is built once; sensitivity only changes the quantization scale, 255 / (sensitivity *
+    max_force), which is recomputed when the sensitivity changes.
+    """
+    def __init__(self, max_force=1000.0, grey=GRID_GREY):
+        self.max_force = float(max_force); self.grey = grey
+        self.table = hardware_ramp(grey) # (256, 3) uint8
+        self.table_float = self.table / 255.0 # (256, 3) RGB in 0..1, as vedo/VTK take them
+        self._sensitivity = None; self._scale = None
+
+    def scale(self, sensitivity=1):
+        if sensitivity != self._sensitivity: self._sensitivity = sensitivity; self._scale = 255.0 / (sensitivity * self.max_force)
+        return self._scale
+
+    def quantize(self, values, sensitivity=1):
+        """uint8 ramp level per value (any shape); NaN maps to level 0."""
+        levels = np.asarray(values, dtype=np.float32) * np.float32(self.scale(sensitivity))
+        np.clip(levels, 0, 255, out=levels)
+        return np.nan_to_num(levels, nan=0.0).astype(np.uint8) # The cast truncates, i.e. floors the non-negative levels
+
+    def colors(self, values, sensitivity=1):
+        """(..., 3) float RGB in 0..1 per value."""
+        return self.table_float[self.quantize(values, sensitivity)]
+
+    def colors_uint8(self, values, sensitivity=1):
+        """(..., 3) uint8 RGB per value."""
+        return self.table[self.quantize(values, sensitivity)]
+# --- END OF FILE hardware_colormap.py ---
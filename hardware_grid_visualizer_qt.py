@@ -2,23 +2,50 @@
 import numpy as np
 from vedo import Text2D, Rectangle, colors, Plotter # Plotter might be needed for type hinting if passing parent_plotter
 import logging
+import vtk
+from vtkmodules.util.numpy_support import numpy_to_vtk, numpy_to_vtkIdTypeArray, get_numpy_array_type
+from vtkmodules.util.vtkConstants import VTK_ID_TYPE
 from points_array import PointsArray
+from sensor_layouts import get_layout
+from hardware_colormap import HardwareColormap, GRID_GREY
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+# Lookup table of the 'mesh' render mode, indexed by per-cell scalars: 0-255 are the hardware color
+# ramp at alpha 0.2 (below the contact threshold), 256-511 the same ramp at alpha 1.0 (in contact),
+# then the idle color before the first frame and the color of cells a short frame did not cover.
+GRID_LUT_CONTACT = 256
+GRID_LUT_IDLE = 512
+GRID_LUT_NO_DATA = 513
+GRID_LUT_SIZE = 514
+
 class HardwareGridVisualizerQt:
-    def __init__(self, processor_placeholder, parent_plotter_instance, renderer_index):
+    # render_mode 'mesh': the whole sensor is one vtkPolyData (a quad per valid cell) colored through a
+    # lookup table from a per-cell scalar array, so a frame update is one NumPy write plus Modified().
+    # render_mode 'actors': the original vedo Rectangle actor per grid cell, updated cell by cell.
+    RENDER_MODES = ('mesh', 'actors')
+
+    def __init__(self, processor_placeholder, parent_plotter_instance, renderer_index, layout=None, render_mode='mesh'):
         self.processor_ref = processor_placeholder
         self.parent_plotter = parent_plotter_instance
         self.renderer_index = renderer_index
         self.renderer = parent_plotter_instance.renderers[renderer_index]
 
-        self.hw_rows = 44
-        self.hw_cols = 52
-        self.points_array_checker = PointsArray()
+        self.layout = layout if layout is not None else get_layout() # Sensor geometry (sensor_layouts.SensorLayout)
+        self.hw_rows = self.layout.rows
+        self.hw_cols = self.layout.cols
+        self.points_array_checker = PointsArray(self.layout)
         self.max_force_for_scaling = 1000.0 
+        self.colormap = HardwareColormap(self.max_force_for_scaling, grey=GRID_GREY) # Force -> RGB for whole frames
+        self.contact_threshold = 5 # Raw-reading contact threshold; conditioned frames are already zero outside contact
         
-        self.cell_rect_actors = {} # Dict: {(r, c): RectangleActor} - PERSISTENT
+        if render_mode not in self.RENDER_MODES: raise ValueError(f"Unknown render_mode '{render_mode}' (expected one of {self.RENDER_MODES})")
+        self.render_mode = render_mode
+        self.cell_rect_actors = {} # Dict: {(r, c): RectangleActor} - PERSISTENT ('actors' mode)
+        self.valid_rect_actors = [] # Valid cells' rectangles in flat frame order ('actors' mode)
+        self.grid_mesh_actor = None # Single vtkActor of the grid mesh ('mesh' mode)
+        self.cell_scalars = None # uint16 LUT index per valid cell, in flat frame order; shared with the mesh's cell data
+        self._cell_scalars_vtk = None
         self.time_text_actor = None # Will be recreated (simple)
         
         self.timestamps = self.processor_ref.timestamps
@@ -38,7 +65,8 @@ class HardwareGridVisualizerQt:
         cam = self.parent_plotter.camera
         cam.ParallelProjectionOn()
 
-        self._create_and_add_grid_rects_once() # Create Rectangles ONCE and add to renderer
+        if self.render_mode == 'mesh': self._create_grid_mesh_once() # One polydata actor for all cells
+        else: self._create_and_add_grid_rects_once() # Create Rectangles ONCE and add to renderer
 
         # Camera fitting logic (ensure it uses self.parent_plotter.camera and self.renderer.ResetCamera())
         cell_render_size = 0.25 
@@ -50,7 +78,7 @@ class HardwareGridVisualizerQt:
         cam.SetPosition(0, 0, 20)  # Position camera along Z-axis
         cam.SetViewUp(0, 1, 0)     # Y is up
         cam.SetParallelScale(grid_render_height / 1.9) # Adjust zoom
-        self.renderer.ResetCamera()
+        self.renderer.ResetCamera(-grid_render_width / 2, grid_render_width / 2, -grid_render_height / 2, grid_render_height / 2, 0, 0) # Whole grid, not the actor bounds: the mesh only spans the valid cells
         self.renderer.ResetCameraClippingRange()
         self.renderer.SetBackground(0.92, 0.92, 0.98) # Light blueish-grey for this view
         logging.info(f"HwGridViz (R{self.renderer_index}): Scene setup complete.")
@@ -79,25 +107,50 @@ class HardwareGridVisualizerQt:
                 
                 rect = Rectangle((p1x, p1y), (p2x, p2y), c='lightgrey', alpha=0.1)
                 rect.lw(0)
-                if not self.points_array_checker.is_valid(c_idx, r_idx): rect.alpha(0) 
+                if not self.points_array_checker.mask[r_idx, c_idx]: rect.alpha(0) 
                 self.cell_rect_actors[(r_idx, c_idx)] = rect
                 if hasattr(rect, 'actor'): rect_actors_to_add_vtk.append(rect.actor)
         
+        self.valid_rect_actors = [self.cell_rect_actors[(r, c)] for r, c in zip(self.points_array_checker.flat_rows.tolist(), self.points_array_checker.flat_cols.tolist())]
         if rect_actors_to_add_vtk:
             for act in rect_actors_to_add_vtk: self.renderer.AddActor(act)
         logging.info(f"HwGridViz (R{self.renderer_index}): Created {len(self.cell_rect_actors)} cell rectangles.")
 
-    def _value_to_color_hardware(self, value, sensitivity=1): # Same
-        # ... color mapping ...
-        mapped_value = (value / sensitivity * 255) // self.max_force_for_scaling
-        mapped_value = min(255, max(0, int(mapped_value)))
-        r,g,b = 211,211,211 
-        if mapped_value > 204: r=255; g=max(0,int(150-((mapped_value-204)*150/51))); b=0
-        elif mapped_value > 140: r=int(139+((mapped_value-140)*116/64)); g=int((mapped_value-140)*150/64); b=0
-        elif mapped_value > 76: g=int(255-((mapped_value-76)*155/64)); r=int(((mapped_value-76)/64)*100); b=0
-        elif mapped_value > 12: r=0; g=int(255-((mapped_value-12)*155/64)); b=int(100-((mapped_value-12)*50/64))
-        return (r/255.0, g/255.0, b/255.0)
-
+    def _create_grid_mesh_once(self):
+        if not self.renderer: return
+        if self.grid_mesh_actor is not None: self.renderer.RemoveActor(self.grid_mesh_actor) # Should only be called once, but defensive
+
+        cell_size = 0.25; padding = 0.01 # Same geometry as the Rectangle actors
+        half_draw_size = (cell_size - padding) / 2.0
+        rows, cols = self.points_array_checker.flat_rows, self.points_array_checker.flat_cols; n = len(rows)
+        center_x = -self.hw_cols * cell_size / 2 + cols * cell_size + cell_size / 2
+        center_y = -self.hw_rows * cell_size / 2 + (self.hw_rows - 1 - rows) * cell_size + cell_size / 2
+        corners = np.array([(-1, -1), (1, -1), (1, 1), (-1, 1)]) * half_draw_size # Counter-clockwise
+        quad_points = np.zeros((n, 4, 3)); quad_points[..., 0] = center_x[:, None] + corners[:, 0]; quad_points[..., 1] = center_y[:, None] + corners[:, 1]
+
+        points = vtk.vtkPoints(); points.SetData(numpy_to_vtk(quad_points.reshape(-1, 3), deep=True))
+        polys = vtk.vtkCellArray(); id_type = get_numpy_array_type(VTK_ID_TYPE) # vtkIdType width of this VTK build
+        polys.SetData(numpy_to_vtkIdTypeArray(np.arange(0, 4 * n + 1, 4, dtype=id_type), deep=True), numpy_to_vtkIdTypeArray(np.arange(4 * n, dtype=id_type), deep=True))
+        self.cell_scalars = np.full(n, GRID_LUT_IDLE, dtype=np.uint16)
+        self._cell_scalars_vtk = numpy_to_vtk(self.cell_scalars, deep=False) # Views self.cell_scalars' buffer: write in place, then Modified()
+        self._cell_scalars_vtk.SetName('cell_color_index')
+        poly = vtk.vtkPolyData(); poly.SetPoints(points); poly.SetPolys(polys); poly.GetCellData().SetScalars(self._cell_scalars_vtk)
+
+        mapper = vtk.vtkPolyDataMapper(); mapper.SetInputData(poly)
+        mapper.SetLookupTable(self._build_grid_lut()); mapper.UseLookupTableScalarRangeOn()
+        mapper.SetScalarModeToUseCellData(); mapper.SetColorModeToMapScalars(); mapper.ScalarVisibilityOn()
+        self.grid_mesh_actor = vtk.vtkActor(); self.grid_mesh_actor.SetMapper(mapper)
+        self.renderer.AddActor(self.grid_mesh_actor)
+        logging.info(f"HwGridViz (R{self.renderer_index}): Created grid mesh of {n} cells.")
+
+    def _build_grid_lut(self):
+        lut = vtk.vtkLookupTable()
+        lut.SetNumberOfTableValues(GRID_LUT_SIZE); lut.SetRange(-0.5, GRID_LUT_SIZE - 0.5) # Integer scalar i -> table entry i
+        for level, (r, g, b) in enumerate(self.colormap.table_float.tolist()):
+            lut.SetTableValue(level, r, g, b, 0.2); lut.SetTableValue(GRID_LUT_CONTACT + level, r, g, b, 1.0)
+        grey = colors.get_color('lightgrey')
+        lut.SetTableValue(GRID_LUT_IDLE, *grey, 0.1); lut.SetTableValue(GRID_LUT_NO_DATA, *grey, 0.2)
+        return lut
 
     def render_grid_view(self, timestamp, hardware_data_flat_array, sensitivity=1):
         if not self.renderer or not self.parent_plotter: return
@@ -105,28 +158,29 @@ class HardwareGridVisualizerQt:
 
         # --- Only recreate time_text_actor ---
         if self.time_text_actor: self.renderer.RemoveActor(self.time_text_actor.actor)
-        self.time_text_actor = Text2D(f"HW Grid - T: {timestamp:.1f}s", pos="bottom-left", c='k', s=0.7)
+        tracker = getattr(self.main_app_window_ref, 'region_tracker', None)
+        regions_text = f" - {len(tracker.regions)} contact regions" if tracker is not None and hardware_data_flat_array is not None else ""
+        self.time_text_actor = Text2D(f"HW Grid - T: {timestamp:.1f}s{regions_text}", pos="bottom-left", c='k', s=0.7)
         self.renderer.AddActor(self.time_text_actor.actor)
         # ---
 
         if hardware_data_flat_array is None: return
 
-        data_idx = 0
-        for r_idx in range(self.hw_rows):
-            for c_idx in range(self.hw_cols):
-                rect_actor = self.cell_rect_actors.get((r_idx, c_idx))
-                if not rect_actor: continue 
-
-                if self.points_array_checker.is_valid(c_idx, r_idx):
-                    if data_idx < len(hardware_data_flat_array):
-                        value = hardware_data_flat_array[data_idx]
-                        color = self._value_to_color_hardware(value, sensitivity)
-                        # --- UPDATE EXISTING RECT ACTOR ---
-                        rect_actor.color(color).alpha(1.0 if value > 5 else 0.2) 
-                        data_idx += 1
-                    else: 
-                        rect_actor.alpha(0.2).color('lightgrey') 
-                # Invalid cells' alpha remains 0 from init
+        if self.render_mode == 'mesh':
+            if self.cell_scalars is None: return
+            values = np.asarray(hardware_data_flat_array)[:len(self.cell_scalars)] # Flat frame order == mesh cell order
+            scalars = self.cell_scalars[:len(values)]
+            scalars[:] = self.colormap.quantize(values, sensitivity); scalars[values > self.contact_threshold] += GRID_LUT_CONTACT
+            self.cell_scalars[len(values):] = GRID_LUT_NO_DATA # Short frame
+            self._cell_scalars_vtk.Modified()
+            return
+
+        values = np.asarray(hardware_data_flat_array)[:len(self.valid_rect_actors)] # Flat frame order == valid_rect_actors order
+        rgb = self.colormap.colors(values, sensitivity).tolist(); alphas = np.where(values > self.contact_threshold, 1.0, 0.2).tolist()
+        for rect_actor, color, alpha in zip(self.valid_rect_actors, rgb, alphas): # --- UPDATE EXISTING RECT ACTORS ---
+            rect_actor.color(color).alpha(alpha)
+        for rect_actor in self.valid_rect_actors[len(values):]: rect_actor.alpha(0.2).color('lightgrey') # Short frame
+        # Invalid cells' alpha remains 0 from init
         # No self.renderer.render() here
 
     def animate(self, timestamp_to_render, hardware_data_for_timestamp=None, sensitivity=1):
@@ -0,0 +1,135 @@
+# --- START OF FILE hardware_processing.py ---
+import time
+import logging
+import numpy as np
+from sensor_layouts import get_layout
+from session_file import SessionWriter, SessionFile
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Per-frame statistics, one record per stored frame. contact_area counts cells above the contact
+# threshold; the centroid is force-weighted in grid (row, col) units and NaN for an empty frame.
+FRAME_STATS_DTYPE = np.dtype([('timestamp', '<f8'), ('total', '<f8'), ('max', '<f4'), ('contact_area', '<i4'),
+                              ('centroid_row', '<f4'), ('centroid_col', '<f4')])
+
+class HardwareFrameProcessor:
+    """Processing path for flat hardware frames over the valid region of a sensor layout.
+
+    Frames are rows of one (T x valid_cells) typed buffer that grows by doubling, with per-frame
+    statistics (total force, max, contact area, centroid) computed per appended batch. The mapping
+    from flat valid-cell index to grid (row, col) comes from `layout`, a compiled
+    sensor_layouts.SensorLayout (default: the 44x52 arch), in the order the hardware visualizers
+    draw cells. Full-grid frames (layout.frame_cells wide, as the binary protocol sends them) are
+    reduced to the valid cells on append. With `max_frames` set, older frames are dropped
+    in bulk so that between max_frames and 2 x max_frames recent frames are kept.
+    With a signal_conditioning pipeline, frames are conditioned on append and stored as float32;
+    contact then means any nonzero cell (the pipeline zeroes everything outside contact).
+    With `session_path` set, frames are recorded to that session file (kind 'sensor_layout', one
+    column per valid cell) instead of memory, and `frames` is a memory-mapped view of it, so overnight
+    recordings are bounded by disk rather than RAM. Only the statistics (36 bytes a frame) stay in memory.
+    """
+    def __init__(self, contact_threshold=None, max_frames=None, initial_capacity=1024, conditioning=None, layout=None, session_path=None):
+        self.layout = layout if layout is not None else get_layout()
+        self.cell_rows = self.layout.flat_rows.astype(np.int16); self.cell_cols = self.layout.flat_cols.astype(np.int16)
+        self.grid_index = self.layout.grid_index # Flat valid index -> row-major grid index
+        self.num_cells = self.layout.valid_count
+        self.conditioning = conditioning; self.max_frames = max_frames
+        self.contact_threshold = contact_threshold if contact_threshold is not None else (0 if conditioning is not None else 5)
+        self.dtype = np.float32 if conditioning is not None else np.uint16
+        capacity = max(1, min(initial_capacity, 2 * max_frames) if max_frames else initial_capacity)
+        self.session_path = session_path; self._writer = None; self._session = None; self._last_frame = None
+        if session_path is not None:
+            if max_frames: raise ValueError("A disk-backed HardwareFrameProcessor keeps every frame; max_frames does not apply")
+            self._writer = SessionWriter(session_path, list(zip(self.cell_rows.tolist(), self.cell_cols.tolist())), kind='sensor_layout', layout_name=self.layout.name)
+        self._frames = np.zeros((capacity if self._writer is None else 0, self.num_cells), dtype=self.dtype) # Unused when disk-backed
+        self._stats = np.zeros(capacity, dtype=FRAME_STATS_DTYPE)
+        self.num_frames = 0; self.frames_dropped = 0; self.frames_missed = 0
+        self._source_seq = 0
+
+    @property
+    def frames(self):
+        if self._writer is None: return self._frames[:self.num_frames]
+        if self._session is None or len(self._session) < self.num_frames: # Map the rows appended since the last access
+            self._writer.flush()
+            if self._session is None: self._session = SessionFile(self.session_path)
+            else: self._session.refresh()
+        return self._session.forces[:self.num_frames] # float32, whatever self.dtype is
+    @property
+    def stats(self): return self._stats[:self.num_frames]
+    @property
+    def timestamps(self): return self._stats['timestamp'][:self.num_frames]
+    @property
+    def latest_frame(self):
+        if not self.num_frames: return None
+        return self._last_frame if self._writer is not None else self._frames[self.num_frames - 1]
+
+    def frame_stats(self, frames):
+        """Vectorized statistics for an (n, valid_cells) block of frames as a FRAME_STATS_DTYPE array."""
+        frames = np.asarray(frames); forces = frames.astype(np.float32)
+        stats = np.zeros(len(frames), dtype=FRAME_STATS_DTYPE)
+        total = forces.sum(axis=1, dtype=np.float64)
+        stats['total'] = total; stats['max'] = forces.max(axis=1) if frames.shape[1] else 0
+        stats['contact_area'] = np.count_nonzero(frames > self.contact_threshold, axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            stats['centroid_row'] = np.where(total > 0, forces @ self.cell_rows.astype(np.float32) / total, np.nan)
+            stats['centroid_col'] = np.where(total > 0, forces @ self.cell_cols.astype(np.float32) / total, np.nan)
+        return stats
+
+    def append(self, frames, timestamps=None):
+        """Appends one frame or an (n, cells) block (valid-region or full-grid width); returns the batch's stats."""
+        frames = np.asarray(frames)
+        if frames.ndim == 1: frames = frames[None, :]
+        if frames.shape[1] == self.layout.frame_cells and self.num_cells != self.layout.frame_cells: frames = frames[:, self.grid_index]
+        elif frames.shape[1] != self.num_cells: raise ValueError(f"Expected frames of {self.num_cells} (or {self.layout.frame_cells}) cells, got {frames.shape[1]}")
+        timestamps = np.full(len(frames), time.monotonic()) if timestamps is None else np.asarray(timestamps, dtype=float).reshape(-1)
+        if self.conditioning is not None: frames = self.conditioning.process_block(frames) # Before trimming: the stages need every frame
+        if self.max_frames and len(frames) > self.max_frames: frames, timestamps = frames[-self.max_frames:], timestamps[-self.max_frames:]
+        if self._writer is not None and np.any(timestamps[1:] < timestamps[:-1]): # The writer sorts each batch; keep stats in file row order
+            order = np.argsort(timestamps, kind='stable'); frames, timestamps = frames[order], timestamps[order]
+        stats = self.frame_stats(frames); stats['timestamp'] = timestamps
+        self._reserve(len(frames))
+        if self._writer is not None: self._writer.append(timestamps, frames); self._last_frame = frames[-1].copy()
+        else: self._frames[self.num_frames:self.num_frames + len(frames)] = frames
+        self._stats[self.num_frames:self.num_frames + len(frames)] = stats
+        self.num_frames += len(frames)
+        return stats
+
+    def _reserve(self, n):
+        capacity = len(self._stats)
+        if self.max_frames and self.num_frames + n > capacity and capacity >= 2 * self.max_frames: # Full window: drop the oldest frames
+            keep = self.max_frames - n; drop = self.num_frames - keep
+            self._frames[:keep] = self._frames[drop:self.num_frames]; self._stats[:keep] = self._stats[drop:self.num_frames]
+            self.num_frames = keep; self.frames_dropped += drop
+            return
+        if self.num_frames + n <= capacity: return
+        capacity = max(self.num_frames + n, 2 * capacity)
+        if self.max_frames: capacity = min(capacity, max(2 * self.max_frames, self.num_frames + n))
+        stats = np.zeros(capacity, dtype=FRAME_STATS_DTYPE); stats[:self.num_frames] = self._stats[:self.num_frames]; self._stats = stats
+        if self._writer is not None: return
+        frames = np.zeros((capacity, self.num_cells), dtype=self.dtype); frames[:self.num_frames] = self._frames[:self.num_frames]; self._frames = frames
+
+    def poll(self, source):
+        """Appends frames published since the last poll by `source` (a started HardwareFrameSimulator or a binary-mode SensorDataReader)."""
+        records, self._source_seq, missed = source.get_since(self._source_seq)
+        if missed: self.frames_missed += missed; logging.warning(f"Hardware frame ring overrun: {missed} frames lost between polls.")
+        if not len(records): return 0
+        if 'cells' not in records.dtype.names: logging.error("poll() needs a frame source; got sample records."); return 0
+        self.append(records['cells'], records['timestamp'])
+        return len(records)
+
+    def nearest_index(self, timestamp):
+        ts = self.timestamps
+        if not len(ts): return None
+        i = int(np.searchsorted(ts, timestamp, side='left'))
+        if i == len(ts) or (i > 0 and timestamp - ts[i - 1] <= ts[i] - timestamp): return i - 1
+        return i
+
+    def close(self):
+        """Finishes a disk-backed recording (header summary written, file closed); frames stay readable."""
+        if self._writer is None: return
+        self._writer.close(); self._session = SessionFile(self.session_path)
+
+    def to_grid(self, frame, fill=0):
+        """(layout.rows, layout.cols) grid of a flat valid-region frame, `fill` outside the valid region."""
+        return self.layout.scatter(frame, fill)
+# --- END OF FILE hardware_processing.py ---
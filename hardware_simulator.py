@@ -0,0 +1,129 @@
+# --- START OF FILE hardware_simulator.py ---
+import time
+import threading
+import logging
+import numpy as np
+from sensor_layouts import get_layout
+from ring_buffer import RingBuffer
+from frame_protocol import frame_dtype
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+class HardwareFrameSimulator:
+    """Synthetic hardware frames over the valid region of a sensor layout (default: the 44x52 arch), for load testing.
+
+    Contacts are Gaussian blobs that drift (bouncing inside the grid) and go through bite cycles of
+    onset, hold and release. On top come Gaussian sensor noise and a few stuck cells, either dead at
+    0 or saturated. Frames are flat uint16 arrays in the same valid-cell order the hardware
+    visualizers use.
+
+    Exposes the hardware data-source interface MainAppWindow polls (running, connect, disconnect,
+    get_latest_raw_forces). Call start() to produce frames at `rate_hz` from a background thread,
+    or frames(n) to generate a batch directly.
+    """
+    def __init__(self, rate_hz=100.0, num_blobs=6, bite_period_s=1.6, noise_std=2.0, stuck_fraction=0.002,
+                 max_value=1000, seed=None, ring_capacity=1024, layout=None):
+        self.rate_hz = float(rate_hz); self.bite_period_s = bite_period_s
+        self.noise_std = noise_std; self.max_value = max_value
+        self.rng = np.random.default_rng(seed)
+
+        self.layout = layout if layout is not None else get_layout()
+        self.num_valid_sensors = self.layout.valid_count
+        self.cell_rows = self.layout.flat_rows.astype(np.float32); self.cell_cols = self.layout.flat_cols.astype(np.float32)
+
+        # Blob centers start on random valid cells and drift with constant velocity (cells/s)
+        start = self.rng.choice(self.num_valid_sensors, num_blobs, replace=False)
+        self.blob_origin = np.stack([self.cell_rows[start], self.cell_cols[start]], axis=1)
+        self.blob_velocity = self.rng.uniform(-3.0, 3.0, (num_blobs, 2)).astype(np.float32)
+        self.blob_sigma = self.rng.uniform(1.5, 3.5, num_blobs).astype(np.float32)
+        self.blob_amplitude = self.rng.uniform(0.3, 1.0, num_blobs).astype(np.float32) * max_value
+        self.blob_phase = self.rng.uniform(0, 0.15, num_blobs) # Contacts land almost, not exactly, together
+
+        n_stuck = int(round(stuck_fraction * self.num_valid_sensors))
+        self.stuck_idx = self.rng.choice(self.num_valid_sensors, n_stuck, replace=False)
+        self.stuck_values = self.rng.choice([0, max_value], n_stuck).astype(np.uint16)
+
+        self.frame_index = 0; self.frames_skipped = 0 # Frames the streaming thread dropped to catch up (seq and timestamps jump past them)
+        self.running = False
+        self.ring = RingBuffer(ring_capacity, frame_dtype(self.num_valid_sensors))
+        self._thread = None; self._stop = threading.Event()
+
+    def _bite_envelope(self, phase):
+        """0..1 force envelope over one bite cycle: onset, hold, release, open."""
+        onset = np.clip(phase / 0.2, 0, 1); release = np.clip((0.8 - phase) / 0.2, 0, 1)
+        env = np.minimum(onset, release)
+        return env * env * (3 - 2 * env) # smoothstep
+
+    def _bounce(self, pos, lo, hi):
+        span = hi - lo; p = np.mod(pos - lo, 2 * span)
+        return lo + np.where(p > span, 2 * span - p, p)
+
+    def frames(self, n):
+        """Generates the next `n` frames as an (n, num_valid_sensors) uint16 array."""
+        t = (self.frame_index + np.arange(n)) / self.rate_hz; self.frame_index += n
+        centers = self.blob_origin[None, :, :] + self.blob_velocity[None, :, :] * t[:, None, None].astype(np.float32)
+        center_r = self._bounce(centers[..., 0], 0, self.layout.rows - 1); center_c = self._bounce(centers[..., 1], 0, self.layout.cols - 1)
+        intensity = self.blob_amplitude[None, :] * self._bite_envelope(np.mod(t[:, None] / self.bite_period_s + self.blob_phase[None, :], 1.0))
+        d2 = (self.cell_rows[None, None, :] - center_r[..., None]) ** 2 + (self.cell_cols[None, None, :] - center_c[..., None]) ** 2
+        frame = np.einsum('nb,nbv->nv', intensity.astype(np.float32), np.exp(-d2 / (2 * self.blob_sigma[None, :, None] ** 2)))
+        frame += self.rng.normal(0, self.noise_std, frame.shape).astype(np.float32)
+        np.clip(frame, 0, self.max_value, out=frame)
+        frame = frame.astype(np.uint16)
+        frame[:, self.stuck_idx] = self.stuck_values
+        return frame
+
+    # --- Hardware data-source interface ---
+    def connect(self): self.running = True; return True
+    def disconnect(self): self.stop(); self.running = False
+
+    def get_latest_raw_forces(self):
+        if self._thread is not None:
+            latest = self.ring.get_latest(1)
+            return latest['cells'][0] if len(latest) else None
+        return self.frames(1)[0] # Not streaming: every poll advances one frame
+
+    def get_since(self, seq): return self.ring.get_since(seq)
+
+    def start(self):
+        """Produces frames at rate_hz into `ring` from a background thread."""
+        if self._thread is not None: return self
+        self.running = True; self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="HardwareFrameSimulator", daemon=True); self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None: self._thread.join(2.0); self._thread = None
+
+    def _run(self):
+        t0 = time.monotonic(); produced = 0
+        while not self._stop.is_set():
+            due = int((time.monotonic() - t0) * self.rate_hz) + 1 - produced # Catch up in one batch if behind
+            if due > self.ring.capacity: # Far behind (e.g. the process was suspended): frames beyond one ring would only be overwritten
+                skipped = due - self.ring.capacity; produced += skipped; self.frame_index += skipped; self.frames_skipped += skipped
+                logging.warning(f"Frame simulator {skipped} frames behind; skipped ahead to the last {self.ring.capacity}.")
+                due = self.ring.capacity
+            if due > 0:
+                block = self.frames(due)
+                records = np.empty(due, dtype=self.ring.dtype)
+                records['seq'] = np.arange(produced, produced + due); records['timestamp'] = (produced + np.arange(due)) / self.rate_hz
+                records['cells'] = block
+                self.ring.push(records); produced += due
+            time.sleep(max(0.0, t0 + produced / self.rate_hz - time.monotonic()))
+
+    def full_grid_frame(self, valid_values):
+        """Scatters a flat valid-region frame onto the full row-major layout grid (zeros outside), e.g. for FakeFrameDevice."""
+        return self.layout.scatter(np.asarray(valid_values, dtype=np.uint16)).ravel()
+
+    def device_frame_source(self):
+        """frame_source callable for fake_serial_device.FakeFrameDevice streaming this simulator over the binary protocol."""
+        return lambda seq: self.full_grid_frame(self.frames(1)[0])
+
+if __name__ == '__main__':
+    sim = HardwareFrameSimulator(seed=0)
+    sim.frames(10) # warm-up
+    n, batch = 5000, 250; t_start = time.perf_counter()
+    for _ in range(n // batch): sim.frames(batch)
+    elapsed = time.perf_counter() - t_start
+    logging.info(f"Generated {n} frames of {sim.num_valid_sensors} cells in {elapsed:.3f}s ({n / elapsed:.0f} frames/s)")
+# --- END OF FILE hardware_simulator.py ---
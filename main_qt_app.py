@@ -20,6 +20,10 @@ from graph_visualization_qt import GraphVisualizerQt
 from points_array import PointsArray # Import for potential direct use or reference
 from hardware_grid_visualizer_qt import HardwareGridVisualizerQt # New visualizer
 from hardware_3d_bar_visualizer_qt import Hardware3DBarVisualizerQt # New 3D bar from HW data
+from hardware_simulator import HardwareFrameSimulator
+from hardware_processing import HardwareFrameProcessor
+from signal_conditioning import default_pipeline
+from contact_regions import ContactRegionTracker
 
 from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.figure import Figure
@@ -69,7 +73,7 @@ class EmbeddedVedoMultiViewWidget(QWidget):
                  HardwareGridVisualizerClass, # Assuming this is the first Vedo visualizer
                  Hw3DBarVisualizerClass,          # Assuming this is the second Vedo visualizer
                  parent_main_window,          # Changed from parent=None
-                 plotter_kwargs=None):
+                 plotter_kwargs=None, layout=None): # layout: sensor_layouts.SensorLayout of the hardware views
         super().__init__(parent_main_window) # Pass parent to QWidget
         if plotter_kwargs is None: plotter_kwargs = {}
 
@@ -95,8 +99,8 @@ class EmbeddedVedoMultiViewWidget(QWidget):
             logging.error("Failed to create main Vedo Plotter with 2 sub-renderers."); return
 
         # Pass the main plotter and renderer index to visualizers
-        self.grid_visualizer = HardwareGridVisualizerClass(processor_instance, self.main_plotter, 0)
-        self.bar_visualizer = Hw3DBarVisualizerClass(processor_instance, self.main_plotter, 1) # Use new class
+        self.grid_visualizer = HardwareGridVisualizerClass(processor_instance, self.main_plotter, 0, layout=layout)
+        self.bar_visualizer = Hw3DBarVisualizerClass(processor_instance, self.main_plotter, 1, layout=layout) # Use new class
         
         # Link MainAppWindow for callbacks
         if hasattr(self.grid_visualizer, 'set_main_app_window_ref'):
@@ -197,10 +201,16 @@ class MatplotlibCanvas(FigureCanvas): # ... (same as before) ...
         super().__init__(self.fig); self.setParent(parent)
 
 class MainAppWindow(QMainWindow):
-    def __init__(self, processor, hw_data_source=None): 
+    def __init__(self, processor, hw_data_source=None, sensor_reader=None, layout=None): 
         super().__init__()
         self.processor = processor
         self.hw_data_source = hw_data_source 
+        layout = layout if layout is not None else getattr(hw_data_source, 'layout', None) # Sensor geometry; default: the 44x52 arch
+        self.hw_processor = HardwareFrameProcessor(max_frames=6000, conditioning=default_pipeline(), layout=layout) # Last minute at 100 Hz, conditioned
+        self.region_tracker = ContactRegionTracker(threshold=self.hw_processor.contact_threshold, layout=self.hw_processor.layout) # Contact regions of every new hardware frame
+        self.sensor_reader = sensor_reader # SensorDataReader in continuous acquisition mode (optional)
+        self.sensor_seq = 0 # Next ring-buffer sequence number to poll from sensor_reader
+        self.latest_sensor_samples = None
         self.current_timestamp_idx = 0
         self.animation_timer = QTimer(self)
         self.is_animating = False
@@ -233,8 +243,11 @@ class MainAppWindow(QMainWindow):
             HardwareGridVisualizerQt, 
             Hardware3DBarVisualizerQt, # Use new class
             self, # Pass self (MainAppWindow) as parent_main_window
-            plotter_kwargs={'title': "Dental Force Views"}
+            plotter_kwargs={'title': "Dental Force Views"},
+            layout=self.hw_processor.layout # Views, processor and tracker share one compiled layout
         )
+        for hw_view in (self.vedo_multiview_widget.grid_visualizer, self.vedo_multiview_widget.bar_visualizer):
+            if hasattr(hw_view, 'contact_threshold'): hw_view.contact_threshold = self.hw_processor.contact_threshold # Frames arrive conditioned
         # Link MainAppWindow for callbacks from grid visualizer
         if hasattr(self.vedo_multiview_widget.grid_visualizer, 'set_main_app_window_ref'):
             self.vedo_multiview_widget.grid_visualizer.main_app_window_ref = self
@@ -254,7 +267,7 @@ class MainAppWindow(QMainWindow):
         self._setup_animation_timer()
         
         # Initial render of views
-        if self.processor.timestamps:
+        if self.processor.timestamps is not None and len(self.processor.timestamps):
             first_ts = self.processor.timestamps[0]; self.last_animated_timestamp = first_ts
             self.vedo_multiview_widget.update_views(first_ts, self.get_latest_hw_data_for_step(), 1) # Pass initial data
             if self.graph_visualizer.figure: self.graph_visualizer.figure.canvas.draw_idle() # Initial graph draw
@@ -263,11 +276,15 @@ class MainAppWindow(QMainWindow):
 
 
     def get_latest_hw_data_for_step(self): # Helper for animation_step
-        """Gets latest hardware data if source is available."""
+        """Feeds new hardware frames into hw_processor and region_tracker; returns the latest conditioned valid-region frame, or None."""
         if self.hw_data_source and self.hw_data_source.running:
-            if hasattr(self.hw_data_source, 'get_latest_raw_forces'):
-                return self.hw_data_source.get_latest_raw_forces()
-        return None
+            new_frames = 0
+            if hasattr(self.hw_data_source, 'get_since'): new_frames = self.hw_processor.poll(self.hw_data_source) # Every frame since the last step
+            elif hasattr(self.hw_data_source, 'get_latest_raw_forces'):
+                frame = self.hw_data_source.get_latest_raw_forces()
+                if frame is not None: self.hw_processor.append(frame); new_frames = 1
+            if new_frames: self.region_tracker.update_block(self.hw_processor.frames[-new_frames:], self.hw_processor.timestamps[-new_frames:]) # Every frame, so ids stay stable
+        return self.hw_processor.latest_frame
     
     def _initialize_video_writer(self): # ... (same as before) ...
         if self.video_writer is None:
@@ -310,7 +327,7 @@ class MainAppWindow(QMainWindow):
 
 
     def animation_step(self): 
-        if not self.processor.timestamps: self.toggle_animation(); return # Or use live time
+        if self.processor.timestamps is None or not len(self.processor.timestamps): self.toggle_animation(); return # Or use live time
         
         # --- Get Live Hardware Data ---
         latest_hardware_flat_data = None
@@ -318,15 +335,17 @@ class MainAppWindow(QMainWindow):
         sensitivity_from_ui = int(self.sens_combo.get()) if hasattr(self, 'sens_combo') else 1 # Get sensitivity
 
         if self.hw_data_source and self.hw_data_source.running:
-            latest_hardware_flat_data = self.hw_data_source.get_latest_raw_forces() # Assumes method in hw_data_source
+            latest_hardware_flat_data = self.get_latest_hw_data_for_step() # Typed frame from hw_processor (stats in hw_processor.stats)
             # The timestamp from hardware data might be more relevant if available,
             # otherwise, use animation timer's progression.
             # For now, we'll pass the flat data and use the QTimer's timestamp progression.
             # This needs a robust way to get a synchronized timestamp if data is truly live.
             # Let's assume for now the hardware gives data fast enough for each animation frame.
 
+        self.poll_sensor_reader()
+
         # Use animation timer's progression for timestamp if not using live hardware timestamps
-        if self.processor.timestamps: # Fallback to simulated/preloaded timestamps if no live data
+        if self.processor.timestamps is not None and len(self.processor.timestamps): # Fallback to simulated/preloaded timestamps if no live data
              current_sim_timestamp = self.processor.timestamps[self.current_timestamp_idx]
              self.last_animated_timestamp = current_sim_timestamp
         else:
@@ -351,7 +370,7 @@ class MainAppWindow(QMainWindow):
                 # self.video_writer.write(canvas)
                 pass # Ensure canvas is correctly composed
 
-        if self.processor.timestamps: # Only advance if using preloaded timestamps
+        if self.processor.timestamps is not None and len(self.processor.timestamps): # Only advance if using preloaded timestamps
             self.current_timestamp_idx = (self.current_timestamp_idx + 1) % len(self.processor.timestamps)
         logging.debug(f"Qt App Step: Time {self.last_animated_timestamp:.1f}s")
 
@@ -360,6 +379,16 @@ class MainAppWindow(QMainWindow):
     
 
 
+    def poll_sensor_reader(self):
+        """Non-blocking poll of the continuous acquisition ring buffer; never stalls the Qt event loop."""
+        if not self.sensor_reader or not self.sensor_reader.is_acquiring: return None
+        new_samples, self.sensor_seq, missed = self.sensor_reader.get_since(self.sensor_seq)
+        if missed: logging.warning(f"Sensor ring buffer overrun: {missed} samples lost between animation steps.")
+        if len(new_samples):
+            self.latest_sensor_samples = new_samples
+            if hasattr(self.processor, 'append'): self.processor.append(new_samples) # StreamingDataProcessor
+        return new_samples
+
     def _setup_animation_timer(self): self.animation_timer.timeout.connect(self.animation_step)
     
     def toggle_animation(self):
@@ -377,7 +406,7 @@ class MainAppWindow(QMainWindow):
             #     _main_app_window_instance_for_atexit = None # If MainAppWindow instance changes or script ends
         else:
             # --- STARTING or RESUMING ---
-            if not self.processor.timestamps or len(self.processor.timestamps) == 0:
+            if self.processor.timestamps is None or len(self.processor.timestamps) == 0:
                 logging.warning("No data to animate.")
                 self.is_animating = False # Ensure state is correct
                 self.play_pause_button.setText("Play Animation")
@@ -408,7 +437,7 @@ class MainAppWindow(QMainWindow):
         new_ids = [sel_tid] if sel_tid is not None else self.initial_graph_teeth
         if new_ids!=self.currently_graphed_tooth_ids or not self.graph_visualizer.lines:
             self.graph_visualizer.plot_tooth_lines(new_ids); self.currently_graphed_tooth_ids=new_ids
-            if self.processor.timestamps:
+            if self.processor.timestamps is not None and len(self.processor.timestamps):
                 curr_t = self.processor.timestamps[self.current_timestamp_idx]
                 self.graph_visualizer.update_graph_to_timestamp(curr_t,new_ids)
                 self.graph_visualizer.update_time_indicator(curr_t)
@@ -419,6 +448,7 @@ class MainAppWindow(QMainWindow):
 
     def closeEvent(self, event): # ... (same as before) ...
         logging.info("Main window closing..."); self.animation_timer.stop()
+        if self.hw_data_source and hasattr(self.hw_data_source, 'disconnect'): self.hw_data_source.disconnect()
         if hasattr(self, 'video_writer') and self.video_writer and self.video_writer.isOpened():
             logging.info("Releasing video writer from MainAppWindow closeEvent.")
             self.video_writer.release(); self.video_writer = None
@@ -449,34 +479,21 @@ if __name__ == '__main__':
     # For now, we'll still use simulated data via DataProcessor
     # In a real scenario, you'd initialize your HardwareDataReader here
     # and MainAppWindow would poll it.
-    sim_reader = SensorDataReader()
-    data = sim_reader.simulate_data(duration=10, num_teeth=16, num_sensor_points_per_tooth=4) # Keep this for now
-    processor = DataProcessor(data) # Processor still works on this DataFrame structure
-    processor.create_force_matrix() 
+    if len(sys.argv) > 1 and sys.argv[1].lower().endswith(('.tss', '.csv')): # Recorded session, memory-mapped (CSV is converted once)
+        processor = DataProcessor.from_session(sys.argv[1]) if sys.argv[1].lower().endswith('.tss') else DataProcessor.from_csv(sys.argv[1])
+    else:
+        sim_reader = SensorDataReader()
+        data = sim_reader.simulate_data(duration=10, num_teeth=16, num_sensor_points_per_tooth=4) # Keep this for now
+        processor = DataProcessor(data) # ColumnarSampleStore; the processor builds its DataFrame once, on create_force_matrix()
+        processor.create_force_matrix() 
     # In a true hardware setup, DataProcessor might be bypassed or adapted for the flat array.
 
-    # For testing the HardwareGridVisualizer, we need a way to feed it flat data.
-    # Let's create a dummy hw_data_source that just cycles through some data.
-    class DummyHWSource:
-        def __init__(self, num_valid_sensors):
-            self.num_valid_sensors = num_valid_sensors
-            self.running = True
-            self.iter = 0
-        def get_latest_raw_forces(self):
-            # Simulate changing data
-            self.iter +=1
-            return [(self.iter + i*10) % 1001 for i in range(self.num_valid_sensors)] # Simple cycling data
-        def connect(self): return True
-        def disconnect(self): self.running = False
-
-    # Calculate number of valid cells from PointsArray
-    pa = PointsArray()
-    num_valid_hw_cells = sum(1 for r in range(44) for c in range(52) if pa.is_valid(c,r))
-    
-    hw_data_source_for_app = DummyHWSource(num_valid_hw_cells)
+    # Feed the hardware views from the frame simulator: masked 44x52 frames with moving contact
+    # blobs, bite cycles, noise and stuck cells, produced at rate_hz from a background thread.
+    hw_data_source_for_app = HardwareFrameSimulator(rate_hz=100.0).start()
     # --- End Placeholder ---
 
-    if not processor.timestamps and not hw_data_source_for_app: # Check both
+    if (processor.timestamps is None or not len(processor.timestamps)) and not hw_data_source_for_app: # Check both
         logging.error("No data source. Exiting."); sys.exit(-1)
         
     main_window = MainAppWindow(processor, hw_data_source=hw_data_source_for_app) 
@@ -0,0 +1,124 @@
+# --- START OF FILE multi_sensor.py ---
+import time
+import logging
+import numpy as np
+from data_acquisition import SensorDataReader
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+def merged_dtype(source_dtype):
+    """Source record dtype plus the device index and the original device timestamp.
+
+    In merged output, 'timestamp' holds the common (host monotonic) clock.
+    """
+    return np.dtype([('device', 'u1'), ('device_timestamp', '<f8')] + [(name, source_dtype.fields[name][0]) for name in source_dtype.names])
+
+class DeviceClock:
+    """Linear device->host clock model: host = intercept + slope * (device - device_ref).
+
+    Fitted by least squares over (device timestamp, host arrival time) observations. Arrival times
+    only ever lag by a variable transport delay, so the fitted line is shifted down to the lower
+    envelope of the observations. That keeps read jitter from biasing the offset. drift = slope - 1.
+    """
+    def __init__(self):
+        self.device_ref = 0.0; self.slope = 1.0; self.intercept = None
+
+    @property
+    def drift(self): return self.slope - 1.0
+    @property
+    def fitted(self): return self.intercept is not None
+
+    def fit(self, observations):
+        if not observations: return
+        obs = np.asarray(observations, dtype=float); device, host = obs[:, 0], obs[:, 1]
+        self.device_ref = device[0]
+        if len(obs) >= 8 and np.ptp(device) > 0: self.slope, intercept = np.polyfit(device - self.device_ref, host, 1)
+        else: self.slope, intercept = 1.0, 0.0
+        self.intercept = intercept + np.min(host - (intercept + self.slope * (device - self.device_ref)))
+
+    def to_host(self, device_ts): return self.intercept + self.slope * (np.asarray(device_ts, dtype=float) - self.device_ref)
+
+class MultiSensorAcquisition:
+    """Concurrent acquisition from several sensor handles (one per arch or arch half) on separate ports.
+
+    Each port gets its own SensorDataReader and acquisition thread, so reads proceed in parallel.
+    poll() drains every ring buffer, maps device timestamps onto the shared host clock and k-way
+    merges the per-device runs into one time-ordered record array. Records are emitted only up to
+    the watermark, the oldest 'latest timestamp' among devices that are still live, so a record can
+    never arrive after a later one was emitted. Devices silent for more than `stall_timeout`
+    seconds stop holding the watermark back. Clocks are refitted at most every `refit_interval`
+    seconds, and released timestamps are clamped to be non-decreasing, so a refit that moves a
+    device's offset can never make merged output step backwards (`clamped` counts such records).
+    In binary protocol mode the merged records' 'cells' field is the (N, cells) frame tensor.
+    """
+    def __init__(self, ports, stall_timeout=0.5, refit_interval=1.0, **reader_kwargs):
+        self.readers = [SensorDataReader(port=port, **reader_kwargs) for port in ports]
+        self.clocks = [DeviceClock() for _ in ports]
+        self.stall_timeout = stall_timeout; self.refit_interval = refit_interval
+        self._last_fit = [None] * len(ports); self._last_released = -np.inf; self.clamped = 0
+        self.dtype = merged_dtype(self.readers[0].ring.dtype)
+        self._seqs = [0] * len(ports); self.missed = [0] * len(ports)
+        self._pending = [np.empty(0, dtype=self.dtype) for _ in ports]
+        self._unmapped = [[] for _ in ports] # Raw ring records drained before the device clock could be fitted
+        self._latest_ts = [None] * len(ports); self._last_arrival = [None] * len(ports)
+        self._first_poll = None
+
+    def connect(self):
+        for reader in self.readers: reader.connect()
+        return all(reader.is_connected for reader in self.readers)
+
+    def start(self): return all(reader.start_acquisition() for reader in self.readers)
+    def stop(self):
+        for reader in self.readers: reader.stop_acquisition()
+    def close(self):
+        for reader in self.readers: reader.close()
+
+    def _drain(self, device):
+        reader = self.readers[device]
+        records, self._seqs[device], missed = reader.get_since(self._seqs[device])
+        if missed: self.missed[device] += missed; logging.warning(f"Device {device} ({reader.port}): {missed} records lost to ring overrun.")
+        if len(records): self._unmapped[device].append(records)
+        if not self._unmapped[device]: return
+        clock = self.clocks[device]; now = time.monotonic()
+        if self._last_fit[device] is None or now - self._last_fit[device] >= self.refit_interval:
+            clock.fit(list(reader.clock_observations))
+            if clock.fitted: self._last_fit[device] = now
+        if not clock.fitted: return # Kept in _unmapped until the first fit
+        records = np.concatenate(self._unmapped[device]) if len(self._unmapped[device]) > 1 else self._unmapped[device][0]
+        self._unmapped[device] = []
+        merged = np.empty(len(records), dtype=self.dtype)
+        for name in records.dtype.names: merged[name] = records[name]
+        merged['device'] = device; merged['device_timestamp'] = records['timestamp']
+        merged['timestamp'] = clock.to_host(records['timestamp'])
+        self._pending[device] = np.concatenate((self._pending[device], merged)) if len(self._pending[device]) else merged
+        self._latest_ts[device] = merged['timestamp'][-1]; self._last_arrival[device] = time.monotonic()
+
+    def poll(self, flush=False):
+        """Returns newly mergeable records in common-clock order (everything pending if flush=True)."""
+        for device in range(len(self.readers)): self._drain(device)
+        now = time.monotonic()
+        if self._first_poll is None: self._first_poll = now
+        holding = []
+        for latest, arrived in zip(self._latest_ts, self._last_arrival):
+            if arrived is None: # No data yet: hold everything back during the start-up grace period
+                if now - self._first_poll <= self.stall_timeout and not flush: return np.empty(0, dtype=self.dtype)
+            elif now - arrived <= self.stall_timeout: holding.append(latest)
+        watermark = np.inf if flush or not holding else min(holding)
+        ready = []
+        for device, pending in enumerate(self._pending):
+            if not len(pending): continue
+            due = pending['timestamp'] <= watermark
+            if due.any(): ready.append(pending[due]); self._pending[device] = pending[~due]
+        if not ready: return np.empty(0, dtype=self.dtype)
+        merged = np.concatenate(ready)
+        merged = merged[np.argsort(merged['timestamp'], kind='stable')] # Stable sort merges the k sorted runs
+        behind = merged['timestamp'] < self._last_released # Only possible right after a refit moved a clock back
+        if behind.any(): self.clamped += int(behind.sum()); merged['timestamp'] = np.maximum(merged['timestamp'], self._last_released)
+        self._last_released = merged['timestamp'][-1]
+        return merged
+
+    def clock_report(self):
+        return [{'port': reader.port, 'fitted': clock.fitted, 'drift_ppm': float(clock.drift * 1e6),
+                 'offset_s': float(clock.to_host(clock.device_ref)) - clock.device_ref if clock.fitted else None}
+                for reader, clock in zip(self.readers, self.clocks)]
+# --- END OF FILE multi_sensor.py ---
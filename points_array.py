@@ -1,45 +1,34 @@
 # --- START OF FILE points_array.py ---
+from collections import namedtuple
+from sensor_layouts import get_layout
+
+Point = namedtuple('Point', ['Start', 'End']) # 1-indexed inclusive row range of valid cells in one column
+
 class PointsArray:
-    def __init__(self):
+    """Valid region of a hardware sensor grid, per column, backed by a compiled sensor_layouts.SensorLayout.
+
+    `layout` defaults to the default layout of sensor_layouts.json (the 44x52 dental arch). mask is the
+    (rows, cols) bool grid of valid cells and valid_count their number. Flat frames list the valid cells
+    row-major (the order the hardware visualizers draw them): flat_rows/flat_cols give each flat index's
+    (row, col), grid_index its row-major index into a full frame, and flat_index the flat index of each
+    grid cell (-1 outside the region). scatter() and gather() convert frames, or (n, ...) blocks of
+    frames, between the two layouts.
+    """
+    def __init__(self, layout=None):
+        self.layout = layout if layout is not None else get_layout()
         self.Points = {}
         self._init_points()
+        self.rows, self.cols = self.layout.rows, self.layout.cols
+        self.mask = self.layout.mask; self.valid_count = self.layout.valid_count
+        self.flat_rows = self.layout.flat_rows; self.flat_cols = self.layout.flat_cols
+        self.grid_index = self.layout.grid_index; self.flat_index = self.layout.flat_index
 
     def _init_points(self):
-        # Copied directly from your main.py
-        self.Points = {
-            0: type('Point', (), {'Start': 0, 'End': 0})(),
-            1: type('Point', (), {'Start': 1, 'End': 22})(), 2: type('Point', (), {'Start': 1, 'End': 24})(),
-            3: type('Point', (), {'Start': 1, 'End': 26})(), 4: type('Point', (), {'Start': 1, 'End': 28})(),
-            5: type('Point', (), {'Start': 1, 'End': 30})(), 6: type('Point', (), {'Start': 1, 'End': 32})(),
-            7: type('Point', (), {'Start': 1, 'End': 34})(), 8: type('Point', (), {'Start': 1, 'End': 36})(),
-            9: type('Point', (), {'Start': 1, 'End': 38})(), 10: type('Point', (), {'Start': 1, 'End': 40})(),
-            11: type('Point', (), {'Start': 1, 'End': 42})(), 12: type('Point', (), {'Start': 1, 'End': 44})(),
-            13: type('Point', (), {'Start': 1, 'End': 44})(), 14: type('Point', (), {'Start': 1, 'End': 44})(),
-            15: type('Point', (), {'Start': 1, 'End': 44})(), 16: type('Point', (), {'Start': 11, 'End': 44})(),
-            17: type('Point', (), {'Start': 15, 'End': 44})(), 18: type('Point', (), {'Start': 17, 'End': 44})(),
-            19: type('Point', (), {'Start': 20, 'End': 44})(), 20: type('Point', (), {'Start': 21, 'End': 44})(),
-            21: type('Point', (), {'Start': 23, 'End': 44})(), 22: type('Point', (), {'Start': 24, 'End': 44})(),
-            23: type('Point', (), {'Start': 24, 'End': 44})(), 24: type('Point', (), {'Start': 25, 'End': 44})(),
-            25: type('Point', (), {'Start': 25, 'End': 44})(), 26: type('Point', (), {'Start': 25, 'End': 44})(),
-            27: type('Point', (), {'Start': 25, 'End': 44})(), 28: type('Point', (), {'Start': 25, 'End': 44})(),
-            29: type('Point', (), {'Start': 25, 'End': 44})(), 30: type('Point', (), {'Start': 24, 'End': 44})(),
-            31: type('Point', (), {'Start': 24, 'End': 44})(), 32: type('Point', (), {'Start': 23, 'End': 44})(),
-            33: type('Point', (), {'Start': 21, 'End': 44})(), 34: type('Point', (), {'Start': 20, 'End': 44})(),
-            35: type('Point', (), {'Start': 17, 'End': 44})(), 36: type('Point', (), {'Start': 15, 'End': 44})(),
-            37: type('Point', (), {'Start': 11, 'End': 44})(), 38: type('Point', (), {'Start': 1, 'End': 44})(),
-            39: type('Point', (), {'Start': 1, 'End': 44})(), 40: type('Point', (), {'Start': 1, 'End': 44})(),
-            41: type('Point', (), {'Start': 1, 'End': 44})(), 42: type('Point', (), {'Start': 1, 'End': 42})(),
-            43: type('Point', (), {'Start': 1, 'End': 40})(), 44: type('Point', (), {'Start': 1, 'End': 38})(),
-            45: type('Point', (), {'Start': 1, 'End': 36})(), 46: type('Point', (), {'Start': 1, 'End': 34})(),
-            47: type('Point', (), {'Start': 1, 'End': 32})(), 48: type('Point', (), {'Start': 1, 'End': 30})(),
-            49: type('Point', (), {'Start': 1, 'End': 28})(), 50: type('Point', (), {'Start': 1, 'End': 26})(),
-            51: type('Point', (), {'Start': 1, 'End': 24})(), 52: type('Point', (), {'Start': 1, 'End': 22})()
-        }
+        self.Points = {col: Point(int(start), int(end)) for col, (start, end) in enumerate(self.layout.column_ranges)}
+
+    def is_valid(self, col, row): # col: 0..cols-1, row: 0..rows-1
+        return self.layout.is_valid(col, row)
 
-    def is_valid(self, col, row): # col: 0-51, row: 0-43
-        if col in self.Points:
-            point_range = self.Points[col]
-            # row is 0-indexed, Point Start/End are 1-indexed
-            return point_range.Start <= row + 1 <= point_range.End
-        return False
-# --- END OF FILE points_array.py ---
\ No newline at end of file
+    def scatter(self, flat_values, fill=0): return self.layout.scatter(flat_values, fill)
+    def gather(self, grid): return self.layout.gather(grid)
+# --- END OF FILE points_array.py ---
@@ -0,0 +1,71 @@
+# --- START OF FILE ring_buffer.py ---
+import numpy as np
+import logging
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# One decoded CSV sample: timestamp,tooth_id,sensor_point_id,force,contact_time
+SAMPLE_DTYPE = np.dtype([('timestamp', '<f8'), ('tooth_id', '<i2'), ('sensor_point_id', '<i2'),
+                         ('force', '<f4'), ('contact_time', '<f4')])
+
+class RingBuffer:
+    """Single-producer / multi-reader ring buffer over a preallocated NumPy array.
+
+    Only the acquisition thread calls push(). It fills the slots first and publishes the new
+    write_seq afterwards, so readers never take a lock: they snapshot write_seq, copy the slots
+    and re-check write_seq to drop whatever the writer may have overwritten during the copy.
+    """
+    def __init__(self, capacity=65536, dtype=SAMPLE_DTYPE):
+        self.capacity = int(capacity)
+        if self.capacity < 8: raise ValueError("RingBuffer capacity must be >= 8")
+        self.buffer = np.zeros(self.capacity, dtype=dtype)
+        self.dtype = self.buffer.dtype
+        # A single push never writes more than max_push slots, so readers only have to
+        # distrust the oldest max_push records of the window when checking for overruns.
+        self.max_push = max(1, self.capacity // 4)
+        self.write_seq = 0 # Total records ever pushed; the only field shared with readers
+
+    def __len__(self): return min(self.write_seq, self.capacity)
+
+    def push(self, records):
+        records = np.asarray(records, dtype=self.dtype)
+        for start in range(0, len(records), self.max_push):
+            self._push_chunk(records[start:start + self.max_push])
+        return self.write_seq
+
+    def _push_chunk(self, chunk):
+        n = len(chunk)
+        if n == 0: return
+        seq = self.write_seq; pos = seq % self.capacity
+        first = min(n, self.capacity - pos)
+        self.buffer[pos:pos + first] = chunk[:first]
+        if first < n: self.buffer[:n - first] = chunk[first:]
+        self.write_seq = seq + n # Publish only after the slots are written
+
+    def _copy_range(self, start_seq, end_seq):
+        n = end_seq - start_seq
+        if n <= 0: return np.empty(0, dtype=self.dtype)
+        pos = start_seq % self.capacity; first = min(n, self.capacity - pos)
+        if first == n: return self.buffer[pos:pos + n].copy()
+        return np.concatenate((self.buffer[pos:], self.buffer[:n - first]))
+
+    def get_since(self, seq):
+        """Returns (records, next_seq, missed) for everything pushed since `seq`.
+
+        `missed` counts records that were overwritten before this reader got to them.
+        """
+        end_seq = self.write_seq
+        start_seq = max(int(seq), end_seq - self.capacity + self.max_push, 0)
+        if start_seq >= end_seq: return np.empty(0, dtype=self.dtype), max(int(seq), end_seq), max(0, start_seq - int(seq))
+        records = self._copy_range(start_seq, end_seq)
+        oldest_safe = self.write_seq - self.capacity + self.max_push # Re-check after the copy
+        if oldest_safe > start_seq:
+            records = records[oldest_safe - start_seq:]; start_seq = oldest_safe
+        return records, max(end_seq, start_seq), max(0, start_seq - int(seq))
+
+    def get_latest(self, n=1):
+        """Returns a copy of the newest `n` records (fewer if not that many are available)."""
+        end_seq = self.write_seq
+        records, _, _ = self.get_since(max(0, end_seq - int(n)))
+        return records
+# --- END OF FILE ring_buffer.py ---
@@ -0,0 +1,63 @@
+# --- START OF FILE sample_store.py ---
+import numpy as np
+import pandas as pd
+import logging
+from ring_buffer import SAMPLE_DTYPE
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+class ColumnarSampleStore:
+    """Append-optimized columnar store for sensor samples.
+
+    Each column lives in fixed-size typed NumPy chunks (timestamp float64, tooth_id/sensor_point_id
+    int16, force/contact_time float32). Appends copy into the active chunk and seal it when full, so
+    the cost is amortized O(1) per row and old data is never copied again. The DataFrame view that
+    DataProcessor consumes is built on demand and cached until the next append.
+    """
+    COLUMNS = SAMPLE_DTYPE.names
+
+    def __init__(self, chunk_size=65536):
+        self.chunk_size = int(chunk_size)
+        self._sealed = {name: [] for name in self.COLUMNS}
+        self._active = {name: np.empty(self.chunk_size, dtype=SAMPLE_DTYPE[name]) for name in self.COLUMNS}
+        self._active_len = 0; self._sealed_len = 0
+        self._frame_cache = None
+
+    def __len__(self): return self._sealed_len + self._active_len
+    @property
+    def empty(self): return len(self) == 0
+    @property
+    def columns(self): return list(self.COLUMNS)
+
+    def append(self, records):
+        """Appends a SAMPLE_DTYPE array, a DataFrame or a dict of equal-length columns."""
+        n = len(records[self.COLUMNS[0]]) if len(records) else 0
+        if n == 0: return
+        columns = {name: np.asarray(records[name]) for name in self.COLUMNS}
+        done = 0
+        while done < n:
+            take = min(n - done, self.chunk_size - self._active_len)
+            for name in self.COLUMNS: self._active[name][self._active_len:self._active_len + take] = columns[name][done:done + take]
+            self._active_len += take; done += take
+            if self._active_len == self.chunk_size: self._seal_active()
+        self._frame_cache = None
+
+    def _seal_active(self):
+        for name in self.COLUMNS:
+            self._sealed[name].append(self._active[name])
+            self._active[name] = np.empty(self.chunk_size, dtype=SAMPLE_DTYPE[name])
+        self._sealed_len += self._active_len; self._active_len = 0
+
+    def column(self, name):
+        """Contiguous copy of one column across all chunks."""
+        parts = self._sealed[name] + [self._active[name][:self._active_len]]
+        return np.concatenate(parts) if len(parts) > 1 else parts[0].copy()
+
+    def to_dataframe(self):
+        if self._frame_cache is None:
+            self._frame_cache = pd.DataFrame({name: self.column(name) for name in self.COLUMNS})
+        return self._frame_cache
+
+    def clear(self):
+        self.__init__(self.chunk_size)
+# --- END OF FILE sample_store.py ---
@@ -0,0 +1,103 @@
+# --- START OF FILE sensor_layouts.py ---
+import os
+import json
+import hashlib
+import logging
+import numpy as np
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Sensor geometries are declared in a JSON file: {"default": name, "layouts": {name: spec}} where a spec
+# has "rows", "cols" and optionally "column_ranges", one 1-indexed inclusive [start, end] row range of
+# valid cells per column ([0, 0] for an empty column; no column_ranges means every cell is valid).
+# Each layout is compiled once into mask and index arrays, cached in memory and on disk as .npz files
+# keyed by the layout file's SHA-256, so an edited file is recompiled and an unchanged one never is.
+DEFAULT_LAYOUT_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sensor_layouts.json')
+LAYOUT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.layout_cache')
+LAYOUT_ARRAYS = ('column_ranges', 'mask', 'flat_rows', 'flat_cols', 'grid_index', 'flat_index')
+
+_layout_files = {} # abspath -> ((mtime_ns, size), digest, document)
+_layouts = {} # (digest, name) -> SensorLayout
+
+class SensorLayout:
+    """Compiled sensor geometry: a (rows, cols) valid-cell mask and the flat-index maps derived from it.
+
+    Flat frames list the valid cells row-major. flat_rows/flat_cols give each flat index's (row, col),
+    grid_index its row-major index into a full rows * cols frame, and flat_index the flat index of each
+    grid cell (-1 outside the layout). Arrays are read-only and shared by every user of the layout.
+    """
+    def __init__(self, name, arrays, digest=None):
+        self.name = name; self.digest = digest
+        for key in LAYOUT_ARRAYS:
+            value = np.asarray(arrays[key]); value.setflags(write=False); setattr(self, key, value)
+        self.rows, self.cols = self.mask.shape
+        self.frame_cells = self.rows * self.cols
+        self.valid_count = len(self.grid_index)
+
+    def __repr__(self): return f"SensorLayout('{self.name}', {self.rows}x{self.cols}, {self.valid_count} valid cells)"
+
+    def is_valid(self, col, row): return 0 <= row < self.rows and 0 <= col < self.cols and bool(self.mask[row, col])
+
+    def scatter(self, flat_values, fill=0):
+        """(..., valid_count) flat values -> (..., rows, cols) grids, `fill` outside the valid region."""
+        flat_values = np.asarray(flat_values)
+        grid = np.full(flat_values.shape[:-1] + (self.frame_cells,), fill, dtype=np.result_type(flat_values.dtype, np.min_scalar_type(fill)))
+        grid[..., self.grid_index] = flat_values
+        return grid.reshape(flat_values.shape[:-1] + (self.rows, self.cols))
+
+    def gather(self, grid):
+        """(..., rows, cols) grids, or (..., rows * cols) full frames -> (..., valid_count) flat values."""
+        grid = np.asarray(grid)
+        if grid.shape[-2:] == (self.rows, self.cols): grid = grid.reshape(grid.shape[:-2] + (self.frame_cells,))
+        return grid[..., self.grid_index]
+
+def compile_layout(spec):
+    """Mask and index arrays (LAYOUT_ARRAYS) for one declarative layout spec."""
+    rows, cols = int(spec['rows']), int(spec['cols'])
+    ranges = np.array(spec.get('column_ranges', [[1, rows]] * cols), dtype=np.int32).reshape(-1, 2)
+    if len(ranges) != cols: raise ValueError(f"column_ranges has {len(ranges)} entries for {cols} columns")
+    row_1based = np.arange(1, rows + 1)[:, None]
+    mask = (ranges[None, :, 0] <= row_1based) & (row_1based <= ranges[None, :, 1])
+    flat_rows, flat_cols = np.nonzero(mask) # Row-major, so already in flat order
+    flat_index = np.full((rows, cols), -1, dtype=np.intp); flat_index[mask] = np.arange(len(flat_rows))
+    return {'column_ranges': ranges, 'mask': mask, 'flat_rows': flat_rows, 'flat_cols': flat_cols,
+            'grid_index': np.flatnonzero(mask), 'flat_index': flat_index}
+
+def load_layout_file(path=None):
+    """(digest, document) of a layout file, re-read only when its mtime or size changes."""
+    path = os.path.abspath(path or DEFAULT_LAYOUT_FILE)
+    st = os.stat(path); stamp = (st.st_mtime_ns, st.st_size)
+    cached = _layout_files.get(path)
+    if cached is not None and cached[0] == stamp: return cached[1], cached[2]
+    with open(path, 'rb') as f: raw = f.read()
+    digest = hashlib.sha256(raw).hexdigest(); document = json.loads(raw)
+    _layout_files[path] = (stamp, digest, document)
+    return digest, document
+
+def available_layouts(path=None):
+    return list(load_layout_file(path)[1]['layouts'])
+
+def get_layout(name=None, path=None, cache_dir=LAYOUT_CACHE_DIR):
+    """Compiled SensorLayout `name` (the file's default if None): from memory, else the disk cache, else compiled and cached."""
+    digest, document = load_layout_file(path)
+    name = name or document.get('default') or next(iter(document['layouts']))
+    layout = _layouts.get((digest, name))
+    if layout is not None: return layout
+    if name not in document['layouts']: raise KeyError(f"Unknown sensor layout '{name}' (available: {', '.join(document['layouts'])})")
+    cache_path = os.path.join(cache_dir, f"{name}-{digest[:16]}.npz") if cache_dir else None
+    arrays = None
+    if cache_path and os.path.exists(cache_path):
+        try:
+            with np.load(cache_path, allow_pickle=False) as npz: arrays = {key: npz[key] for key in LAYOUT_ARRAYS}
+        except (OSError, KeyError, ValueError) as e: logging.warning(f"Ignoring unreadable layout cache {cache_path}: {e}")
+    if arrays is None:
+        arrays = compile_layout(document['layouts'][name])
+        if cache_path:
+            try:
+                os.makedirs(cache_dir, exist_ok=True)
+                tmp_path = f"{cache_path}.{os.getpid()}.tmp.npz"; np.savez(tmp_path, **arrays); os.replace(tmp_path, cache_path)
+            except OSError as e: logging.warning(f"Could not write layout cache {cache_path}: {e}")
+        logging.info(f"Compiled sensor layout '{name}' ({int(np.count_nonzero(arrays['mask']))} valid cells)")
+    layout = _layouts[(digest, name)] = SensorLayout(name, arrays, digest)
+    return layout
+# --- END OF FILE sensor_layouts.py ---
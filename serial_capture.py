@@ -0,0 +1,69 @@
+# --- START OF FILE serial_capture.py ---
+import time
+import struct
+import logging
+from fake_serial_device import PtyFakeDevice
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Raw serial capture (.tcap): magic b'TSCNCAP1', then one record per serial read:
+#   arrival_time float64 (time.monotonic() seconds), length uint32, then `length` raw bytes.
+CAPTURE_MAGIC = b'TSCNCAP1'
+CAPTURE_EXTENSION = '.tcap'
+_RECORD = struct.Struct('<dI')
+
+class CaptureWriter:
+    """Tees raw serial bytes with their arrival timestamps into a capture file."""
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'wb'); self._file.write(CAPTURE_MAGIC)
+        self.bytes_captured = 0; self.records = 0
+
+    def write(self, data, arrival_time=None):
+        if not data or self._file is None: return
+        self._file.write(_RECORD.pack(time.monotonic() if arrival_time is None else arrival_time, len(data)))
+        self._file.write(data); self.bytes_captured += len(data); self.records += 1
+
+    def close(self):
+        if self._file is None: return
+        self._file.close(); self._file = None
+        logging.info(f"Serial capture {self.path} closed: {self.records} reads, {self.bytes_captured} bytes.")
+
+def iter_capture(path):
+    """Yields (arrival_time, bytes) records from a capture file."""
+    with open(path, 'rb') as f:
+        if f.read(len(CAPTURE_MAGIC)) != CAPTURE_MAGIC: raise ValueError(f"{path} is not a serial capture file")
+        while True:
+            head = f.read(_RECORD.size)
+            if len(head) < _RECORD.size: return
+            arrival_time, length = _RECORD.unpack(head)
+            data = f.read(length)
+            if len(data) < length: logging.warning(f"Truncated record at end of {path}"); return
+            yield arrival_time, data
+
+class ReplaySource(PtyFakeDevice):
+    """Replays a capture through a pseudo-terminal, preserving the original read chunking.
+
+    speed=1.0 reproduces the recorded timing, speed=N plays N times faster and speed=None
+    writes as fast as the reader drains the pty. Point SensorDataReader(port=replay.port) at it.
+    """
+    def __init__(self, capture_path, speed=1.0, loop=False):
+        super().__init__()
+        self.capture_path = capture_path; self.speed = speed; self.loop = loop
+        self._records = iter_capture(capture_path)
+        self._t_rec0 = None; self._t_wall0 = None
+        self.replayed_records = 0
+
+    def next_chunk(self):
+        try: arrival_time, data = next(self._records)
+        except StopIteration:
+            if not self.loop: return None
+            self._records = iter_capture(self.capture_path); self._t_rec0 = None
+            return b''
+        if self._t_rec0 is None: self._t_rec0 = arrival_time; self._t_wall0 = time.monotonic()
+        if self.speed:
+            delay = self._t_wall0 + (arrival_time - self._t_rec0) / self.speed - time.monotonic()
+            if delay > 0: time.sleep(delay)
+        self.replayed_records += 1
+        return data
+# --- END OF FILE serial_capture.py ---
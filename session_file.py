@@ -0,0 +1,241 @@
+# --- START OF FILE session_file.py ---
+import os
+import json
+import struct
+import shutil
+import logging
+import numpy as np
+import pandas as pd
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Native session file (.tss):
+#   magic        8 bytes  b'TSCNSES2'
+#   header_size  uint32   size of the JSON header region that follows (space padded, rewritten in place)
+#   header       JSON     schema, sensor layout, time-index summary and the offsets of the two blocks below
+#   timestamps   float64[capacity], little-endian, page aligned: the time index, first n_rows entries valid
+#   forces       float32[n_rows, n_columns], little-endian, row-major, NaN = no sample, up to the end of the file
+# The time index is one contiguous block, so searching it only touches timestamps, and force rows are
+# contiguous, so any row range is a zero-copy slice of the map. The force rows run to the end of the
+# file, so the row count always follows from the file size; a row's timestamp is written before the row
+# itself. That lets readers memory-map a file that is still being appended to. When the timestamp block
+# is full the writer rewrites the file with twice the capacity (new inode; readers remap on refresh()).
+SESSION_MAGIC = b'TSCNSES2'
+SESSION_EXTENSION = '.tss'
+SESSION_VERSION = 2
+_PREAMBLE = struct.Struct('<8sI')
+_PAGE = 4096
+_MIN_CAPACITY = 65536 # Rows of timestamp block reserved by a new session (512 KiB)
+
+class SessionWriter:
+    """Writes (or continues) a session file. append() may be called while readers have it mapped.
+
+    Each appended batch is sorted by timestamp before it is written. A batch starting before the
+    previous batch's last timestamp marks the session non-monotonic (readers then slice by mask).
+    `kind` names what the columns are: 'tooth_sensor_pairs' ((tooth_id, sensor_point_id) pairs) or
+    'sensor_layout' ((row, col) grid cells of the sensor layout named `layout_name`).
+    """
+    def __init__(self, path, pairs=None, mode='w', capacity=None, kind='tooth_sensor_pairs', layout_name=None):
+        self.path = path
+        if mode == 'a' and os.path.exists(path):
+            header, _, _ = _read_header(path)
+            self.pairs = [tuple(p) for p in header['layout']['pairs']]
+            self.kind = header['layout']['kind']; self.layout_name = header['layout'].get('name')
+            self.max_force = header.get('max_force', 0.0)
+            self._set_layout(header)
+            self._file = open(path, 'r+b')
+            self.num_rows = min(self.capacity, max(0, os.path.getsize(path) - self.forces_offset) // self.row_size) # Trust the size over the header
+            self._file.truncate(self.forces_offset + self.num_rows * self.row_size); self._file.seek(0, os.SEEK_END)
+            ts = np.fromfile(path, dtype='<f8', count=self.num_rows, offset=self.ts_offset)
+            self.t_first = float(ts[0]) if len(ts) else None; self.t_last = float(ts[-1]) if len(ts) else None
+            self.monotonic = not np.any(ts[1:] < ts[:-1])
+        else:
+            if not pairs: raise ValueError("SessionWriter needs the ordered (tooth_id, sensor_point_id) pairs of a new session")
+            self.pairs = [(int(t), int(s)) for t, s in pairs]
+            self.kind = kind; self.layout_name = layout_name
+            self.num_rows = 0; self.t_first = None; self.t_last = None; self.monotonic = True; self.max_force = 0.0
+            self._file = open(path, 'w+b'); self._write_layout(self._file, capacity or _MIN_CAPACITY)
+
+    def _set_layout(self, header):
+        ti = header['time_index']
+        self.row_size = 4 * len(self.pairs); self.capacity = ti['capacity']
+        self.ts_offset = ti['offset']; self.forces_offset = header['forces_offset']
+
+    def _write_layout(self, f, capacity):
+        """Writes preamble, header and an empty timestamp block of `capacity` rows to `f`, leaving it at the first force row."""
+        capacity = -(-max(capacity, 1) // 512) * 512 # 512 float64 per page, so the force rows start page aligned too
+        self.row_size = 4 * len(self.pairs); self.capacity = capacity; self.ts_offset = self.forces_offset = 0
+        header_room = len(json.dumps(self._header()).encode('utf-8')) + 1024 # Room for the header to grow in place
+        self.ts_offset = -(-(_PREAMBLE.size + header_room) // _PAGE) * _PAGE
+        self.forces_offset = self.ts_offset + 8 * capacity
+        f.seek(0); f.write(_PREAMBLE.pack(SESSION_MAGIC, self.ts_offset - _PREAMBLE.size))
+        f.write(json.dumps(self._header()).encode('utf-8').ljust(self.ts_offset - _PREAMBLE.size))
+        f.truncate(self.forces_offset); f.seek(self.forces_offset)
+
+    def _header(self):
+        return {'version': SESSION_VERSION,
+                'schema': {'timestamps': '<f8', 'forces': ['<f4', len(self.pairs)], 'missing': 'nan',
+                           'units': {'timestamp': 's', 'forces': 'N'}},
+                'layout': {'kind': self.kind, 'name': self.layout_name, 'pairs': [list(p) for p in self.pairs]},
+                'time_index': {'offset': self.ts_offset, 'capacity': self.capacity,
+                               'n_rows': self.num_rows, 't_first': self.t_first, 't_last': self.t_last, 'monotonic': self.monotonic},
+                'forces_offset': self.forces_offset,
+                'max_force': float(self.max_force)}
+
+    def append(self, timestamps, forces):
+        timestamps = np.asarray(timestamps, dtype='<f8').reshape(-1); forces = np.asarray(forces)
+        if forces.ndim == 1: forces = forces[None, :]
+        if len(timestamps) == 0: return
+        if np.any(timestamps[1:] < timestamps[:-1]): # Sorted on write, so a single-batch session is always monotonic
+            order = np.argsort(timestamps, kind='stable'); timestamps = timestamps[order]; forces = forces[order]
+        if self.num_rows + len(timestamps) > self.capacity: self._grow(self.num_rows + len(timestamps))
+        self._file.seek(self.ts_offset + 8 * self.num_rows); self._file.write(timestamps.tobytes()) # Before the rows it indexes
+        self._file.seek(0, os.SEEK_END); self._file.write(np.ascontiguousarray(forces, dtype='<f4').tobytes())
+        if self.t_first is None: self.t_first = float(timestamps[0])
+        if self.t_last is not None and timestamps[0] < self.t_last: self.monotonic = False
+        self.t_last = float(timestamps[-1]); self.num_rows += len(timestamps)
+        finite_max = np.nanmax(forces) if np.isfinite(forces).any() else 0.0
+        self.max_force = max(self.max_force, float(finite_max))
+
+    def _grow(self, min_rows):
+        """Rewrites the file with a timestamp block of at least twice the capacity (amortized O(1) per row)."""
+        old_ts_offset, old_forces_offset = self.ts_offset, self.forces_offset
+        self._file.flush(); tmp_path = self.path + '.grow'
+        with open(tmp_path, 'w+b') as f:
+            self._write_layout(f, max(2 * self.capacity, min_rows))
+            self._file.seek(old_ts_offset); f.seek(self.ts_offset); f.write(self._file.read(8 * self.num_rows))
+            self._file.seek(old_forces_offset); f.seek(self.forces_offset); shutil.copyfileobj(self._file, f, 1 << 24)
+        self._file.close(); os.replace(tmp_path, self.path) # Readers keep their maps of the old inode until refresh()
+        self._file = open(self.path, 'r+b'); self._file.seek(0, os.SEEK_END)
+        logging.info(f"Session {self.path}: time index grown to {self.capacity} rows.")
+
+    def flush(self):
+        """Makes appended rows visible to readers and refreshes the header summary in place."""
+        end = self._file.tell()
+        header_size = self.ts_offset - _PREAMBLE.size
+        header_bytes = json.dumps(self._header()).encode('utf-8')
+        if len(header_bytes) <= header_size:
+            self._file.seek(_PREAMBLE.size); self._file.write(header_bytes.ljust(header_size)); self._file.seek(end)
+        else: logging.warning(f"Session header outgrew its reserved {header_size} bytes; summary not refreshed.")
+        self._file.flush()
+
+    def close(self):
+        if self._file is None: return
+        self.flush(); self._file.close(); self._file = None
+
+    def __enter__(self): return self
+    def __exit__(self, *exc): self.close()
+
+def _read_header(path):
+    """(header, header end offset, inode) of a session file."""
+    with open(path, 'rb') as f:
+        magic, header_size = _PREAMBLE.unpack(f.read(_PREAMBLE.size))
+        if magic != SESSION_MAGIC: raise ValueError(f"{path} is not a version {SESSION_VERSION} session file")
+        header = json.loads(f.read(header_size).decode('utf-8'))
+        inode = os.fstat(f.fileno()).st_ino
+    return header, _PREAMBLE.size + header_size, inode
+
+class SessionFile:
+    """Read-only memory-mapped view of a session file. Opening costs one header read plus two maps."""
+    def __init__(self, path):
+        self.path = path
+        self.timestamps = None # float64 (n_rows,) memmap of the time index, no copy
+        self.forces = None # float32 (n_rows, n_columns) memmap, no copy
+        self._inode = None
+        self.refresh()
+
+    def _open(self):
+        self.header, _, self._inode = _read_header(self.path)
+        self.pairs = [tuple(p) for p in self.header['layout']['pairs']]
+        self.kind = self.header['layout']['kind']; self.layout_name = self.header['layout'].get('name')
+        self.max_force = self.header.get('max_force', 0.0)
+        ti = self.header['time_index']
+        self.ts_offset, self.capacity, self.forces_offset = ti['offset'], ti['capacity'], self.header['forces_offset']
+        self.timestamps = None
+
+    def refresh(self):
+        """Re-maps the file to pick up rows appended since opening (and a relocated file after the writer grew it)."""
+        if self._inode is None or os.stat(self.path).st_ino != self._inode: self._open()
+        num_rows = min(self.capacity, max(0, os.path.getsize(self.path) - self.forces_offset) // (4 * len(self.pairs)))
+        if self.timestamps is not None and num_rows == len(self.timestamps): return
+        prev = 0 if self.timestamps is None else len(self.timestamps)
+        if num_rows:
+            self.timestamps = np.memmap(self.path, dtype='<f8', mode='r', offset=self.ts_offset, shape=(num_rows,))
+            self.forces = np.memmap(self.path, dtype='<f4', mode='r', offset=self.forces_offset, shape=(num_rows, len(self.pairs)))
+        else: self.timestamps = np.empty(0, dtype='<f8'); self.forces = np.empty((0, len(self.pairs)), dtype='<f4')
+        new = self.timestamps[max(prev - 1, 0):] # Only the rows since the last map need checking
+        self.monotonic = (prev == 0 or self.monotonic) and not np.any(new[1:] < new[:-1])
+
+    def __len__(self): return len(self.timestamps)
+
+    def row_range(self, t_start, t_end):
+        """[i0, i1) rows with t_start <= t <= t_end of a monotonic session (see time_slice for the general case)."""
+        if not self.monotonic: raise ValueError("Row ranges need monotonically increasing timestamps; use time_slice()")
+        ts = self.timestamps
+        return int(np.searchsorted(ts, t_start, side='left')), int(np.searchsorted(ts, t_end, side='right'))
+
+    def time_slice(self, t_start, t_end):
+        """(timestamps, forces) for t_start <= t <= t_end: zero-copy views, or copies of the matching rows when not monotonic."""
+        if not self.monotonic:
+            rows = np.flatnonzero((self.timestamps >= t_start) & (self.timestamps <= t_end))
+            return self.timestamps[rows], self.forces[rows]
+        i0, i1 = self.row_range(t_start, t_end)
+        return self.timestamps[i0:i1], self.forces[i0:i1]
+
+def write_session(path, timestamps, force_matrix, pairs):
+    with SessionWriter(path, pairs, capacity=len(timestamps)) as writer: writer.append(timestamps, force_matrix)
+    logging.info(f"Session written to {path}: {len(timestamps)} rows x {len(pairs)} sensor points.")
+
+def csv_to_session(csv_path, session_path, chunksize=1_000_000):
+    """Cleans a long-format sensor CSV into a session file with only `chunksize` CSV rows in memory at a time.
+
+    A first pass collects the (tooth, point) pairs, a second scatters each cleaned chunk into session rows.
+    Rows carrying a chunk's latest timestamp are held back and merged into the next chunk, so a timestamp
+    split across a chunk boundary still becomes one row with keep='last' duplicates. Input is expected in
+    time order, as the readers write it; out-of-order input converts but the session is marked non-monotonic.
+    """
+    from data_processing import clean_samples, encode_pairs, decode_pairs
+    codes = np.empty(0, dtype=np.int64); times = np.empty(0)
+    for chunk in pd.read_csv(csv_path, chunksize=chunksize):
+        chunk = clean_samples(chunk)
+        if len(chunk):
+            codes = np.union1d(codes, pd.unique(encode_pairs(chunk['tooth_id'].to_numpy(), chunk['sensor_point_id'].to_numpy())))
+            times = np.union1d(times, pd.unique(chunk['timestamp'].to_numpy(dtype=float))) # Sizes the time index, so it never has to grow
+    if not len(codes): raise ValueError(f"{csv_path} contains no valid samples")
+    held = None
+    with SessionWriter(session_path, decode_pairs(codes), capacity=len(times)) as writer:
+        for chunk in pd.read_csv(csv_path, chunksize=chunksize):
+            chunk = clean_samples(chunk if held is None else pd.concat([held, chunk], ignore_index=True))
+            if not len(chunk): continue
+            ts = chunk['timestamp'].to_numpy(dtype=float); tail = ts == ts.max()
+            held = chunk[tail]; _append_samples(writer, chunk[~tail], codes)
+        if held is not None: _append_samples(writer, held, codes)
+        num_rows = writer.num_rows
+    logging.info(f"{csv_path} converted to session {session_path}: {num_rows} rows x {len(codes)} sensor points.")
+    return session_path
+
+def _append_samples(writer, samples, codes):
+    """Scatters cleaned long-format samples into session rows (one per timestamp) and appends them."""
+    from data_processing import encode_pairs, scatter_keep_last
+    if not len(samples): return
+    ts_codes, ts_uniques = pd.factorize(samples['timestamp'].to_numpy(dtype=float), sort=True)
+    cols = np.searchsorted(codes, encode_pairs(samples['tooth_id'].to_numpy(), samples['sensor_point_id'].to_numpy()))
+    rows = np.full((len(ts_uniques), len(codes)), np.nan, dtype=np.float32)
+    scatter_keep_last(rows, ts_codes, cols, samples['force'].to_numpy(dtype=np.float32))
+    writer.append(ts_uniques, rows)
+
+def session_to_csv(session_path, csv_path, block_rows=65536):
+    """Exports a session back to long-format CSV, block_rows session rows at a time. contact_time is not stored in sessions and is written as 0."""
+    session = SessionFile(session_path)
+    pairs = np.array(session.pairs, dtype=np.int64).reshape(-1, 2)
+    num_samples = 0
+    with open(csv_path, 'w', newline='') as f:
+        for i0 in range(0, max(len(session), 1), block_rows):
+            forces = session.forces[i0:i0 + block_rows]
+            row_idx, col_idx = np.nonzero(np.isfinite(forces))
+            pd.DataFrame({'timestamp': session.timestamps[i0:i0 + block_rows][row_idx], 'tooth_id': pairs[col_idx, 0], 'sensor_point_id': pairs[col_idx, 1],
+                          'force': forces[row_idx, col_idx], 'contact_time': 0.0}).to_csv(f, index=False, header=i0 == 0)
+            num_samples += len(row_idx)
+    logging.info(f"Session {session_path} exported to {csv_path}: {num_samples} samples.")
+    return csv_path
+# --- END OF FILE session_file.py ---
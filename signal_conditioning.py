@@ -0,0 +1,156 @@
+# --- START OF FILE signal_conditioning.py ---
+import time
+import logging
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Stages are stateful and work on whole frames: process(frames) takes an (n, cells) float32 block
+# and returns the conditioned block, carrying per-cell state over to the next call. Feeding a
+# session one frame at a time or in blocks of any size gives the same output.
+
+class NoiseFloorStage:
+    """Subtracts a per-cell noise floor and clips at zero.
+
+    The floor is mean + k_sigma * std of each cell over idle frames: pass it in, call calibrate(),
+    or let the first `calibration_frames` idle frames set it (frames pass through floored at 0 until
+    then). A frame counts as idle when at most `idle_fraction` of its cells read above `idle_threshold`,
+    so contact present while calibrating is not learned as noise; `calibration_skipped` counts the
+    frames left out for that reason.
+    """
+    def __init__(self, floor=None, k_sigma=3.0, calibration_frames=0, idle_threshold=20.0, idle_fraction=0.01):
+        self.floor = None if floor is None else np.asarray(floor, dtype=np.float32)
+        self.k_sigma = k_sigma; self.calibration_frames = calibration_frames
+        self.idle_threshold = idle_threshold; self.idle_fraction = idle_fraction
+        self._n = 0; self._sum = None; self._sumsq = None; self.calibration_skipped = 0
+
+    def calibrate(self, idle_frames):
+        idle = np.asarray(idle_frames, dtype=np.float64)
+        self.floor = (idle.mean(axis=0) + self.k_sigma * idle.std(axis=0)).astype(np.float32)
+        return self.floor
+
+    def reset(self): self._n = 0; self._sum = None; self._sumsq = None; self.calibration_skipped = 0
+
+    def process(self, frames):
+        passed = 0 # Leading rows that pass through floored at 0 because the floor is not known yet
+        if self.floor is None and self.calibration_frames:
+            idle = np.count_nonzero(frames > self.idle_threshold, axis=1) <= self.idle_fraction * frames.shape[1]
+            rows = np.flatnonzero(idle)[:self.calibration_frames - self._n]; take = frames[rows].astype(np.float64)
+            if self._sum is None: self._sum = np.zeros(frames.shape[1]); self._sumsq = np.zeros(frames.shape[1])
+            self._sum += take.sum(axis=0); self._sumsq += (take * take).sum(axis=0); self._n += len(take)
+            passed = len(frames)
+            if self._n >= self.calibration_frames:
+                passed = int(rows[-1]) + 1
+                mean = self._sum / self._n; std = np.sqrt(np.maximum(self._sumsq / self._n - mean * mean, 0))
+                self.floor = (mean + self.k_sigma * std).astype(np.float32)
+                logging.info(f"Noise floor calibrated over {self._n} idle frames: median {np.median(self.floor):.1f}, max {self.floor.max():.1f}")
+            self.calibration_skipped += passed - np.count_nonzero(idle[:passed])
+        np.maximum(frames[:passed], 0, out=frames[:passed])
+        if self.floor is None: return np.maximum(frames, 0, out=frames)
+        np.maximum(frames[passed:] - self.floor, 0, out=frames[passed:])
+        return frames
+
+class MedianDespikeStage:
+    """Causal median over the last `window` frames per cell; removes single-frame spikes (window 3 removes 1-frame ones)."""
+    def __init__(self, window=3):
+        self.window = int(window); self._history = None # Last window - 1 input frames
+
+    def reset(self): self._history = None
+
+    def process(self, frames):
+        if self.window <= 1: return frames
+        if self._history is None: self._history = np.repeat(frames[:1], self.window - 1, axis=0)
+        padded = np.concatenate((self._history, frames))
+        self._history = padded[-(self.window - 1):].copy()
+        return np.median(sliding_window_view(padded, self.window, axis=0), axis=-1).astype(np.float32)
+
+class EmaStage:
+    """First-order IIR low-pass per cell: y += alpha * (x - y)."""
+    def __init__(self, alpha=0.3):
+        self.alpha = np.float32(alpha); self._state = None
+
+    def reset(self): self._state = None
+
+    def process(self, frames):
+        if self._state is None: self._state = frames[0].copy()
+        state = self._state; alpha = self.alpha
+        for i in range(len(frames)): # The recursion runs over time; every step is vectorized over cells
+            state += alpha * (frames[i] - state); frames[i] = state
+        return frames
+
+class HysteresisContactStage:
+    """Per-cell contact state: on above `on_threshold`, off again only below `off_threshold`.
+
+    Cells not in contact are zeroed. `contact` holds the mask after the last processed frame.
+    """
+    def __init__(self, on_threshold=8.0, off_threshold=4.0):
+        if off_threshold > on_threshold: raise ValueError("off_threshold must not exceed on_threshold")
+        self.on_threshold = on_threshold; self.off_threshold = off_threshold; self.contact = None
+
+    def reset(self): self.contact = None
+
+    def process(self, frames):
+        if self.contact is None: self.contact = np.zeros(frames.shape[1], dtype=bool)
+        contact = self.contact
+        for i in range(len(frames)):
+            contact |= frames[i] > self.on_threshold; contact &= frames[i] >= self.off_threshold
+            frames[i] *= contact
+        return frames
+
+class ConditioningPipeline:
+    """Ordered stages run over live frames (process_frame) or stored blocks (process_block, process_matrix)."""
+    def __init__(self, stages):
+        self.stages = list(stages)
+        self.frames_processed = 0; self.time_spent = 0.0
+
+    @property
+    def contact(self):
+        """Contact mask of the last hysteresis stage, if there is one."""
+        for stage in reversed(self.stages):
+            if isinstance(stage, HysteresisContactStage): return stage.contact
+        return None
+
+    def reset(self):
+        for stage in self.stages: stage.reset()
+        self.frames_processed = 0; self.time_spent = 0.0
+
+    def process_block(self, frames):
+        """(n, cells) block in, conditioned float32 block out; NaN (no sample) is treated as 0."""
+        t0 = time.perf_counter()
+        block = np.nan_to_num(np.array(frames, dtype=np.float32, ndmin=2), nan=0.0)
+        for stage in self.stages: block = stage.process(block)
+        self.frames_processed += len(block); self.time_spent += time.perf_counter() - t0
+        return block
+
+    def process_frame(self, frame): return self.process_block(np.asarray(frame)[None, :])[0]
+
+    def process_matrix(self, matrix, block_rows=65536, out=None):
+        """Batch mode over a stored session (e.g. a memory-mapped force_matrix), block_rows rows at a time."""
+        out = np.empty(matrix.shape, dtype=np.float32) if out is None else out
+        for i0 in range(0, len(matrix), block_rows): out[i0:i0 + block_rows] = self.process_block(matrix[i0:i0 + block_rows])
+        return out
+
+    def stats(self):
+        return {'frames': self.frames_processed, 'mean_ms_per_frame': 1e3 * self.time_spent / self.frames_processed if self.frames_processed else 0.0}
+
+def default_pipeline(noise_calibration_frames=50, despike_window=3, ema_alpha=0.3, on_threshold=8.0, off_threshold=4.0, idle_threshold=20.0):
+    """Noise floor -> median despike -> EMA -> hysteresis. Despiking comes before smoothing so spikes are not smeared.
+
+    The noise floor is learned from the first noise_calibration_frames idle frames (see NoiseFloorStage).
+    """
+    return ConditioningPipeline([NoiseFloorStage(calibration_frames=noise_calibration_frames, idle_threshold=idle_threshold), MedianDespikeStage(despike_window),
+                                 EmaStage(ema_alpha), HysteresisContactStage(on_threshold, off_threshold)])
+
+if __name__ == '__main__':
+    from hardware_simulator import HardwareFrameSimulator
+    from frame_protocol import HW_FRAME_CELLS
+    sim = HardwareFrameSimulator(seed=0)
+    frames = np.resize(sim.frames(500), (500, HW_FRAME_CELLS)) # Widened to the full 2288-cell frame size
+    pipeline = default_pipeline(noise_calibration_frames=0)
+    pipeline.stages[0].calibrate(np.abs(np.random.default_rng(0).normal(0, sim.noise_std, (200, HW_FRAME_CELLS)))) # Idle sensor
+    for frame in frames: pipeline.process_frame(frame)
+    logging.info(f"Live: {pipeline.stats()['mean_ms_per_frame']:.3f} ms per {HW_FRAME_CELLS}-cell frame")
+    pipeline.reset(); t0 = time.perf_counter(); pipeline.process_block(frames)
+    logging.info(f"Batch: {1e3 * (time.perf_counter() - t0) / len(frames):.3f} ms per frame")
+# --- END OF FILE signal_conditioning.py ---
@@ -0,0 +1,64 @@
+# --- START OF FILE synthetic_session.py ---
+import numpy as np
+import pandas as pd
+import logging
+from ring_buffer import SAMPLE_DTYPE
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Per sensor point variation ranges used when a tooth has the standard 2x2 sensor layout
+FOUR_POINT_VARIATION_LOW = np.array([0.7, 0.9, 0.6, 0.8])
+FOUR_POINT_VARIATION_HIGH = np.array([1.1, 1.3, 1.0, 1.2])
+
+def generate_session_chunks(duration=5, num_teeth=16, num_sensor_points_per_tooth=4, dt=0.1, chunk_steps=10000, rng=None):
+    """Yields SAMPLE_DTYPE arrays covering `duration` seconds, `chunk_steps` timestamps at a time.
+
+    Statistically equivalent to the original per-scalar simulation: a sinusoidal per-tooth base force,
+    premolar (x0.7-1.3) and molar (x0.9-1.5) multipliers, per-point variation, +-10 noise and clamping
+    to 0-100. Each chunk is a handful of vectorized draws from `rng` (a np.random.Generator or a seed).
+    """
+    rng = rng if isinstance(rng, np.random.Generator) else np.random.default_rng(rng)
+    n_steps = len(np.arange(0, duration, dt))
+    tooth_ids = np.arange(1, num_teeth + 1)
+    premolar = ((tooth_ids >= 4) & (tooth_ids <= 6)) | ((tooth_ids >= 11) & (tooth_ids <= 13))
+    molar = ~premolar & ((tooth_ids <= 3) | (tooth_ids >= 14))
+    if num_sensor_points_per_tooth == 4: var_low, var_high = FOUR_POINT_VARIATION_LOW, FOUR_POINT_VARIATION_HIGH
+    else: var_low, var_high = np.full(num_sensor_points_per_tooth, 0.7), np.full(num_sensor_points_per_tooth, 1.3)
+    points_per_step = num_teeth * num_sensor_points_per_tooth
+    tooth_col = np.repeat(tooth_ids, num_sensor_points_per_tooth).astype(np.int16)
+    point_col = np.tile(np.arange(1, num_sensor_points_per_tooth + 1), num_teeth).astype(np.int16)
+
+    for start in range(0, n_steps, chunk_steps):
+        steps = np.arange(start, min(start + chunk_steps, n_steps)); n_t = len(steps)
+        t = steps * dt
+        base = rng.uniform(5, 60, (n_t, num_teeth)) * (0.8 + 0.4 * np.sin(t[:, None] * 0.5 + tooth_ids[None, :] * 0.3))
+        base[:, premolar] *= rng.uniform(0.7, 1.3, (n_t, premolar.sum()))
+        base[:, molar] *= rng.uniform(0.9, 1.5, (n_t, molar.sum()))
+        force = base[:, :, None] * rng.uniform(var_low, var_high, (n_t, num_teeth, num_sensor_points_per_tooth))
+        force += rng.uniform(-10, 10, force.shape)
+        np.clip(force, 0, 100, out=force)
+
+        records = np.empty(n_t * points_per_step, dtype=SAMPLE_DTYPE)
+        records['timestamp'] = np.repeat(t, points_per_step)
+        records['tooth_id'] = np.tile(tooth_col, n_t)
+        records['sensor_point_id'] = np.tile(point_col, n_t)
+        records['force'] = force.ravel()
+        records['contact_time'] = rng.uniform(0.01, 0.05, len(records))
+        yield records
+
+def generate_session(duration=5, num_teeth=16, num_sensor_points_per_tooth=4, dt=0.1, rng=None):
+    """Whole session as a single SAMPLE_DTYPE array (use generate_session_chunks for long sessions)."""
+    out = np.empty(len(np.arange(0, duration, dt)) * num_teeth * num_sensor_points_per_tooth, dtype=SAMPLE_DTYPE); filled = 0
+    for records in generate_session_chunks(duration, num_teeth, num_sensor_points_per_tooth, dt, rng=rng):
+        out[filled:filled + len(records)] = records; filled += len(records)
+    return out
+
+def save_synthetic_session_csv(filename, duration, num_teeth=16, num_sensor_points_per_tooth=4, dt=0.1, chunk_steps=10000, rng=None):
+    """Streams a synthetic session straight to CSV, one time chunk in memory at a time."""
+    total = 0
+    for i, records in enumerate(generate_session_chunks(duration, num_teeth, num_sensor_points_per_tooth, dt, chunk_steps, rng)):
+        pd.DataFrame(records).to_csv(filename, mode='w' if i == 0 else 'a', header=(i == 0), index=False)
+        total += len(records)
+    logging.info(f"Synthetic session written to {filename}: {total} rows.")
+    return total
+# --- END OF FILE synthetic_session.py ---
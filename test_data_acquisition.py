@@ -0,0 +1,21 @@
+# --- START OF FILE test_data_acquisition.py ---
+import numpy as np
+from data_acquisition import parse_sample_lines
+
+def test_parses_valid_lines():
+    records, n_invalid = parse_sample_lines([b'0.5,11,2,42.5,0.1', b'0.6,12,3,0,0'])
+    assert n_invalid == 0
+    assert records['tooth_id'].tolist() == [11, 12] and records['sensor_point_id'].tolist() == [2, 3]
+    assert np.allclose(records['force'], [42.5, 0.0])
+
+def test_malformed_lines_are_invalid():
+    records, n_invalid = parse_sample_lines([b'0.5,11,2,42.5,0.1', b'0.6,12,3,0', b'0.7,x,3,1,0', b''])
+    assert n_invalid == 2 and records['tooth_id'].tolist() == [11]
+
+def test_out_of_range_ids_are_invalid():
+    lines = [b'0.1,70000,1,5,0', b'0.2,11,-40000,5,0', b'0.3,11,nan,5,0', b'0.4,32767,-32768,5,0', b'0.5,11,1,5,0']
+    records, n_invalid = parse_sample_lines(lines)
+    assert n_invalid == 3 # No wrap-around (70000 would become 4464)
+    assert records['tooth_id'].tolist() == [32767, 11] and records['sensor_point_id'].tolist() == [-32768, 1]
+    assert records['timestamp'].tolist() == [0.4, 0.5]
+# --- END OF FILE test_data_acquisition.py ---
@@ -0,0 +1,77 @@
+# --- START OF FILE test_frame_protocol.py ---
+import numpy as np
+from frame_protocol import FrameDecoder, encode_frame, frame_size, SYNC
+
+CELLS = 12
+
+def make_frames(seqs, num_cells=CELLS):
+    cells = [np.arange(num_cells, dtype=np.uint16) * 3 + (seq & 0xFF) for seq in seqs]
+    return [encode_frame(seq, seq * 0.01, c) for seq, c in zip(seqs, cells)], cells
+
+def test_whole_frames():
+    wire, cells = make_frames(range(3))
+    frames = FrameDecoder(CELLS).feed(b''.join(wire))
+    assert frames['seq'].tolist() == [0, 1, 2]
+    assert np.allclose(frames['timestamp'], [0.0, 0.01, 0.02])
+    assert np.array_equal(frames['cells'], np.array(cells))
+
+def test_split_frame():
+    wire, cells = make_frames(range(2))
+    stream = b''.join(wire)
+    for chunk in (1, 3, 7, frame_size(CELLS) - 1):
+        decoder = FrameDecoder(CELLS)
+        parts = [decoder.feed(stream[i:i + chunk]) for i in range(0, len(stream), chunk)]
+        frames = np.concatenate(parts)
+        assert frames['seq'].tolist() == [0, 1], chunk
+        assert np.array_equal(frames['cells'], np.array(cells))
+        assert decoder.bad_frames == 0 and decoder.resync_bytes == 0 and len(decoder._buf) == 0
+
+def test_partial_frame_waits_for_rest():
+    wire, _ = make_frames([5])
+    decoder = FrameDecoder(CELLS)
+    assert len(decoder.feed(wire[0][:-1])) == 0
+    assert decoder.feed(wire[0][-1:])['seq'].tolist() == [5]
+
+def test_corrupt_crc():
+    wire, cells = make_frames(range(3))
+    bad = bytearray(wire[1]); bad[-6] ^= 0xFF # A cell byte: the CRC no longer matches
+    decoder = FrameDecoder(CELLS)
+    frames = decoder.feed(wire[0] + bytes(bad) + wire[2])
+    assert frames['seq'].tolist() == [0, 2]
+    assert np.array_equal(frames['cells'], np.array([cells[0], cells[2]]))
+    assert decoder.bad_frames == 1 and decoder.frames_decoded == 2
+
+def test_wrong_cell_count():
+    decoder = FrameDecoder(CELLS)
+    other = encode_frame(0, 0.0, np.zeros(CELLS + 1, dtype=np.uint16))
+    good, _ = make_frames([1])
+    frames = decoder.feed(other + good[0])
+    assert frames['seq'].tolist() == [1] and decoder.bad_frames >= 1
+
+def test_garbage_before_sync():
+    wire, cells = make_frames([7])
+    garbage = bytes(range(1, 100)) + SYNC[:3] # Includes a sync prefix that never completes
+    decoder = FrameDecoder(CELLS)
+    assert len(decoder.feed(garbage)) == 0
+    frames = decoder.feed(wire[0])
+    assert frames['seq'].tolist() == [7] and np.array_equal(frames['cells'][0], cells[0])
+    assert decoder.resync_bytes == len(garbage) and decoder.bad_frames == 0
+
+def test_seq_gap():
+    wire, _ = make_frames([0, 1, 3, 4, 10])
+    decoder = FrameDecoder(CELLS)
+    frames = decoder.feed(b''.join(wire))
+    assert frames['seq'].tolist() == [0, 1, 3, 4, 10]
+    assert decoder.seq_gaps == 2
+
+def test_seq_wraps_without_gap():
+    wire, _ = make_frames([0xFFFFFFFF, 0])
+    decoder = FrameDecoder(CELLS)
+    decoder.feed(b''.join(wire))
+    assert decoder.seq_gaps == 0
+
+def test_full_size_frame():
+    cells = np.random.default_rng(0).integers(0, 4096, 44 * 52).astype(np.uint16)
+    frames = FrameDecoder().feed(b'\x00' * 5 + encode_frame(42, 1.5, cells))
+    assert frames['seq'].tolist() == [42] and np.array_equal(frames['cells'][0], cells)
+# --- END OF FILE test_frame_protocol.py ---
@@ -0,0 +1,51 @@
+# --- START OF FILE test_signal_conditioning.py ---
+import numpy as np
+from signal_conditioning import NoiseFloorStage, default_pipeline
+from hardware_simulator import HardwareFrameSimulator
+
+CELLS = 200
+
+def contact_then_idle(rng, contact_frames=30, idle_frames=100, force=500.0):
+    """Calibration window that starts in contact: cells 0..19 pressed, then an idle sensor, then contact again."""
+    frames = np.abs(rng.normal(0, 2.0, (contact_frames + idle_frames + contact_frames, CELLS))).astype(np.float32)
+    frames[:contact_frames, :20] += force; frames[-contact_frames:, :20] += force
+    return frames
+
+def test_calibration_skips_contact_frames():
+    frames = contact_then_idle(np.random.default_rng(0))
+    stage = NoiseFloorStage(calibration_frames=50)
+    out = stage.process(frames.copy())
+    assert stage.floor is not None and stage.floor.max() < 20 # Learned from idle frames only
+    assert stage.calibration_skipped == 30
+    assert (out[-30:, :20] > 400).all() # Later contact on the same cells is not suppressed
+    assert np.array_equal(out[:30], frames[:30]) # Before the floor is known, frames pass through
+
+def test_ungated_calibration_learns_contact_as_noise():
+    frames = contact_then_idle(np.random.default_rng(0))
+    stage = NoiseFloorStage(calibration_frames=50, idle_fraction=1.0) # Every frame counts as idle
+    out = stage.process(frames.copy())
+    assert stage.floor[:20].min() > 400 and (out[-30:, :20] < 100).all()
+
+def test_calibration_is_block_size_independent():
+    frames = contact_then_idle(np.random.default_rng(1))
+    whole = NoiseFloorStage(calibration_frames=50).process(frames.copy())
+    stage = NoiseFloorStage(calibration_frames=50)
+    pieces = np.concatenate([stage.process(frames[i:i + 7].copy()) for i in range(0, len(frames), 7)])
+    assert np.array_equal(whole, pieces) and stage.calibration_skipped == 30
+
+def test_no_idle_frames_keeps_waiting():
+    frames = contact_then_idle(np.random.default_rng(2), idle_frames=0)
+    stage = NoiseFloorStage(calibration_frames=10)
+    stage.process(frames.copy())
+    assert stage.floor is None and stage.calibration_skipped == len(frames)
+
+def test_default_pipeline_keeps_simulated_contact():
+    sim = HardwareFrameSimulator(seed=0) # In contact from the first frame
+    frames = sim.frames(600)
+    pipeline = default_pipeline()
+    out = pipeline.process_block(frames)
+    floor = pipeline.stages[0].floor
+    assert floor is not None and np.median(floor) < 20
+    bite = 300 + np.count_nonzero(frames[300:] > 100, axis=1).argmax() # A bite well after calibration finished
+    assert np.count_nonzero(out[bite]) > 0.8 * np.count_nonzero(frames[bite] > 100)
+# --- END OF FILE test_signal_conditioning.py ---